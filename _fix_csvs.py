@@ -10,6 +10,8 @@ import csv, re, os, sys, calendar
 from pathlib import Path
 from datetime import date
 
+from apps.core.classifier import EXPORT_NAME_RULES
+
 BASE_DIR = Path(__file__).resolve().parent
 SRC = BASE_DIR / "facts_export.csv"           # origen
 OUTDIR = BASE_DIR / "import_data" / "templates"
@@ -41,13 +43,7 @@ MAP = {
     "Impuestos sobre beneficios": "TAX",
 }
 def guess_type(name: str):
-    n = (name or "").lower()
-    if "venta" in n: return "REVENUE"
-    if "compra" in n or "materia prima" in n or "costo" in n: return "COGS"
-    if "depreci" in n or "amortiz" in n: return "DEPR"
-    if "financ" in n: return "FIN"
-    if "impuest" in n: return "TAX"
-    return "OPEX"
+    return EXPORT_NAME_RULES.classify(name)  # reglas en apps/core/classifier.py
 
 # ---------- lee el origen ----------
 if not SRC.exists():
@@ -1,20 +1,74 @@
 ﻿from django.contrib import admin
+from django.db import transaction
+
+from .aggregates import refresh_aggregates, refresh_yearly_aggregates
 from .models import (
     Company, Scenario, Period,
-    Account, CostCenter, FactFinance,
+    Account, CostCenter, FactFinance, FactMonthlyAggregate, FactYearlyAggregate,
     KPI, IncomeStatement, BalanceSheet, CashFlowStatement,
     Framework, FrameworkSection, KPIFrameworkLink,
     Assumption, RevenueDriver, ExpenseProjection,
-    DebtInstrument, AmortizationSchedule
+    DebtInstrument, AmortizationSchedule,
+    ImportManifest, ImportPartitionState, ImportJob, DataVersion,
+    ConsolidationGroup, FxRate, EliminationRule, ConsolidationState,
 )
+from .versions import ACCOUNTS, COMPANIES, SCENARIOS, bump
+
+class VersionedAdmin(admin.ModelAdmin):
+    """Catálogos que muestran los reportes: cada alta, cambio o baja sube `version_keys` (invalida sus ETag)."""
+    version_keys = ()
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            bump(self.version_keys)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            bump(self.version_keys)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            super().delete_queryset(request, queryset)
+            bump(self.version_keys)
+
+# Campos de Account que definen las líneas del agregado anual
+YEARLY_LINE_FIELDS = ("statement", "group")
+
+def _account_partitions(accounts):
+    """Particiones con hechos de esas cuentas (se borran en cascada con ellas)."""
+    facts = FactFinance.objects.filter(account__in=accounts)
+    return set(facts.values_list("company_id", "scenario_id", "period_id").distinct().order_by())
 
 @admin.register(Account)
-class AccountAdmin(admin.ModelAdmin):
+class AccountAdmin(VersionedAdmin):
+    """Cambiar statement/group recalcula el anual; borrar cuentas, los agregados de sus hechos."""
+    version_keys = (ACCOUNTS,)
     list_display = ("code", "name", "statement", "group", "subgroup", "order_index", "natural_sign", "measure")
     search_fields = ("code", "name")
     list_filter = ("statement", "group", "subgroup", "measure", "natural_sign")
     ordering = ("code",)
 
+    def save_model(self, request, obj, form, change):
+        old = Account.objects.filter(pk=obj.pk).values(*YEARLY_LINE_FIELDS).first() if change else None
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            if old and any(old[f] != getattr(obj, f) for f in YEARLY_LINE_FIELDS):
+                refresh_yearly_aggregates()
+
+    def delete_model(self, request, obj):
+        partitions = _account_partitions([obj])
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            refresh_aggregates(partitions)
+
+    def delete_queryset(self, request, queryset):
+        partitions = _account_partitions(queryset)
+        with transaction.atomic():
+            super().delete_queryset(request, queryset)
+            refresh_aggregates(partitions)
+
 @admin.register(CostCenter)
 class CostCenterAdmin(admin.ModelAdmin):
     list_display = ("code", "name")
@@ -22,12 +76,14 @@ class CostCenterAdmin(admin.ModelAdmin):
     ordering = ("code",)
 
 @admin.register(Company)
-class CompanyAdmin(admin.ModelAdmin):
+class CompanyAdmin(VersionedAdmin):
+    version_keys = (COMPANIES,)
     list_display = ("name", "code", "country", "currency")
     search_fields = ("name", "code")
 
 @admin.register(Scenario)
-class ScenarioAdmin(admin.ModelAdmin):
+class ScenarioAdmin(VersionedAdmin):
+    version_keys = (SCENARIOS,)
     list_display = ("company", "name", "created_at", "is_locked")
     list_filter = ("company", "is_locked")
     search_fields = ("name",)
@@ -38,12 +94,61 @@ class PeriodAdmin(admin.ModelAdmin):
     list_filter = ("year", "month")
     ordering = ("year", "month")
 
+def _partition(fact):
+    return (fact.company_id, fact.scenario_id, fact.period_id)
+
 @admin.register(FactFinance)
 class FactFinanceAdmin(admin.ModelAdmin):
+    """Cada alta, cambio o baja recalcula los agregados (y versiones) de las particiones afectadas."""
     list_display = ("company", "scenario", "period", "account", "center", "amount")
     list_filter = ("company", "scenario", "period__year", "period__month", "account")
     search_fields = ("account__code", "account__name")
 
+    def save_model(self, request, obj, form, change):
+        partitions = {_partition(obj)}
+        if change:
+            old = FactFinance.objects.filter(pk=obj.pk).values_list("company_id", "scenario_id", "period_id").first()
+            if old:
+                partitions.add(old)  # si cambió de partición, la anterior también
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            refresh_aggregates(partitions)
+
+    def delete_model(self, request, obj):
+        partitions = {_partition(obj)}
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            refresh_aggregates(partitions)
+
+    def delete_queryset(self, request, queryset):
+        partitions = set(queryset.values_list("company_id", "scenario_id", "period_id").distinct().order_by())
+        with transaction.atomic():
+            super().delete_queryset(request, queryset)
+            refresh_aggregates(partitions)
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    """Tablas derivadas (se recalculan desde FactFinance): solo lectura en el admin."""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(FactMonthlyAggregate)
+class FactMonthlyAggregateAdmin(ReadOnlyAdmin):
+    list_display = ("company", "scenario", "period", "account", "amount", "line_count")
+    list_filter = ("company", "scenario", "period__year", "period__month")
+    search_fields = ("account__code", "account__name")
+
+@admin.register(FactYearlyAggregate)
+class FactYearlyAggregateAdmin(ReadOnlyAdmin):
+    list_display = ("company", "scenario", "year", "statement", "line", "amount")
+    list_filter = ("company", "scenario", "year", "statement")
+
 @admin.register(KPI)
 class KPIAdmin(admin.ModelAdmin):
     list_display = ("company", "scenario", "period", "name", "value", "unit")
@@ -101,3 +206,46 @@ class DebtInstrumentAdmin(admin.ModelAdmin):
 @admin.register(AmortizationSchedule)
 class AmortizationScheduleAdmin(admin.ModelAdmin):
     list_display = ("debt", "period", "installment", "interest", "principal", "balance")
+
+@admin.register(ImportManifest)
+class ImportManifestAdmin(admin.ModelAdmin):
+    list_display = ("source", "fingerprint", "size", "imported_at")
+    search_fields = ("source",)
+
+@admin.register(ImportPartitionState)
+class ImportPartitionStateAdmin(admin.ModelAdmin):
+    list_display = ("manifest", "company", "scenario", "period", "row_count", "updated_at")
+    list_filter = ("company", "scenario", "period__year")
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ("command", "source", "status", "rows_done", "started_at", "updated_at")
+    list_filter = ("command", "status")
+    search_fields = ("source",)
+
+@admin.register(DataVersion)
+class DataVersionAdmin(admin.ModelAdmin):
+    list_display = ("key", "version", "updated_at")
+    search_fields = ("key",)
+    ordering = ("key",)
+
+@admin.register(ConsolidationGroup)
+class ConsolidationGroupAdmin(admin.ModelAdmin):
+    list_display = ("code", "name", "company", "currency")
+    search_fields = ("code", "name")
+    filter_horizontal = ("members",)
+
+@admin.register(FxRate)
+class FxRateAdmin(admin.ModelAdmin):
+    list_display = ("period", "currency", "base", "rate")
+    list_filter = ("currency", "base", "period__year")
+
+@admin.register(EliminationRule)
+class EliminationRuleAdmin(admin.ModelAdmin):
+    list_display = ("group", "account", "note")
+    list_filter = ("group",)
+
+@admin.register(ConsolidationState)
+class ConsolidationStateAdmin(admin.ModelAdmin):
+    list_display = ("group", "scenario_name", "period", "row_count", "updated_at")
+    list_filter = ("group", "scenario_name", "period__year")
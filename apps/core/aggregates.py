@@ -0,0 +1,132 @@
+# apps/core/aggregates.py
+"""
+Agregados materializados de FactFinance.
+
+  - FactMonthlyAggregate: importe por (company, scenario, period, account),
+    sin centro de costo. Es lo que leen los reportes en lugar de sumar
+    FactFinance, así su costo no crece con los centros ni con las líneas.
+  - FactYearlyAggregate: el mensual sumado por año y línea de estado
+    (Account.statement / Account.group).
+
+Los importadores anotan las particiones (company, scenario, period) que
+tocaron y al terminar llaman a refresh_aggregates con ellas: cada partición
+se borra y se recalcula desde FactFinance (y sus años desde el mensual), así
+que el resultado no depende del orden ni de cuántas veces se refresque.
+refresh_all_aggregates reconstruye todo (p. ej. tras una carga reanudada,
+cuyo primer tramo no se conoce, o con el comando refresh_aggregates).
+Cada refresco sube la versión de datos de los años afectados (apps.core.versions).
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from apps.core.models import FactFinance, FactMonthlyAggregate, FactYearlyAggregate, Period
+from apps.core.resolvers import IN_BATCH, _in_batches
+from apps.core.versions import bump, bump_prefix, facts_key
+
+
+def _refresh_monthly(company_id, scenario_id, period_ids) -> int:
+    FactMonthlyAggregate.objects.filter(
+        company_id=company_id, scenario_id=scenario_id, period_id__in=period_ids
+    ).delete()
+    rows = (
+        FactFinance.objects
+        .filter(company_id=company_id, scenario_id=scenario_id, period_id__in=period_ids)
+        .values("period_id", "account_id")
+        .annotate(total=Sum("amount"), lines=Count("id"))
+        .order_by()
+    )
+    objs = [
+        FactMonthlyAggregate(
+            company_id=company_id, scenario_id=scenario_id, period_id=r["period_id"],
+            account_id=r["account_id"], amount=r["total"] or 0, line_count=r["lines"],
+        )
+        for r in rows
+    ]
+    FactMonthlyAggregate.objects.bulk_create(objs, batch_size=IN_BATCH)
+    return len(objs)
+
+
+def _refresh_yearly(company_id, scenario_id, years) -> int:
+    FactYearlyAggregate.objects.filter(company_id=company_id, scenario_id=scenario_id, year__in=years).delete()
+    rows = (
+        FactMonthlyAggregate.objects
+        .filter(company_id=company_id, scenario_id=scenario_id, period__year__in=years)
+        .values("period__year", "account__statement", "account__group")
+        .annotate(total=Sum("amount"))
+        .order_by()
+    )
+    totals = defaultdict(int)  # NULL y '' son la misma línea
+    for r in rows:
+        key = (r["period__year"], r["account__statement"] or "", r["account__group"] or "")
+        totals[key] += r["total"] or 0
+    objs = [
+        FactYearlyAggregate(
+            company_id=company_id, scenario_id=scenario_id, year=year,
+            statement=statement, line=line, amount=amount,
+        )
+        for (year, statement, line), amount in totals.items()
+    ]
+    FactYearlyAggregate.objects.bulk_create(objs, batch_size=IN_BATCH)
+    return len(objs)
+
+
+def refresh_aggregates(partitions) -> dict:
+    """
+    Recalcula los agregados de las particiones (company_id, scenario_id,
+    period_id) indicadas y los años que las contienen. Devuelve
+    {"partitions", "monthly", "yearly"} (filas escritas).
+    """
+    groups = defaultdict(set)
+    for company_id, scenario_id, period_id in partitions:
+        groups[(company_id, scenario_id)].add(period_id)
+    stats = {"partitions": sum(len(p) for p in groups.values()), "monthly": 0, "yearly": 0}
+    if not groups:
+        return stats
+
+    period_ids = set().union(*groups.values())
+    years = {}
+    for batch in _in_batches(period_ids):
+        years.update(Period.objects.filter(id__in=batch).values_list("id", "year"))
+
+    changed = set()
+    with transaction.atomic():
+        for (company_id, scenario_id), pids in groups.items():
+            for batch in _in_batches(sorted(pids)):
+                stats["monthly"] += _refresh_monthly(company_id, scenario_id, batch)
+            group_years = sorted({years[p] for p in pids})
+            stats["yearly"] += _refresh_yearly(company_id, scenario_id, group_years)
+            changed.add(facts_key(company_id, scenario_id))
+            changed.update(facts_key(company_id, scenario_id, y) for y in group_years)
+        bump(changed)  # invalida los ETag de los reportes de esos años
+    return stats
+
+
+def refresh_yearly_aggregates() -> dict:
+    """
+    Recalcula solo el anual desde el mensual, para todos los años (p. ej.
+    tras cambiar Account.group / statement, que definen sus líneas).
+    """
+    scopes = defaultdict(set)
+    rows = FactMonthlyAggregate.objects.values_list("company_id", "scenario_id", "period__year").distinct()
+    for company_id, scenario_id, year in rows.order_by():
+        scopes[(company_id, scenario_id)].add(year)
+    stats = {"years": 0, "yearly": 0}
+    with transaction.atomic():
+        FactYearlyAggregate.objects.all().delete()
+        for (company_id, scenario_id), years in scopes.items():
+            stats["years"] += len(years)
+            stats["yearly"] += _refresh_yearly(company_id, scenario_id, sorted(years))
+        bump_prefix("facts:")
+    return stats
+
+
+def refresh_all_aggregates() -> dict:
+    """Borra y reconstruye ambos agregados desde FactFinance."""
+    with transaction.atomic():
+        bump_prefix("facts:")  # incluye ámbitos que quizá ya no tengan hechos
+        FactMonthlyAggregate.objects.all().delete()
+        FactYearlyAggregate.objects.all().delete()
+        partitions = FactFinance.objects.values_list("company_id", "scenario_id", "period_id").distinct()
+        return refresh_aggregates(list(partitions.order_by()))
@@ -0,0 +1,231 @@
+# apps/core/api.py
+"""
+API de lectura (DRF) para herramientas de BI.
+
+  GET /api/facts/                     hechos (FactFinance)
+  GET /api/statements/monthly/        importe por cuenta y mes (FactMonthlyAggregate)
+  GET /api/statements/<income|balance|cashflow>/
+  GET /api/kpis/
+  GET /api/pivot/                     pivote / drill-down agregado (apps.core.pivot)
+
+Filtros (todos opcionales, listas separadas por comas):
+  company=<Company.code>  scenario=<Scenario.name>  account=<Account.code>
+  center=<CostCenter.code>  kpi=<KPI.name>
+  period_from / period_to = YYYYMM o YYYY-MM (rango inclusivo)
+
+Paginación por cursor (keyset) sobre la PK: cada página es
+WHERE id > <último id> ORDER BY id LIMIT n, sin OFFSET, así que el costo de
+una página no crece con lo avanzado y el servidor solo tiene en memoria una
+página. El cliente sigue `next` hasta que sea null.
+
+Las filas salen de .values() (sin instancias de modelo ni serializers).
+Con ?layout=columnar los resultados van por columnas
+({"id": [...], "amount": [...]}) en lugar de una lista de objetos.
+
+/api/pivot/ no pagina: devuelve una matriz (ver PivotView).
+"""
+import re
+
+from django.db.models import F
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.core.models import (
+    BalanceSheet, CashFlowStatement, FactFinance, FactMonthlyAggregate, IncomeStatement, KPI, Period,
+)
+from apps.core.pivot import FILTERS as PIVOT_FILTERS, PERIOD_FILTERS as PIVOT_PERIOD_FILTERS, pivot
+from apps.core.resolvers import PERIOD_CODE_RE
+
+# parámetro -> lookup (valor: lista separada por comas)
+FILTERS = {
+    "company": "company__code__in",
+    "scenario": "scenario__name__in",
+    "account": "account__code__in",
+    "center": "center__code__in",
+    "kpi": "name__in",
+}
+PERIOD_FILTERS = ("period_from", "period_to")
+LAYOUTS = ("rows", "columnar")
+
+# Columnas comunes a todo lo que cuelga de (company, scenario, period)
+SLICE_FIELDS = {
+    "company": "company__code",
+    "scenario": "scenario__name",
+    "year": "period__year",
+    "month": "period__month",
+}
+
+
+class KeysetPagination(CursorPagination):
+    ordering = "id"
+    page_size = 1000
+    page_size_query_param = "page_size"
+    max_page_size = 10000
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            **data,
+        })
+
+
+def _period_code(value: str, param: str) -> int:
+    m = re.search(PERIOD_CODE_RE, value)
+    if not m or not 1 <= int(m.group(2)) <= 12:
+        raise ValidationError({param: f"Periodo inválido: {value!r} (YYYYMM o YYYY-MM)"})
+    return int(m.group(1)) * 100 + int(m.group(2))
+
+
+def slice_filters(params, allowed) -> dict:
+    """
+    kwargs de .filter() a partir de los parámetros (FILTERS + period_from /
+    period_to). Un filtro fuera de `allowed` o un periodo mal escrito es un
+    ValidationError (400). Lo usan la API y las exportaciones.
+    """
+    kwargs = {}
+    for param, lookup in FILTERS.items():
+        value = params.get(param)
+        if value is None:
+            continue
+        if param not in allowed:
+            raise ValidationError({param: "Filtro no disponible en este recurso."})
+        kwargs[lookup] = [v.strip() for v in value.split(",") if v.strip()]
+
+    bounds = {p: _period_code(params[p], p) for p in PERIOD_FILTERS if params.get(p)}
+    if bounds:
+        periods = Period.objects.annotate(code=F("year") * 100 + F("month"))
+        if "period_from" in bounds:
+            periods = periods.filter(code__gte=bounds["period_from"])
+        if "period_to" in bounds:
+            periods = periods.filter(code__lte=bounds["period_to"])
+        kwargs["period_id__in"] = periods.values("id")  # subconsulta, misma sentencia
+    return kwargs
+
+
+def _columnar(rows: list[dict], fields: dict) -> dict:
+    return {name: [r[lookup] for r in rows] for name, lookup in fields.items()}
+
+
+class SliceListView(APIView):
+    """
+    Listado paginado de un modelo por (company, scenario, period). Las
+    subclases definen `model`, `fields` ({nombre de salida: lookup para
+    .values()}) y `filters` (claves de FILTERS que aceptan).
+    """
+    model = None
+    fields: dict = {}
+    filters: tuple = ("company", "scenario")
+    pagination_class = KeysetPagination
+
+    def get_fields(self) -> dict:
+        return {**SLICE_FIELDS, **self.fields}
+
+    def get(self, request, *args, **kwargs):
+        layout = request.query_params.get("layout", "rows")
+        if layout not in LAYOUTS:
+            raise ValidationError({"layout": f"Debe ser uno de {', '.join(LAYOUTS)}."})
+
+        fields = {"id": "id", **self.get_fields()}
+        qs = (
+            self.model.objects
+            .filter(**slice_filters(request.query_params, self.filters))
+            .values(*fields.values())
+        )
+
+        paginator = self.pagination_class()
+        rows = paginator.paginate_queryset(qs, request, view=self)
+        data = {"layout": layout, "columns": list(fields)}
+        if layout == "columnar":
+            data["results"] = _columnar(rows, fields)
+        else:
+            data["results"] = [{name: r[lookup] for name, lookup in fields.items()} for r in rows]
+        return paginator.get_paginated_response(data)
+
+
+class FactListView(SliceListView):
+    model = FactFinance
+    fields = {
+        "account": "account__code",
+        "center": "center__code",
+        "amount": "amount",
+    }
+    filters = ("company", "scenario", "account", "center")
+
+
+class MonthlyStatementListView(SliceListView):
+    model = FactMonthlyAggregate
+    fields = {
+        "account": "account__code",
+        "statement": "account__statement",
+        "line": "account__group",
+        "amount": "amount",
+        "line_count": "line_count",
+    }
+    filters = ("company", "scenario", "account")
+
+
+class KPIListView(SliceListView):
+    model = KPI
+    fields = {"kpi": "name", "value": "value", "unit": "unit"}
+    filters = ("company", "scenario", "kpi")
+
+
+STATEMENT_MODELS = {
+    "income": IncomeStatement,
+    "balance": BalanceSheet,
+    "cashflow": CashFlowStatement,
+}
+
+
+class StatementListView(SliceListView):
+    """Estados guardados (income / balance / cashflow): todas sus columnas numéricas."""
+
+    def dispatch(self, request, *args, kind=None, **kwargs):
+        self.model = STATEMENT_MODELS.get(kind)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request, *args, **kwargs):
+        if self.model is None:
+            raise NotFound(f"Estado desconocido; use uno de {', '.join(STATEMENT_MODELS)}.")
+        return super().get(request, *args, **kwargs)
+
+    def get_fields(self) -> dict:
+        values = {
+            f.name: f.name for f in self.model._meta.concrete_fields
+            if not f.is_relation and not f.primary_key
+        }
+        return {**SLICE_FIELDS, **values}
+
+
+class PivotView(APIView):
+    """
+    GET /api/pivot/?rows=company,group&columns=year&measures=amount&year=2023
+
+      rows / columns: dimensiones separadas por comas (company, scenario, year,
+                      month, statement, group, subgroup, account, center)
+      measures: amount (por defecto) y/o lines
+      filtros: cualquier dimensión (lista separada por comas) y
+               period_from / period_to (YYYYMM o YYYY-MM)
+
+    Drill-down: se repite la consulta con el valor elegido como filtro y la
+    dimensión siguiente en rows (p. ej. year=2023&group=OPEX&rows=center).
+    Responde {source, rows, columns, measures, row_keys, column_keys,
+    values: {medida: [[...]]}}; source indica la tabla que se leyó.
+    """
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        rows = [v.strip() for v in params.get("rows", "").split(",") if v.strip()]
+        if not rows:
+            raise ValidationError({"rows": "Indique al menos una dimensión de fila."})
+        columns = [v.strip() for v in params.get("columns", "").split(",") if v.strip()]
+        measures = [v.strip() for v in params.get("measures", "amount").split(",") if v.strip()]
+        filters = {k: params[k] for k in (*PIVOT_FILTERS, *PIVOT_PERIOD_FILTERS) if params.get(k)}
+        try:
+            return Response(pivot(rows, columns, measures, filters))
+        except ValueError as e:
+            raise ValidationError({"detail": str(e)})
+
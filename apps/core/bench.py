@@ -0,0 +1,239 @@
+# apps/core/bench.py
+"""
+Benchmark de los importadores sobre un conjunto sintético (ver apps.core.synthetic).
+
+Cada caso corre en un proceso hijo (fork) con su propia base de datos de
+pruebas recién migrada (connection.creation.create_test_db), así ningún caso
+hereda filas, cachés ni memoria de otro. Por caso se mide:
+
+  - seconds / rows_per_sec: solo el comando, sin contar la migración.
+  - queries: sentencias enviadas por la conexión del proceso (execute_wrapper;
+    un executemany cuenta como una).
+  - peak_rss_mb: ru_maxrss del proceso hijo.
+
+Los resultados se guardan en JSON junto con la versión del código y el tamaño
+del conjunto, para comparar entre versiones (compare_results).
+
+bench_normalization mide aparte, sin BD, el volcado de map_raw_to_templates
+(emit_facts) contra su versión fila a fila sobre una hoja wide generada.
+"""
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import django
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, connections
+
+from apps.core.management.commands.map_raw_to_templates import emit_facts, emit_facts_rowwise
+
+# nombre -> (argumentos de call_command, archivo cuyas filas miden el throughput)
+CASES = {
+    "apply_fin_templates": (["apply_fin_templates", "--base-dir", "{data}"], "facts_finance.csv"),
+    "apply_fin_templates_bulk": (["apply_fin_templates", "--base-dir", "{data}", "--bulk"], "facts_finance.csv"),
+    "import_fin_data": (["import_fin_data", "--base-dir", "{data}"], "facts_finance.csv"),
+    "import_csv_assumptions": (["import_csv", "assumptions", "{data}/assumptions.csv"], "assumptions.csv"),
+    "import_csv_assumptions_bulk": (
+        ["import_csv", "assumptions", "{data}/assumptions.csv", "--bulk"], "assumptions.csv"
+    ),
+    "import_csv_revenue_drivers_bulk": (
+        ["import_csv", "revenue_drivers", "{data}/revenue_drivers.csv", "--bulk"], "revenue_drivers.csv"
+    ),
+    "import_csv_expenses_bulk": (["import_csv", "expenses", "{data}/expenses.csv", "--bulk"], "expenses.csv"),
+}
+
+
+def load_manifest(data_dir: Path) -> dict:
+    path = Path(data_dir) / "synthetic.json"
+    if not path.exists():
+        raise FileNotFoundError(f"No existe {path}: genera el conjunto con generate_synthetic_data")
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _git_revision() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=10,
+        )
+        return out.stdout.strip() if out.returncode == 0 else ""
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def environment() -> dict:
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "pandas": pd.__version__,
+        "db_vendor": connection.vendor,
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def _run_in_child(argv: list[str], rows: int, conn):
+    """Cuerpo del proceso hijo: BD de pruebas nueva, comando medido, resultado por el pipe."""
+    result = {"ok": False}
+    try:
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            queries = 0
+
+            def count(execute, sql, params, many, context):
+                nonlocal queries
+                queries += 1
+                return execute(sql, params, many, context)
+
+            out = io.StringIO()
+            with connection.execute_wrapper(count):
+                t0 = time.perf_counter()
+                call_command(*argv, stdout=out, stderr=out)
+                seconds = time.perf_counter() - t0
+            result.update(
+                ok=True,
+                seconds=round(seconds, 3),
+                rows_per_sec=round(rows / seconds, 1) if seconds else None,
+                queries=queries,
+                peak_rss_mb=round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+    except BaseException as e:  # el padre registra el error y sigue con el siguiente caso
+        result["error"] = f"{type(e).__name__}: {e}"
+    conn.send(result)
+    conn.close()
+
+
+def run_case(name: str, data_dir: Path, rows: int) -> dict:
+    argv_template, _ = CASES[name]
+    argv = [a.format(data=data_dir) for a in argv_template]
+    # Las conexiones abiertas no deben compartirse con el hijo
+    connections.close_all()
+    ctx = multiprocessing.get_context("fork")
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_run_in_child, args=(argv, rows, child_conn))
+    proc.start()
+    child_conn.close()
+    try:
+        result = parent_conn.recv()
+    except EOFError:
+        result = {"ok": False, "error": "el proceso terminó sin resultado"}
+    proc.join()
+    if proc.exitcode and result.get("ok"):
+        result = {"ok": False, "error": f"exit code {proc.exitcode}"}
+    return {"case": name, "command": " ".join(argv), "rows": rows, **result}
+
+
+def run_benchmark(data_dir: Path, cases: list[str], repeat: int = 1, report=None) -> dict:
+    """
+    Corre `cases` sobre `data_dir` (cada uno `repeat` veces, se guarda la
+    mejor) y devuelve el documento de resultados. `report(result)` se llama
+    tras cada caso.
+    """
+    data_dir = Path(data_dir)
+    manifest = load_manifest(data_dir)
+    results = []
+    for name in cases:
+        rows = manifest["files"].get(CASES[name][1], 0)
+        runs = [run_case(name, data_dir, rows) for _ in range(max(1, repeat))]
+        ok = [r for r in runs if r["ok"]]
+        best = min(ok, key=lambda r: r["seconds"]) if ok else runs[-1]
+        if len(runs) > 1:
+            best = {**best, "runs_seconds": [r.get("seconds") for r in runs]}
+        results.append(best)
+        if report:
+            report(best)
+    return {"environment": environment(), "dataset": manifest, "cases": results}
+
+
+def compare_results(current: dict, baseline: dict, threshold: float = 0.10) -> list[dict]:
+    """
+    Compara rows_per_sec, queries y peak_rss_mb por caso contra una corrida
+    anterior. `regression` se marca si el throughput cae más de `threshold`.
+    """
+    previous = {c["case"]: c for c in baseline.get("cases", []) if c.get("ok")}
+    out = []
+    for case in current["cases"]:
+        before = previous.get(case["case"])
+        if not case.get("ok") or not before:
+            continue
+        change = (case["rows_per_sec"] / before["rows_per_sec"] - 1) if before.get("rows_per_sec") else None
+        out.append({
+            "case": case["case"],
+            "rows_per_sec": (before.get("rows_per_sec"), case["rows_per_sec"]),
+            "queries": (before.get("queries"), case["queries"]),
+            "peak_rss_mb": (before.get("peak_rss_mb"), case["peak_rss_mb"]),
+            "change": change,
+            "regression": change is not None and change < -threshold,
+        })
+    return out
+
+
+# --- normalización de map_raw_to_templates -------------------------------------
+
+NORMALIZATION_DEFAULTS = {"company": "MiEmpresa", "period": "2025-01", "account": "ingresos", "scenario": "Base"}
+
+
+def wide_sheet(accounts: int, months: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Hoja wide (una fila por cuenta, una columna por mes) ya despivotada como
+    la deja map_raw_to_templates antes del volcado: Empresa, Cuenta, Centro,
+    Escenario, Periodo y Monto.
+    """
+    rng = np.random.default_rng(seed)
+    periods = [f"{2020 + m // 12}-{m % 12 + 1:02d}" for m in range(months)]
+    ids = pd.DataFrame({
+        "Empresa": "Empresa Demo S.A.",
+        "Cuenta": [f"Cuenta {i:05d} Ventas y Servicios" for i in range(accounts)],
+        "Centro": [f"Centro {i % 25:02d}" for i in range(accounts)],
+    })
+    amounts = pd.DataFrame(rng.integers(-10**8, 10**8, size=(accounts, months)) / 100, columns=periods)
+    long_df = pd.concat([ids, amounts], axis=1).melt(
+        id_vars=list(ids.columns), var_name="Periodo", value_name="Monto"
+    )
+    long_df["Escenario"] = "Base"
+    return long_df
+
+
+def _best_run(func, long_df, repeat):
+    best = out = None
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        out = func(long_df, NORMALIZATION_DEFAULTS, "OTHER", "ACTUAL")
+        seconds = time.perf_counter() - t0
+        best = seconds if best is None else min(best, seconds)
+    return out, best
+
+
+def bench_normalization(accounts: int = 3000, months: int = 60, repeat: int = 1) -> dict:
+    """
+    Mide filas/s del volcado de map_raw_to_templates antes (emit_facts_rowwise,
+    iterrows) y después (emit_facts, por columnas) sobre wide_sheet(accounts,
+    months), la mejor de `repeat` corridas, y comprueba que ambos den lo mismo.
+    """
+    long_df = wide_sheet(accounts, months)
+    rows = len(long_df)
+    result = {"environment": environment(), "accounts": accounts, "months": months, "rows": rows}
+    outputs = {}
+    for name, func in (("before", emit_facts_rowwise), ("after", emit_facts)):
+        outputs[name], seconds = _best_run(func, long_df, repeat)
+        result[name] = {"seconds": round(seconds, 3), "rows_per_sec": round(rows / seconds, 1) if seconds else None}
+    before, after = outputs["before"], outputs["after"]
+    result["same_output"] = before["facts"].equals(after["facts"]) and all(
+        before[k] == after[k] for k in ("companies", "accounts", "centers", "scenarios", "periods")
+    )
+    if result["before"]["rows_per_sec"] and result["after"]["rows_per_sec"]:
+        result["speedup"] = round(result["after"]["rows_per_sec"] / result["before"]["rows_per_sec"], 1)
+    return result
@@ -0,0 +1,166 @@
+# apps/core/catalogs.py
+"""
+Carga del catálogo de cuentas como árbol, en una sola pasada.
+
+Las filas de accounts.csv se ordenan topológicamente por parent_code (cada
+padre antes que sus hijos) y los padres se resuelven en memoria, sin un
+Account.objects.get por fila. Las altas van en un bulk_create por nivel del
+árbol (para que los hijos ya conozcan el id de su padre) y los cambios en un
+único bulk_update.
+
+Campos jerárquicos: level, is_leaf y parent se escriben solo si el modelo los
+declara; en tablas antiguas con level/is_leaf NOT NULL (ver
+resolvers.legacy_columns) las altas llevan los valores del árbol en esas
+columnas. Si la fila no trae level o is_leaf se derivan del árbol
+(profundidad + 1; hoja = nadie la tiene como padre).
+
+reclassify_accounts guarda en Account.group la categoría que dan las
+reglas de apps.core.classifier para el nombre de cada cuenta.
+"""
+from itertools import groupby
+
+from apps.core.classifier import ACCOUNT_NAME_RULES
+from apps.core.models import Account
+from apps.core.resolvers import IN_BATCH, _in_batches, insert_ignore, legacy_columns
+from apps.core.versions import ACCOUNTS, bump
+
+TREE_FIELDS = ("level", "is_leaf")
+
+
+def tree_depths(parents: dict) -> dict:
+    """
+    {code: profundidad} a partir de {code: parent_code}. Un padre que no está
+    en el catálogo (o un ciclo) convierte a la cuenta en raíz (profundidad 0).
+    """
+    depth = {}
+    for code in parents:
+        path, seen = [], set()
+        node = code
+        while node in parents and node not in depth and node not in seen:
+            seen.add(node)
+            path.append(node)
+            node = parents[node]
+        base = depth.get(node, -1) if node not in seen else -1
+        for i, n in enumerate(reversed(path), start=1):
+            depth[n] = base + i
+    return depth
+
+
+def load_account_tree(records, counters: dict, batch_size: int = IN_BATCH) -> dict:
+    """
+    Crea o actualiza cuentas desde `records` (dicts con code, name,
+    account_type, parent_code, level y is_leaf; level/is_leaf pueden ser None).
+    Un código repetido se queda con la última fila y cuenta como actualizado.
+    Devuelve {code: id} de las cuentas cargadas.
+    """
+    by_code = {}
+    for r in records:
+        if r["code"] in by_code:
+            counters["updated"] += 1
+        by_code[r["code"]] = dict(r)
+    if not by_code:
+        return {}
+
+    for code, r in by_code.items():
+        parent = r.get("parent_code") or ""
+        r["parent_code"] = parent if parent != code else ""
+    parents = {code: r["parent_code"] for code, r in by_code.items()}
+    depth = tree_depths(parents)
+    has_children = set(parents.values())
+    for code, r in by_code.items():
+        r["depth"] = depth[code]
+        if r.get("level") is None:
+            r["level"] = r["depth"] + 1
+        if r.get("is_leaf") is None:
+            r["is_leaf"] = code not in has_children
+
+    model_fields = {f.name for f in Account._meta.get_fields()}
+    tree_fields = [f for f in TREE_FIELDS if f in model_fields]
+    have_parent = "parent" in model_fields
+    legacy = legacy_columns(Account)
+
+    existing = {}
+    for codes in _in_batches(by_code):
+        existing.update((a.code, a) for a in Account.objects.filter(code__in=codes))
+    ids = {code: a.pk for code, a in existing.items()}
+    # Los padres pueden estar en BD aunque no vengan en el archivo
+    missing_parents = {r["parent_code"] for r in by_code.values()} - set(ids) - set(by_code) - {""}
+    if have_parent and missing_parents:
+        for codes in _in_batches(missing_parents):
+            ids.update(Account.objects.filter(code__in=codes).values_list("code", "id"))
+
+    def values(r):
+        out = {"name": r["name"], "account_type": r["account_type"]}
+        out.update((f, r[f]) for f in tree_fields)
+        if have_parent:
+            out["parent_id"] = ids.get(r["parent_code"])
+        return out
+
+    # Altas por nivel: el bulk_create de un nivel deja los ids que usa el siguiente
+    order = sorted(by_code, key=lambda code: (by_code[code]["depth"], code))  # padre → hijo
+    new_codes = [code for code in order if code not in existing]
+    levels = groupby(new_codes, key=lambda code: by_code[code]["depth"]) if have_parent else [(0, new_codes)]
+    for _, codes in levels:
+        codes = list(codes)
+        objs = [Account(code=code, **values(by_code[code])) for code in codes]
+        if legacy:
+            # Columnas antiguas con el valor del árbol (un INSERT por combinación)
+            def legacy_key(obj):
+                return tuple(by_code[obj.code].get(col, default) for col, default in legacy.items())
+
+            for key, group in groupby(sorted(objs, key=legacy_key), key=legacy_key):
+                insert_ignore(Account, list(group), dict(zip(legacy, key)))
+        else:
+            Account.objects.bulk_create(objs, batch_size=batch_size, ignore_conflicts=True)
+        for batch in _in_batches(codes):
+            ids.update(Account.objects.filter(code__in=batch).values_list("code", "id"))
+        counters["created"] += len(codes)
+
+    # Cambios: un bulk_update con la unión de campos modificados
+    changed, fields = [], set()
+    for code in order:
+        obj = existing.get(code)
+        if obj is None:
+            continue
+        diff = {f: v for f, v in values(by_code[code]).items() if getattr(obj, f, None) != v}
+        if diff:
+            for f, v in diff.items():
+                setattr(obj, f, v)
+            fields.update(diff)
+            changed.append(obj)
+            counters["updated"] += 1
+        else:
+            counters["skipped"] += 1
+    if changed:
+        Account.objects.bulk_update(changed, sorted(fields), batch_size=batch_size)
+    if new_codes or changed:
+        bump([ACCOUNTS])
+    return {code: ids[code] for code in by_code if code in ids}
+
+
+def reclassify_accounts(force: bool = False, batch_size: int = IN_BATCH) -> dict:
+    """
+    Escribe en Account.group la categoría de ACCOUNT_NAME_RULES (REVENUE,
+    COGS, OPEX, DA, INTEREST, TAX) según el nombre. Sin `force` solo toca
+    cuentas sin grupo o con un grupo puesto por las reglas (así un cambio de
+    reglas se propaga sin pisar grupos asignados a mano); con `force`, todas.
+    Un nombre que no casa con ninguna regla conserva su grupo.
+    Devuelve {"checked", "updated", "unmatched"}.
+    """
+    rule_groups = set(ACCOUNT_NAME_RULES.categories)
+    stats = {"checked": 0, "updated": 0, "unmatched": 0}
+    changed = []
+    for pk, name, group in Account.objects.values_list("id", "name", "group").iterator(chunk_size=batch_size):
+        if not force and group and group not in rule_groups:
+            continue
+        stats["checked"] += 1
+        category = ACCOUNT_NAME_RULES.classify(name)
+        if category is None:
+            stats["unmatched"] += 1  # se deja el grupo que tenga
+        elif category != group:
+            changed.append(Account(pk=pk, group=category))
+    if changed:
+        Account.objects.bulk_update(changed, ["group"], batch_size=batch_size)
+        bump([ACCOUNTS])
+    stats["updated"] = len(changed)
+    return stats
@@ -0,0 +1,78 @@
+# apps/core/checkpoints.py
+"""
+Importaciones reanudables.
+
+En lugar de una única transacción para todo el archivo, los hechos se
+confirman por bloques y, en la misma transacción de cada bloque, se guarda en
+ImportJob cuántas filas del archivo ya quedaron escritas y los contadores
+acumulados. Si el proceso cae (error, deploy, reinicio del worker), con
+--resume se busca el último job sin terminar del mismo comando y archivo
+(misma huella SHA-256) y se continúa tras la última fila confirmada.
+
+    checkpoint = ImportCheckpoint("import_fin_data", path, resume=True)
+    for chunk in chunked(checkpoint.pending(rows), chunk_size):
+        with transaction.atomic():
+            ...escribir el bloque...
+            checkpoint.commit(len(chunk), counters)
+    checkpoint.done(counters)
+"""
+from itertools import islice
+from pathlib import Path
+
+from apps.core.manifest import file_fingerprint
+from apps.core.models import ImportJob
+
+
+class ImportCheckpoint:
+    def __init__(self, command: str, path: Path, resume: bool = False):
+        path = Path(path).resolve()
+        fingerprint = file_fingerprint(path)
+        job = None
+        self.stale = None  # job pendiente cuyo archivo cambió (no se puede reanudar)
+        if resume:
+            pending = ImportJob.objects.filter(
+                command=command, source=str(path), status__in=("running", "failed")
+            ).order_by("-id")
+            job = pending.filter(fingerprint=fingerprint).first()
+            if job is None:
+                self.stale = pending.first()
+        self.resumed = job is not None
+        if job is None:
+            job = ImportJob.objects.create(command=command, source=str(path), fingerprint=fingerprint)
+        elif job.status != "running":
+            job.status = "running"
+            job.error = ""
+            job.save(update_fields=["status", "error", "updated_at"])
+        self.job = job
+
+    @property
+    def start_row(self) -> int:
+        return self.job.rows_done
+
+    def restore(self, counters: dict) -> dict:
+        """Suma a `counters` los contadores ya confirmados por el job."""
+        for k, v in (self.job.counters or {}).items():
+            counters[k] = counters.get(k, 0) + v
+        return counters
+
+    def pending(self, rows):
+        """Filas del archivo que faltan por procesar (salta las ya confirmadas)."""
+        return islice(rows, self.job.rows_done, None)
+
+    def commit(self, rows: int, counters: dict):
+        """Avanza el checkpoint; llamar dentro de la transacción del bloque."""
+        self.job.rows_done += rows
+        self.job.counters = dict(counters)
+        self.job.save(update_fields=["rows_done", "counters", "updated_at"])
+
+    def done(self, counters: dict):
+        self.job.status = "done"
+        self.job.counters = dict(counters)
+        self.job.save(update_fields=["status", "counters", "updated_at"])
+
+    def failed(self, error):
+        """Marca el job como fallido; su último checkpoint sigue siendo válido."""
+        self.job.refresh_from_db(fields=["rows_done", "counters"])
+        self.job.status = "failed"
+        self.job.error = str(error)[:2000]
+        self.job.save(update_fields=["status", "error", "updated_at"])
@@ -0,0 +1,80 @@
+# apps/core/classifier.py
+"""
+Clasificación de cuentas por palabras clave, compilada una sola vez.
+
+Cada juego de reglas (RuleSet) es una lista ordenada de (categoría,
+palabras clave) que se compila en una única expresión regular:
+
+    ^(?:.*?(?P<r0>ingres|ventas|...)|.*?(?P<r1>costo|cogs|...)|...)
+
+Las alternativas se prueban en orden desde el inicio del texto, así que
+gana la primera regla que aparezca en cualquier posición: la misma
+prioridad que los `if any(k in n ...)` encadenados que reemplaza, pero con
+una sola pasada del motor de regex por texto. Los resultados se memorizan
+por texto (RuleSet.classify), y la categoría se guarda en Account.group
+(catalogs.reclassify_accounts), así que en los reportes clasificar es
+buscar en un diccionario.
+
+Sin dependencias de Django: también lo usa _fix_csvs.py.
+"""
+import re
+
+
+class RuleSet:
+    def __init__(self, rules, default=None):
+        self.rules = [(category, tuple(keywords)) for category, keywords in rules]
+        self.default = default
+        self.categories = [category for category, _ in self.rules]
+        alternatives = "|".join(
+            rf".*?(?P<r{i}>{'|'.join(re.escape(k) for k in keywords)})"
+            for i, (_, keywords) in enumerate(self.rules)
+        )
+        self.pattern = re.compile(rf"^(?:{alternatives})", re.DOTALL)
+        self._cache = {}
+
+    def classify(self, text):
+        """Categoría de `text` (sin distinguir mayúsculas) o `default`."""
+        try:
+            return self._cache[text]
+        except KeyError:
+            pass
+        m = self.pattern.match((text or "").lower())
+        result = self.categories[int(m.lastgroup[1:])] if m else self.default
+        self._cache[text] = result
+        return result
+
+    def __contains__(self, text) -> bool:
+        return self.classify(text) is not None
+
+
+# Nombre de cuenta -> categoría de services.categorize_accounts. Sin default:
+# lo que no clasifica se reparte en OTHER_OP / OTHER_NP según el signo.
+ACCOUNT_NAME_RULES = RuleSet([
+    ("REVENUE", ["ingres", "ventas", "sales", "revenue"]),
+    ("COGS", ["costo", "cogs", "cost of goods"]),
+    ("DA", ["deprec", "amort"]),
+    ("INTEREST", ["interes", "interest"]),
+    ("TAX", ["impuest", "tax"]),
+    ("OPEX", ["gasto", "opex", "operac", "admin"]),
+])
+
+# Nombre que parece la línea de ventas (services.detect_sales_name)
+SALES_NAME_RULES = RuleSet([("SALES", ["venta", "ingres", "sales", "revenue"])])
+
+# Código de cuenta -> account_type (import_fin_data)
+ACCOUNT_CODE_RULES = RuleSet([
+    ("REVENUE", ["ven", "rev"]),
+    ("COGS", ["cog", "cost", "compra"]),
+    ("DEPR", ["depr", "amort"]),
+    ("FIN", ["fin", "int"]),
+    ("TAX", ["tax", "imp"]),
+], default="OPEX")
+
+# Nombre de cuenta del export original -> account_type (_fix_csvs.py)
+EXPORT_NAME_RULES = RuleSet([
+    ("REVENUE", ["venta"]),
+    ("COGS", ["compra", "materia prima", "costo"]),
+    ("DEPR", ["depreci", "amortiz"]),
+    ("FIN", ["financ"]),
+    ("TAX", ["impuest"]),
+], default="OPEX")
@@ -0,0 +1,246 @@
+# apps/core/consolidation.py
+"""
+Consolidación de un grupo de empresas (ConsolidationGroup) en un escenario.
+
+Para cada periodo los hechos de los miembros (FactMonthlyAggregate, es
+decir FactFinance sumado por cuenta) del escenario con ese nombre se:
+
+  1. traducen a la moneda del grupo con FxRate del periodo (1 moneda del
+     miembro = rate moneda del grupo; misma moneda = 1). La traducción es
+     vectorizada: un merge de pandas contra la tabla de tipos y una
+     multiplicación en centavos enteros;
+  2. filtran por las reglas de eliminación intercompañía (EliminationRule:
+     las cuentas indicadas no se suman);
+  3. suman por (periodo, cuenta) y se escriben como FactFinance de
+     group.company en el escenario del mismo nombre (sin centro), con sus
+     agregados refrescados: reportes, API y exportaciones los ven como
+     cualquier otra empresa.
+
+group.company es una entidad solo de consolidación: no puede ser miembro
+del grupo, y si el escenario destino tiene hechos que no escribió esta
+consolidación (otros periodos, centros de costo) se rechaza antes de borrar
+nada.
+
+Caché por (grupo, escenario, periodo): ConsolidationState guarda una huella
+de las entradas (versiones de datos de los miembros, tipos de cambio,
+reglas, miembros). Un periodo cuya huella no cambió no se vuelve a calcular.
+"""
+import hashlib
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Trim, Upper
+
+from apps.core.aggregates import refresh_aggregates
+from apps.core.models import (
+    ConsolidationState, FactFinance, FactMonthlyAggregate, FxRate, Period, Scenario,
+)
+from apps.core.resolvers import IN_BATCH, _in_batches, parse_period_code
+from apps.core.versions import current_versions, facts_key
+
+WRITE_BATCH = 5000
+
+
+def _fingerprint(parts) -> str:
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def currency_code(value) -> str:
+    """Código de moneda normalizado ('usd ' -> 'USD'), igual en empresas, grupos y FxRate."""
+    return str(value or "").strip().upper()
+
+
+def _member_inputs(group, scenario_name):
+    """
+    (monedas {company_id: moneda}, escenarios {scenario_id: company_id}) de
+    los miembros. Lanza ValueError si group.company es miembro.
+    """
+    if group.members.filter(pk=group.company_id).exists():
+        raise ValueError(
+            f"La empresa del grupo {group.company} no puede ser miembro de {group.code}: "
+            "sus hechos se reemplazan con el consolidado."
+        )
+    currencies = {cid: currency_code(cur) for cid, cur in group.members.values_list("id", "currency")}
+    scenarios = dict(
+        Scenario.objects.filter(company_id__in=currencies, name=scenario_name).values_list("id", "company_id")
+    )
+    return currencies, scenarios
+
+
+def _rates(group, period_ids, currencies) -> pd.DataFrame:
+    """Tipos de los periodos hacia la moneda del grupo: columnas period_id, currency, rate."""
+    base = currency_code(group.currency)
+    foreign = sorted({c for c in currencies.values() if c != base})
+    # Normalizados también en la consulta: FxRate cargados a mano (admin) pueden venir en minúsculas
+    rates = FxRate.objects.annotate(_cur=Upper(Trim("currency")), _base=Upper(Trim("base")))
+    rows = []
+    for batch in _in_batches(period_ids):
+        rows += rates.filter(
+            period_id__in=batch, _base=base, _cur__in=foreign
+        ).values_list("period_id", "_cur", "rate")
+    df = pd.DataFrame(rows, columns=["period_id", "currency", "rate"])
+    return df.drop_duplicates(["period_id", "currency"])  # una fila por (periodo, moneda) para el merge
+
+
+def _check_target(group, scenario_name):
+    """
+    Lanza ValueError si group.company tiene en el escenario destino hechos
+    que no son de esta consolidación: periodos sin ConsolidationState del
+    grupo o filas con centro de costo (el consolidado no tiene centro).
+    """
+    target = Scenario.objects.filter(company=group.company, name=scenario_name).first()
+    if target is None:
+        return
+    owned = ConsolidationState.objects.filter(group=group, scenario_name=scenario_name).values("period_id")
+    foreign = FactFinance.objects.filter(company=group.company, scenario=target).filter(
+        ~Q(period_id__in=owned) | Q(center__isnull=False)
+    )
+    if foreign.exists():
+        raise ValueError(
+            f"{group.company} / {scenario_name} tiene hechos que no son del consolidado de {group.code}; "
+            "use como empresa del grupo una entidad sin hechos propios u otro nombre de escenario."
+        )
+
+
+def consolidate(group, scenario_name: str, period_ids=None, force: bool = False) -> dict:
+    """
+    Consolida `group` en el escenario `scenario_name` para `period_ids`
+    (por defecto todos los periodos con hechos de algún miembro). Con
+    `force` recalcula aunque la huella no haya cambiado. Devuelve
+    {"periods", "computed", "cached", "rows", "eliminated"}.
+    Lanza ValueError si falta un tipo de cambio, si group.company es
+    miembro o si el escenario destino tiene hechos propios (ver
+    _check_target).
+    """
+    currencies, scenarios = _member_inputs(group, scenario_name)
+    stats = {"periods": 0, "computed": 0, "cached": 0, "rows": 0, "eliminated": 0}
+    if not scenarios:
+        return stats
+
+    facts = FactMonthlyAggregate.objects.filter(scenario_id__in=list(scenarios))
+    if period_ids is not None:
+        facts = facts.filter(period_id__in=list(period_ids))
+    periods = dict(
+        Period.objects.filter(id__in=facts.values("period_id")).values_list("id", "year")
+    )
+    stats["periods"] = len(periods)
+    if not periods:
+        return stats
+
+    # Huella por periodo: lo que cambie en las entradas invalida la caché
+    keys = {(sid, year): facts_key(cid, sid, year) for sid, cid in scenarios.items() for year in set(periods.values())}
+    versions = current_versions(keys.values())
+    rates = _rates(group, list(periods), currencies)
+    rate_parts = defaultdict(list)
+    for period_id, currency, rate in rates.itertuples(index=False):
+        rate_parts[period_id].append((currency, str(rate)))
+    eliminated = sorted(group.eliminations.values_list("account_id", flat=True))
+    base = currency_code(group.currency)
+    common = (base, sorted(currencies.items()), sorted(scenarios), eliminated)
+    fingerprints = {
+        pid: _fingerprint((
+            common,
+            [versions.get(keys[(sid, year)], (0,))[0] for sid in sorted(scenarios)],
+            sorted(rate_parts[pid]),
+        ))
+        for pid, year in periods.items()
+    }
+    cached = dict(
+        ConsolidationState.objects.filter(group=group, scenario_name=scenario_name, period_id__in=list(periods))
+        .values_list("period_id", "fingerprint")
+    )
+    stale = sorted(pid for pid, fp in fingerprints.items() if force or cached.get(pid) != fp)
+    stats["cached"] = len(periods) - len(stale)
+    stats["computed"] = len(stale)
+    if not stale:
+        return stats
+
+    _check_target(group, scenario_name)
+
+    rows = []
+    for batch in _in_batches(stale):
+        rows += facts.filter(period_id__in=batch).values_list("company_id", "period_id", "account_id", "amount")
+    df = pd.DataFrame(rows, columns=["company_id", "period_id", "account_id", "amount"])
+
+    # 1. Traducción (vectorizada)
+    df["currency"] = df["company_id"].map(currencies)
+    df = df.merge(rates, on=["period_id", "currency"], how="left")
+    local = (df["currency"] == base).to_numpy()
+    missing = df.loc[~local & df["rate"].isna(), ["period_id", "currency"]].drop_duplicates()
+    if not missing.empty:
+        names = {p.id: str(p) for p in Period.objects.filter(id__in=missing["period_id"].tolist())}
+        labels = [f"{cur} {names.get(pid, pid)}" for pid, cur in missing.itertuples(index=False)]
+        raise ValueError(f"Faltan tipos de cambio a {base}: {', '.join(labels[:10])}")
+    rate = np.where(local, 1.0, df["rate"].to_numpy(dtype=float, na_value=1.0))
+    cents = np.rint(df["amount"].to_numpy(dtype=float) * 100)
+    df["cents"] = np.rint(cents * rate).astype(np.int64)
+
+    # 2. Eliminaciones intercompañía
+    drop = df["account_id"].isin(eliminated)
+    stats["eliminated"] = int(drop.sum())
+    df = df[~drop]
+
+    # 3. Suma por (periodo, cuenta) y escritura
+    totals = df.groupby(["period_id", "account_id"], sort=False)["cents"].sum()
+    target, _ = Scenario.objects.get_or_create(company=group.company, name=scenario_name)
+    objs = [
+        FactFinance(
+            company_id=group.company_id, scenario=target, period_id=pid, account_id=aid,
+            center=None, amount=Decimal(int(c)).scaleb(-2),
+        )
+        for (pid, aid), c in totals.items()
+    ]
+    with transaction.atomic():
+        for batch in _in_batches(stale):
+            FactFinance.objects.filter(company=group.company, scenario=target, period_id__in=batch).delete()
+        FactFinance.objects.bulk_create(objs, batch_size=WRITE_BATCH)
+        counts = totals.groupby(level=0).size().to_dict()
+        ConsolidationState.objects.bulk_create(
+            [
+                ConsolidationState(
+                    group=group, scenario_name=scenario_name, period_id=pid,
+                    fingerprint=fingerprints[pid], row_count=int(counts.get(pid, 0)),
+                )
+                for pid in stale
+            ],
+            update_conflicts=True,
+            unique_fields=["group", "scenario_name", "period"],
+            update_fields=["fingerprint", "row_count", "updated_at"],
+            batch_size=IN_BATCH,
+        )
+        refresh_aggregates({(group.company_id, target.id, pid) for pid in stale})
+    stats["rows"] = len(objs)
+    return stats
+
+
+def load_fx_rates(rows, base: str) -> int:
+    """
+    Guarda tipos de cambio hacia `base` desde filas {period, currency, rate}
+    (period en YYYYMM o YYYY-MM; 1 currency = rate base). Un único upsert.
+    Lanza ValueError si un periodo no existe o un tipo no es numérico.
+    """
+    base = currency_code(base)
+    periods = {(y, m): pid for pid, y, m in Period.objects.values_list("id", "year", "month")}
+    objs = {}
+    for n, row in enumerate(rows, start=2):
+        key = parse_period_code(row.get("period"))
+        if key not in periods:
+            raise ValueError(f"Fila {n}: no existe el periodo {row.get('period')!r}")
+        try:
+            rate = Decimal(str(row.get("rate")).strip().replace(",", "."))
+        except InvalidOperation:
+            raise ValueError(f"Fila {n}: tipo de cambio inválido {row.get('rate')!r}") from None
+        currency = currency_code(row.get("currency"))
+        objs[(periods[key], currency)] = FxRate(period_id=periods[key], currency=currency, base=base, rate=rate)
+    FxRate.objects.bulk_create(
+        list(objs.values()),
+        update_conflicts=True,
+        unique_fields=["period", "currency", "base"],
+        update_fields=["rate"],
+        batch_size=IN_BATCH,
+    )
+    return len(objs)
@@ -0,0 +1,113 @@
+# apps/core/exports.py
+"""
+Exportaciones en streaming (CSV / XLSX) de hechos y del EERR.
+
+Las filas se leen con .values_list().iterator(chunk_size=EXPORT_CHUNK): en
+PostgreSQL es un cursor del lado del servidor, así que ni la consulta ni la
+exportación cargan el resultado completo en memoria.
+
+  - CSV: stream_csv es un generador de bytes; en la vista va directo a un
+    StreamingHttpResponse y el primer bloque sale con las primeras filas.
+  - XLSX: openpyxl en modo write-only (memoria constante) sobre un archivo
+    temporal. Un .xlsx es un zip que solo queda válido al cerrarse, así que
+    se envía al terminar de escribirlo (FileResponse, por bloques).
+"""
+import csv
+import tempfile
+
+from openpyxl import Workbook
+
+from apps.core.api import slice_filters
+from apps.core.models import FactFinance
+from apps.core.reports import income_statement
+
+EXPORT_FORMATS = ("csv", "xlsx")
+EXPORT_CHUNK = 2000
+CSV_BATCH = 500  # filas por bloque de bytes enviado
+FACT_FILTERS = ("company", "scenario", "account", "center")
+
+FACT_EXPORT_FIELDS = {
+    "company_code": "company__code",
+    "scenario": "scenario__name",
+    "year": "period__year",
+    "month": "period__month",
+    "account_code": "account__code",
+    "center_code": "center__code",
+    "amount": "amount",
+}
+INCOME_EXPORT_COLUMNS = ["cuenta", "importe", "importe_anterior", "pct_ventas", "delta_abs", "delta_pct", "subtotal"]
+
+
+def fact_export(params) -> tuple[list[str], object]:
+    """
+    (columnas, iterador de tuplas) de FactFinance con los mismos filtros que
+    /api/facts/ (company, scenario, account, center, period_from, period_to).
+    """
+    rows = (
+        FactFinance.objects
+        .filter(**slice_filters(params, FACT_FILTERS))
+        .order_by("id")
+        .values_list(*FACT_EXPORT_FIELDS.values())
+        .iterator(chunk_size=EXPORT_CHUNK)
+    )
+    return list(FACT_EXPORT_FIELDS), rows
+
+
+def filter_error(exc) -> str:
+    """Texto legible de un ValidationError de slice_filters."""
+    detail = exc.detail
+    if not isinstance(detail, dict):
+        return str(detail)
+    return "; ".join(
+        f"{key}: {msgs if isinstance(msgs, str) else ' '.join(map(str, msgs))}" for key, msgs in detail.items()
+    )
+
+
+def income_export(company, scenario, year: int) -> tuple[list[str], list[tuple]]:
+    """(columnas, filas) del EERR comparativo (apps.core.reports), con la utilidad al final."""
+    report = income_statement(company, scenario, year)
+    lines = report["rows"] + ([report["totals"]] if report["totals"] else [])
+    rows = [
+        (r["name"], r["amount"], r["prev_amount"], r["vertical"], r["delta_abs"], r["delta_pct"], r["is_subtotal"])
+        for r in lines
+    ]
+    return INCOME_EXPORT_COLUMNS, rows
+
+
+class _Echo:
+    """Pseudo-archivo para csv.writer: devuelve lo escrito en lugar de guardarlo."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(columns, rows, batch: int = CSV_BATCH):
+    """Genera el CSV (utf-8 con BOM, como las plantillas) en bloques de `batch` filas."""
+    writer = csv.writer(_Echo())
+    yield ("﻿" + writer.writerow(columns)).encode("utf-8")
+    buf = []
+    for row in rows:
+        buf.append(writer.writerow(row))
+        if len(buf) >= batch:
+            yield "".join(buf).encode("utf-8")
+            buf = []
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
+def write_xlsx(columns, rows, fileobj, title: str = "datos"):
+    """Escribe un XLSX en modo write-only (las filas no se retienen en memoria)."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=title[:31])
+    ws.append(columns)
+    for row in rows:
+        ws.append(row)
+    wb.save(fileobj)
+
+
+def xlsx_tempfile(columns, rows, title: str = "datos"):
+    """XLSX en un archivo temporal (se borra al cerrarse), posicionado al inicio."""
+    tmp = tempfile.TemporaryFile(suffix=".xlsx")
+    write_xlsx(columns, rows, tmp, title)
+    tmp.seek(0)
+    return tmp
@@ -0,0 +1,145 @@
+# apps/core/interchange.py
+"""
+Intercambio columnar (Parquet) entre map_raw_to_templates y los importadores.
+
+Es opcional: requiere pyarrow. Sin pyarrow todo sigue funcionando con CSV.
+Frente al CSV, el Parquet conserva tipos (enteros, booleanos, importes como
+decimal(18,2)), guarda los códigos de dimensión con dictionary encoding y
+evita convertir texto → número en cada fila al importar.
+"""
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation
+from pathlib import Path
+
+import pandas as pd
+
+try:  # dependencia opcional
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depende del entorno
+    pa = pc = pq = None
+
+FORMATS = ("csv", "parquet")
+
+# Columnas de código que se guardan como diccionario (pocos valores distintos)
+DIMENSION_COLUMNS = {
+    "company_code", "account_code", "center_code", "scenario_code", "period_code",
+    "parent_code", "kind", "currency", "account_type",
+}
+INT_COLUMNS = {"year", "month", "level"}
+BOOL_COLUMNS = {"is_active", "is_leaf", "is_open"}
+DECIMAL_COLUMNS = {"amount"}
+AMOUNT_TYPE = "decimal128(18, 2)"
+CENT = Decimal("0.01")
+
+
+def parquet_available() -> bool:
+    return pq is not None
+
+
+def _to_bool(v):
+    if v is None or (isinstance(v, float) and pd.isna(v)):
+        return None
+    if isinstance(v, str):
+        return v.strip().lower() in ("1", "true", "t", "yes", "y", "si", "sí")
+    return bool(v)
+
+
+def _to_decimal(v):
+    """Importe → Decimal a centavos desde su texto (el mismo que escribe el CSV), sin pasar por float."""
+    if v is None or isinstance(v, bool):
+        return None
+    try:
+        d = v if isinstance(v, Decimal) else Decimal(str(v).strip())
+    except InvalidOperation:
+        return None
+    return d.quantize(CENT, rounding=ROUND_HALF_EVEN) if d.is_finite() else None
+
+
+def _arrow_table(df: pd.DataFrame):
+    arrays, names = [], []
+    for col in df.columns:
+        s = df[col]
+        if col in DECIMAL_COLUMNS:
+            arr = pa.array([_to_decimal(v) for v in s], type=pa.decimal128(18, 2))
+        elif col in INT_COLUMNS:
+            arr = pa.array(pd.to_numeric(s, errors="coerce").astype("Int64"), type=pa.int64())
+        elif col in BOOL_COLUMNS:
+            arr = pa.array([_to_bool(v) for v in s], type=pa.bool_())
+        else:
+            try:
+                arr = pa.array(s, type=pa.string(), from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                arr = pa.array([None if pd.isna(v) else str(v) for v in s], type=pa.string())
+            if col in DIMENSION_COLUMNS:
+                arr = arr.dictionary_encode()
+        arrays.append(arr)
+        names.append(col)
+    return pa.Table.from_arrays(arrays, names=names)
+
+
+def write_table(df: pd.DataFrame, out_dir: Path, stem: str, fmt: str = "csv") -> Path:
+    """Escribe `df` como <stem>.csv (UTF-8 con BOM, como siempre) o <stem>.parquet."""
+    if fmt == "parquet":
+        if not parquet_available():
+            raise RuntimeError("El formato parquet requiere pyarrow (pip install pyarrow).")
+        path = Path(out_dir) / f"{stem}.parquet"
+        pq.write_table(_arrow_table(df), path, compression="zstd")
+        return path
+    path = Path(out_dir) / f"{stem}.csv"
+    df.to_csv(path, index=False, encoding="utf-8-sig")
+    return path
+
+
+def template_path(base_dir: Path, stem: str) -> Path:
+    """
+    Ruta de la plantilla <stem>: el .parquet si existe, pyarrow está disponible y
+    no es más antiguo que el .csv; en otro caso el .csv (exista o no).
+    """
+    base_dir = Path(base_dir)
+    csv_path = base_dir / f"{stem}.csv"
+    parquet_path = base_dir / f"{stem}.parquet"
+    if parquet_available() and parquet_path.exists():
+        if not csv_path.exists() or parquet_path.stat().st_mtime >= csv_path.stat().st_mtime:
+            return parquet_path
+    return csv_path
+
+
+def is_parquet(path: Path) -> bool:
+    return Path(path).suffix.lower() == ".parquet"
+
+
+def _column_values(arr) -> list:
+    """Columna Arrow → lista Python; las columnas diccionario se decodifican vía su tabla de valores."""
+    if pa.types.is_dictionary(arr.type):
+        values = arr.dictionary.to_pylist()
+        values.append(None)
+        idx = pc.fill_null(arr.indices, len(values) - 1).to_numpy(zero_copy_only=False)
+        return [values[i] for i in idx]
+    return arr.to_pylist()
+
+
+def iter_parquet_rows(path: Path, batch_size: int):
+    """Filas como dicts con valores tipados (str, int, bool, Decimal, None), por lotes."""
+    pf = pq.ParquetFile(path)
+    for batch in pf.iter_batches(batch_size=batch_size):
+        names = batch.schema.names
+        columns = [_column_values(col) for col in batch.columns]
+        for values in zip(*columns):
+            yield dict(zip(names, values))
+
+
+def parquet_shape(path: Path) -> tuple[list[str], int]:
+    """Columnas y filas leídas de los metadatos, sin tocar los datos."""
+    pf = pq.ParquetFile(path)
+    return list(pf.schema_arrow.names), pf.metadata.num_rows
+
+
+def parquet_sample(path: Path, n: int, rng) -> list[dict]:
+    """Hasta `n` filas al azar de un row group elegido al azar (`rng`: numpy Generator)."""
+    pf = pq.ParquetFile(path)
+    if pf.metadata.num_rows == 0:
+        return []
+    table = pf.read_row_group(int(rng.integers(pf.num_row_groups)))
+    idx = sorted(rng.choice(table.num_rows, size=min(n, table.num_rows), replace=False))
+    return table.take(idx).to_pylist()
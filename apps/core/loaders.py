@@ -0,0 +1,125 @@
+# apps/core/loaders.py
+"""
+Carga masiva de hechos financieros (FactFinance).
+
+En lugar de un update_or_create por fila, los hechos se acumulan en lotes
+con las dimensiones ya resueltas (ids) y se escriben con un upsert real
+sobre la restricción `uniq_factfinance_key` (INSERT ... ON CONFLICT DO UPDATE
+en SQLite/Postgres vía bulk_create(update_conflicts=True)).
+"""
+from decimal import Decimal
+
+from apps.core.models import FactFinance
+from apps.core.resolvers import IN_BATCH, _in_batches
+
+FACT_KEY_FIELDS = ["company", "account", "scenario", "period", "center"]
+DEFAULT_BATCH_SIZE = 5000
+KEY_CHUNK = IN_BATCH // 3  # tres listas IN por consulta (escenario, periodo, cuenta)
+
+
+def fact_key(company_id, account_id, scenario_id, period_id, center_id):
+    return (company_id, account_id, scenario_id, period_id, center_id)
+
+
+def _existing_keys(keys):
+    """
+    Devuelve {key: (id, amount)} para las claves del lote que ya existen en BD.
+
+    Se consulta con listas IN acotadas sobre las columnas de la clave
+    (scenario, period, account; el escenario ya determina la empresa) en
+    trozos de KEY_CHUNK valores, así que el tamaño de cada sentencia no
+    depende de cuántas particiones toque el lote y solo se leen las cuentas
+    del lote, no las particiones completas. Lo que la combinación de listas
+    trae de más se descarta al comparar con las claves.
+    """
+    scenario_ids = sorted({k[2] for k in keys})
+    period_ids = sorted({k[3] for k in keys})
+    account_ids = sorted({k[1] for k in keys})
+    out = {}
+    for scenarios in _in_batches(scenario_ids, KEY_CHUNK):
+        for periods in _in_batches(period_ids, KEY_CHUNK):
+            for accounts in _in_batches(account_ids, KEY_CHUNK):
+                qs = FactFinance.objects.filter(
+                    scenario_id__in=scenarios, period_id__in=periods, account_id__in=accounts
+                ).values_list("id", "company_id", "account_id", "scenario_id", "period_id", "center_id", "amount")
+                for pk, company_id, account_id, scenario_id, period_id, center_id, amount in qs:
+                    key = fact_key(company_id, account_id, scenario_id, period_id, center_id)
+                    if key in keys:
+                        out[key] = (pk, amount)
+    return out
+
+
+def upsert_fact_batch(batch: dict, counters: dict):
+    """
+    Escribe un lote {key: amount} en FactFinance.
+
+    - Claves con centro: un único INSERT ... ON CONFLICT DO UPDATE (amount).
+    - Claves sin centro (center NULL): el NULL no dispara el conflicto del
+      índice único, así que las existentes van por bulk_update y las nuevas
+      por bulk_create.
+
+    Los contadores created/updated se obtienen de una sola lectura previa de
+    las claves existentes del lote.
+    """
+    if not batch:
+        return
+    existing = _existing_keys(batch)
+
+    upserts, null_updates, null_creates = [], [], []
+    for key, amount in batch.items():
+        company_id, account_id, scenario_id, period_id, center_id = key
+        obj = FactFinance(
+            company_id=company_id,
+            account_id=account_id,
+            scenario_id=scenario_id,
+            period_id=period_id,
+            center_id=center_id,
+            amount=amount,
+        )
+        found = existing.get(key)
+        counters["updated" if found else "created"] += 1
+        if center_id is not None:
+            upserts.append(obj)
+        elif found:
+            obj.pk = found[0]
+            null_updates.append(obj)
+        else:
+            null_creates.append(obj)
+
+    if upserts:
+        FactFinance.objects.bulk_create(
+            upserts,
+            update_conflicts=True,
+            unique_fields=FACT_KEY_FIELDS,
+            update_fields=["amount"],
+        )
+    if null_updates:
+        FactFinance.objects.bulk_update(null_updates, ["amount"])
+    if null_creates:
+        FactFinance.objects.bulk_create(null_creates)
+
+
+class FactBatchWriter:
+    """
+    Acumula hechos resueltos y los vuelca con upsert_fact_batch cada
+    `batch_size` claves. Dentro de un lote, una clave repetida se queda con el
+    último importe (igual que update_or_create fila a fila) y cuenta como
+    actualizada.
+    """
+
+    def __init__(self, counters: dict, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.counters = counters
+        self.batch_size = max(1, int(batch_size or DEFAULT_BATCH_SIZE))
+        self.pending = {}
+
+    def add(self, company_id, account_id, scenario_id, period_id, center_id, amount: Decimal):
+        key = fact_key(company_id, account_id, scenario_id, period_id, center_id)
+        if key in self.pending:
+            self.counters["updated"] += 1
+        self.pending[key] = amount
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        upsert_fact_batch(self.pending, self.counters)
+        self.pending = {}
@@ -1,30 +1,43 @@
-import csv
+import time
 from pathlib import Path
 from decimal import Decimal, InvalidOperation
 
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction, connection, IntegrityError
+from django.db import transaction, connection
 
 from apps.core.models import (
-    Company, Account, CostCenter, Period, Scenario, FactFinance
+    Company, CostCenter, Period, Scenario, FactFinance
+)
+from apps.core.loaders import FactBatchWriter, DEFAULT_BATCH_SIZE
+from apps.core.readers import iter_table_rows, iter_template_rows, iter_template_chunks, chunked, DEFAULT_CHUNK_SIZE
+from apps.core.interchange import template_path
+from apps.core.resolvers import DimensionResolver, _in_batches, bulk_insert
+from apps.core.catalogs import load_account_tree
+from apps.core.aggregates import refresh_aggregates, refresh_all_aggregates
+from apps.core.checkpoints import ImportCheckpoint
+from apps.core.parallel import (
+    PartitionSpiller, run_partitions, spill_dir, default_workers, usable_workers,
+    label_partitions, partition_reporter,
+)
+from apps.core.manifest import (
+    check_file, record_file, PartitionHasher, partition_states,
+    apply_partition_delta, drop_partition, save_partition_state,
 )
 
-# -------------------- Utilidades --------------------
+DEFAULT_COMPANY = "Confort.com"
 
-def _read_csv_rows(csv_path: Path):
-    if not csv_path.exists():
-        return []
-    with csv_path.open("r", encoding="utf-8-sig", newline="") as f:
-        reader = csv.DictReader(f)
-        rows = []
-        for r in reader:
-            rows.append({(k or "").strip(): (v or "").strip() for k, v in r.items()})
-        return rows
+# -------------------- Utilidades --------------------
 
 def _first(row, *keys, default=""):
+    # Filas de CSV traen texto; las de Parquet, valores ya tipados (int, Decimal, bool)
     for k in keys:
-        if k in row and str(row[k]).strip() != "":
-            return row[k].strip()
+        v = row.get(k)
+        if v is None:
+            continue
+        if not isinstance(v, str):
+            return v
+        if v.strip() != "":
+            return v.strip()
     return default
 
 def _to_int(val, default=0):
@@ -37,6 +50,8 @@ def _to_int(val, default=0):
             return default
 
 def _to_decimal(val, default=Decimal("0")):
+    if isinstance(val, Decimal):
+        return val
     s = str(val or "").strip().replace(",", "")
     if s == "":
         return default
@@ -48,14 +63,25 @@ def _to_decimal(val, default=Decimal("0")):
         except Exception:
             return default
 
-def _db_table_info(table_name: str):
-    with connection.cursor() as cur:
-        inner = getattr(cur, "cursor", cur)
-        inner.execute(f"PRAGMA table_info({table_name});")
-        out = {}
-        for cid, name, ctype, notnull, dflt, pk in inner.fetchall():
-            out[name] = (bool(notnull), dflt)
-        return out
+def _to_bool(val):
+    if isinstance(val, bool):
+        return val
+    return str(val or "").strip().lower() in ("1", "true", "t", "yes", "y", "si", "sí")
+
+def _parse_fact(r):
+    """Fila de facts_finance → valores con los alias de columna resueltos, o None si se salta."""
+    company_code = _first(r, "company_code")
+    company_name = _first(r, "company_name")
+    scenario_name = _first(r, "scenario", "scenario_name", "scenario_code", default="Base")
+    year  = _to_int(_first(r, "year"), default=0)
+    month = _to_int(_first(r, "month"), default=12)
+    account_code = _first(r, "account_code", "code")
+    account_name = _first(r, "account_name", "name", default=account_code)
+    center_code  = _first(r, "cost_center", "center_code")
+    amount       = _to_decimal(_first(r, "amount"), default=Decimal("0"))
+    if year <= 0 or not account_code:
+        return None
+    return company_code, company_name, scenario_name, year, month, account_code, account_name, center_code, amount
 
 # -------------------- Comando --------------------
 
@@ -69,6 +95,41 @@ class Command(BaseCommand):
             default="import_data/templates",
             help="Directorio base de plantillas CSV (por defecto: import_data/templates)",
         )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Carga masiva de hechos: dimensiones resueltas una vez y upsert por lotes",
+        )
+        parser.add_argument(
+            "--batch-size",
+            dest="batch_size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Filas por lote en modo --bulk (por defecto: {DEFAULT_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            dest="chunk_size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f"Filas leídas y procesadas por bloque; acota la memoria (por defecto: {DEFAULT_CHUNK_SIZE})",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=0,
+            help="Carga paralela de hechos por (company, period) con N procesos (0 = desactivado)",
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Salta archivos y particiones (company, scenario, period) sin cambios según el manifiesto",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continúa la última carga --bulk interrumpida de facts_finance desde su último checkpoint (implica --bulk)",
+        )
 
     def handle(self, *args, **options):
         base_dir = Path(options["base_dir"]).resolve()
@@ -76,12 +137,15 @@ class Command(BaseCommand):
         if not base_dir.exists():
             raise CommandError(f"No existe el directorio: {base_dir}")
 
-        rows_companies = _read_csv_rows(base_dir / "companies.csv")
-        rows_accounts  = _read_csv_rows(base_dir / "accounts.csv")
-        rows_centers   = _read_csv_rows(base_dir / "centers.csv")     # si no tienes centers.csv, queda vacío (no falla)
-        rows_periods   = _read_csv_rows(base_dir / "periods.csv")
-        rows_scen      = _read_csv_rows(base_dir / "scenarios.csv")
-        rows_facts     = _read_csv_rows(base_dir / "facts_finance.csv")
+        # Generadores: nada se lee hasta que cada importador lo consume
+        # Cada plantilla se lee como .parquet si existe (y hay pyarrow) o como .csv
+        chunk_size     = options["chunk_size"]
+        rows_companies = iter_template_rows(base_dir, "companies", chunk_size)
+        rows_accounts  = iter_template_rows(base_dir, "accounts", chunk_size)
+        rows_centers   = iter_template_rows(base_dir, "centers", chunk_size)     # si no tienes centers.csv, queda vacío (no falla)
+        rows_periods   = iter_template_rows(base_dir, "periods", chunk_size)
+        rows_scen      = iter_template_rows(base_dir, "scenarios", chunk_size)
+        fact_chunks    = iter_template_chunks(base_dir, "facts_finance", chunk_size)
 
         summary = {
             "companies": {"created": 0, "updated": 0, "skipped": 0},
@@ -92,144 +156,233 @@ class Command(BaseCommand):
             "facts":     {"created": 0, "updated": 0, "skipped": 0},
         }
 
-        with transaction.atomic():
-            self._import_companies(rows_companies, summary["companies"])
-            self._import_accounts(rows_accounts, summary["accounts"])
-            self._import_centers(rows_centers, summary["centers"])
-            self._import_periods(rows_periods, summary["periods"])
-            self._import_scenarios(rows_scen, summary["scenarios"])
-            self._import_facts_finance(rows_facts, summary["facts"])
-
+        workers = options["workers"]
+        if workers < 0:
+            workers = default_workers()
+
+        if options["resume"] and (workers or options["incremental"]):
+            raise CommandError("--resume solo aplica al modo --bulk (no a --workers ni --incremental).")
+
+        # Particiones (company, scenario, period) cuyos agregados hay que recalcular
+        self.touched = set()
+        self.refresh_all = False
+
+        if options["incremental"]:
+            self._handle_incremental(base_dir, options["chunk_size"], summary)
+            aggregates = self._refresh_committed()
+        elif workers:
+            # Catálogos primero y confirmados; luego cada partición en su transacción
+            with transaction.atomic():
+                self._import_catalogs(summary, rows_companies, rows_accounts, rows_centers, rows_periods, rows_scen)
+            self._import_facts_finance_parallel(fact_chunks, summary["facts"], options["batch_size"], workers)
+            aggregates = self._refresh_committed()
+        elif options["bulk"] or options["resume"]:
+            # Catálogos en una transacción; los hechos se confirman por bloques con checkpoint
+            with transaction.atomic():
+                self._import_catalogs(summary, rows_companies, rows_accounts, rows_centers, rows_periods, rows_scen)
+            aggregates = self._import_facts_finance_bulk(
+                template_path(base_dir, "facts_finance"), chunk_size, summary["facts"],
+                options["batch_size"], options["resume"],
+            )
+        else:
+            # Hechos y agregados en la misma transacción: o quedan ambos o ninguno
+            with transaction.atomic():
+                self._import_catalogs(summary, rows_companies, rows_accounts, rows_centers, rows_periods, rows_scen)
+                self._import_facts_finance(fact_chunks, summary["facts"])
+                aggregates = self._refresh_aggregates()
         self.stdout.write(self.style.SUCCESS("Importación completada."))
         for k, v in summary.items():
             self.stdout.write(f"  {k}: {v}")
+        self.stdout.write(f"  aggregates: {aggregates}")
+
+    def _refresh_aggregates(self) -> dict:
+        return refresh_all_aggregates() if self.refresh_all else refresh_aggregates(self.touched)
+
+    def _refresh_committed(self) -> dict:
+        """
+        Refresco tras hechos ya confirmados por partes (--incremental,
+        --workers): si falla, el error lo dice en lugar de dejar agregados
+        viejos sin aviso.
+        """
+        try:
+            return self._refresh_aggregates()
+        except Exception as e:
+            raise CommandError(
+                f"Los hechos quedaron guardados pero no se pudieron recalcular los agregados ({e}); "
+                "ejecute manage.py refresh_aggregates."
+            ) from e
+
+    # -------------------- Modo incremental --------------------
+
+    def _handle_incremental(self, base_dir, chunk_size, summary):
+        catalog_files = [
+            ("companies", "companies", self._import_companies),
+            ("accounts",  "accounts",  self._import_accounts),
+            ("centers",   "centers",   self._import_centers),
+            ("periods",   "periods",   self._import_periods),
+            ("scenarios", "scenarios", self._import_scenarios),
+        ]
+        summary["facts"]["deleted"] = 0
+        skipped_files = []
+        with transaction.atomic():
+            for key, stem, importer in catalog_files:
+                path = template_path(base_dir, stem)
+                if not path.exists():
+                    continue
+                unchanged, _, fingerprint = check_file(path)
+                if unchanged:
+                    skipped_files.append(path.name)
+                    continue
+                importer(iter_table_rows(path, chunk_size), summary[key])
+                record_file(path, fingerprint)
+            self._import_facts_finance_incremental(
+                template_path(base_dir, "facts_finance"), chunk_size, summary["facts"], skipped_files
+            )
+        if skipped_files:
+            self.stdout.write(self.style.WARNING(f"Archivos sin cambios (saltados): {', '.join(skipped_files)}"))
+
+    def _import_facts_finance_incremental(self, path, chunk_size, counters, skipped_files):
+        """
+        Delta de hechos: solo se escriben las particiones (company, scenario,
+        period) cuyo hash de filas cambió respecto al último import.
+        """
+        if not path.exists():
+            return
+        unchanged, manifest, fingerprint = check_file(path)
+        if unchanged:
+            skipped_files.append(path.name)
+            return
+        self.stdout.write(self.style.NOTICE("Importando facts_finance en modo incremental..."))
+        previous = partition_states(manifest)
+        manifest = record_file(path, fingerprint)
+        hasher = PartitionHasher()
+
+        with spill_dir() as workdir:
+            spiller = PartitionSpiller(workdir)
+            resolver = DimensionResolver(default_company=DEFAULT_COMPANY)
+            for chunk in chunked(iter_table_rows(path, chunk_size), chunk_size):
+                for fact in self._resolve_facts(resolver, chunk, counters):
+                    company_id, account_id, scenario_id, period_id, center_id, amount = fact
+                    key = (company_id, scenario_id, period_id)
+                    hasher.add(key, account_id, center_id, amount)
+                    spiller.add(key, *fact)
+            spiller.close()
+
+            untouched = []
+            for key, spill_path in spiller.paths.items():
+                row_hash, row_count = hasher.digest(key), hasher.counts[key]
+                if previous.get(key) == (row_hash, row_count):
+                    untouched.append(key)
+                    counters["skipped"] += row_count
+                    continue
+                apply_partition_delta(key, spill_path, counters)
+                save_partition_state(manifest, key, row_hash, row_count)
+                self.touched.add(key)
+
+        removed = previous.keys() - spiller.paths.keys()
+        for key in removed:
+            drop_partition(manifest, key, counters)
+        self.touched.update(removed)
+
+        self.stdout.write(
+            f"  Particiones: {len(spiller.paths)} en archivo, "
+            f"{len(spiller.paths) - len(untouched)} actualizadas, {len(untouched)} sin cambios, "
+            f"{len(removed)} eliminadas"
+        )
+        if untouched:
+            labels = self._partition_labels(untouched)
+            shown = ", ".join(labels[:12]) + (" ..." if len(labels) > 12 else "")
+            self.stdout.write(f"  Sin cambios (saltadas): {shown}")
+
+    def _partition_labels(self, keys):
+        companies = dict(Company.objects.values_list("id", "code"))
+        scenarios = dict(Scenario.objects.values_list("id", "name"))
+        periods = {pid: f"{y}-{m:02d}" for pid, y, m in Period.objects.values_list("id", "year", "month")}
+        return sorted(f"{companies.get(c)}/{scenarios.get(s)}/{periods.get(p)}" for c, s, p in keys)
 
     # -------------------- Importadores --------------------
 
+    def _import_catalogs(self, summary, rows_companies, rows_accounts, rows_centers, rows_periods, rows_scen):
+        self._import_companies(rows_companies, summary["companies"])
+        self._import_accounts(rows_accounts, summary["accounts"])
+        self._import_centers(rows_centers, summary["centers"])
+        self._import_periods(rows_periods, summary["periods"])
+        self._import_scenarios(rows_scen, summary["scenarios"])
+
+    def _upsert_by_code(self, model, records: dict, counters):
+        """
+        Altas y cambios de nombre de un catálogo por código ({code: name}):
+        las altas por lote con resolvers.bulk_insert (rellena las columnas
+        heredadas NOT NULL de tablas antiguas, p. ej. core_costcenter.level),
+        los nombres que cambiaron con un UPDATE por código.
+        """
+        existing = {}
+        for codes in _in_batches(records):
+            existing.update(model.objects.filter(code__in=codes).values_list("code", "name"))
+        new = [model(code=code, name=name) for code, name in records.items() if code not in existing]
+        if new:
+            bulk_insert(model, new)
+        for code, name in records.items():
+            if code in existing and existing[code] != name:
+                model.objects.filter(code=code).update(name=name)
+        counters["created"] += len(new)
+        counters["updated"] += len(records) - len(new)
+
     @transaction.atomic
     def _import_companies(self, rows, counters):
-        self.stdout.write(self.style.NOTICE(f"Importando companies ({len(rows)} filas)..."))
+        self.stdout.write(self.style.NOTICE("Importando companies..."))
+        records = {}
         for r in rows:
             code = _first(r, "code", "company_code")
             name = _first(r, "name", "company_name", default=code or "Confort.com")
             if not code:
                 counters["skipped"] += 1
                 continue
-            obj, created = Company.objects.update_or_create(
-                code=code, defaults={"name": name}
-            )
-            counters["created" if created else "updated"] += 1
-
-    def _raw_insert_account_if_needed(self, code, name, acc_type):
-        with connection.cursor() as cur:
-            inner = getattr(cur, "cursor", cur)   # ¡usar SIEMPRE inner!
-            cols_info = _db_table_info("core_account")
-            columns = ["code", "name", "account_type"]
-            params = [code, name, acc_type]
-            if "level" in cols_info:
-                columns.append("level"); params.append(1)
-            if "is_leaf" in cols_info:
-                columns.append("is_leaf"); params.append(1)
-            placeholders = ",".join(["?"] * len(columns))
-            sql = f"INSERT OR IGNORE INTO core_account ({','.join(columns)}) VALUES ({placeholders})"
-            inner.execute(sql, params)
+            if code in records:
+                counters["updated"] += 1  # repetido en el archivo: gana el último nombre
+            records[code] = name
+        self._upsert_by_code(Company, records, counters)
 
     @transaction.atomic
     def _import_accounts(self, rows, counters):
-        self.stdout.write(self.style.NOTICE(f"Importando accounts ({len(rows)} filas)..."))
-
-        model_fields = {f.name for f in Account._meta.get_fields()}
-        have_level   = "level" in model_fields
-        have_is_leaf = "is_leaf" in model_fields
-        have_parent  = "parent" in model_fields
-
-        cols_info = _db_table_info("core_account")
-        db_requires_level   = ("level"   in cols_info and cols_info["level"][0]   and cols_info["level"][1]   is None and not have_level)
-        db_requires_is_leaf = ("is_leaf" in cols_info and cols_info["is_leaf"][0] and cols_info["is_leaf"][1] is None and not have_is_leaf)
-
-        cache = {a.code: a for a in Account.objects.all().only("id", "code", "name")}
-
-        def to_bool(v):
-            s = str(v or "").strip().lower()
-            if s == "":
-                return True
-            return s in ("1", "true", "t", "yes", "y", "si", "sí")
-
+        self.stdout.write(self.style.NOTICE("Importando accounts..."))
+        # Árbol completo en memoria: padres resueltos sin consultas y escritura por lotes
+        records = []
         for r in rows:
             code = _first(r, "code", "account_code")
-            name = _first(r, "name", "account_name", default=code)
-            acc_type = _first(r, "account_type", "type", default="Expense")
-            parent_code = _first(r, "parent_code")
-            level = _to_int(_first(r, "level"), default=1)
-            is_leaf = to_bool(_first(r, "is_leaf", default="1"))
-
             if not code:
                 counters["skipped"] += 1
                 continue
-
-            obj = cache.get(code)
-            if obj:
-                changed = False
-                updates = []
-                if obj.name != name:
-                    obj.name = name; updates.append("name"); changed = True
-                if getattr(obj, "account_type", None) != acc_type:
-                    obj.account_type = acc_type; updates.append("account_type"); changed = True
-                if have_level and getattr(obj, "level", None) != level:
-                    obj.level = level; updates.append("level"); changed = True
-                if have_is_leaf and getattr(obj, "is_leaf", None) != is_leaf:
-                    obj.is_leaf = is_leaf; updates.append("is_leaf"); changed = True
-                if have_parent and parent_code:
-                    try:
-                        parent = Account.objects.get(code=parent_code)
-                    except Account.DoesNotExist:
-                        parent = None
-                    if obj.parent_id != (parent.id if parent else None):
-                        obj.parent = parent; updates.append("parent"); changed = True
-                if changed:
-                    obj.save(update_fields=updates)
-                    counters["updated"] += 1
-                else:
-                    counters["skipped"] += 1
-                continue
-
-            if (db_requires_level or db_requires_is_leaf) and (not have_level or not have_is_leaf):
-                self._raw_insert_account_if_needed(code, name, acc_type)
-                obj = Account.objects.get(code=code)
-                counters["created"] += 1
-                cache[code] = obj
-                continue
-
-            defaults = {"name": name, "account_type": acc_type}
-            if have_level:   defaults["level"]   = level
-            if have_is_leaf: defaults["is_leaf"] = is_leaf
-            if have_parent and parent_code:
-                try:
-                    defaults["parent"] = Account.objects.get(code=parent_code)
-                except Account.DoesNotExist:
-                    pass
-
-            obj = Account.objects.create(code=code, **defaults)
-            counters["created"] += 1
-            cache[code] = obj
+            level = _first(r, "level")
+            is_leaf = _first(r, "is_leaf")
+            records.append({
+                "code": code,
+                "name": _first(r, "name", "account_name", default=code),
+                "account_type": _first(r, "account_type", "type", default="Expense"),
+                "parent_code": _first(r, "parent_code"),
+                "level": None if level == "" else _to_int(level, default=1),
+                "is_leaf": None if is_leaf == "" else _to_bool(is_leaf),
+            })
+        load_account_tree(records, counters)
 
     @transaction.atomic
     def _import_centers(self, rows, counters):
-        self.stdout.write(self.style.NOTICE(f"Importando centers ({len(rows)} filas)..."))
+        self.stdout.write(self.style.NOTICE("Importando centers..."))
+        records = {}
         for r in rows:
             code = _first(r, "code", "center_code", "cost_center")
             name = _first(r, "name", "center_name", default=code)
             if not code:
                 counters["skipped"] += 1
                 continue
-            obj, created = CostCenter.objects.update_or_create(
-                code=code, defaults={"name": name}
-            )
-            counters["created" if created else "updated"] += 1
+            if code in records:
+                counters["updated"] += 1
+            records[code] = name
+        self._upsert_by_code(CostCenter, records, counters)
 
     @transaction.atomic
     def _import_periods(self, rows, counters):
-        self.stdout.write(self.style.NOTICE(f"Importando periods ({len(rows)} filas)..."))
+        self.stdout.write(self.style.NOTICE("Importando periods..."))
         for r in rows:
             year = _to_int(_first(r, "year"), default=0)
             month = _to_int(_first(r, "month"), default=0)
@@ -243,71 +396,138 @@ class Command(BaseCommand):
 
     @transaction.atomic
     def _import_scenarios(self, rows, counters):
-        self.stdout.write(self.style.NOTICE(f"Importando scenarios ({len(rows)} filas)..."))
-        companies = {c.code: c for c in Company.objects.all().only("id", "code")}
-        companies_by_name = {c.name: c for c in Company.objects.all().only("id", "name")}
+        self.stdout.write(self.style.NOTICE("Importando scenarios..."))
+        resolver = DimensionResolver(default_company=DEFAULT_COMPANY)
         for r in rows:
             company_code = _first(r, "company_code")
             company_name = _first(r, "company_name")
             name = _first(r, "name", "scenario", "scenario_name", default="Base")
-            company = companies.get(company_code) or companies_by_name.get(company_name)
-            if not company:
-                company, _ = Company.objects.get_or_create(code="Confort.com", defaults={"name": "Confort.com"})
-            obj, created = Scenario.objects.update_or_create(name=name, defaults={"company": company})
+            company_id = resolver.company_id(company_code, company_name)
+            created = (company_id, name) not in resolver.scenarios
+            resolver.scenario_id(company_id, name)
             counters["created" if created else "updated"] += 1
 
     @transaction.atomic
-    def _import_facts_finance(self, rows, counters):
-        self.stdout.write(self.style.NOTICE(f"Importando facts_finance ({len(rows)} filas)..."))
-        companies = {c.code: c for c in Company.objects.all().only("id", "code")}
-        companies_by_name = {c.name: c for c in Company.objects.all().only("id", "name")}
-        accounts = {a.code: a for a in Account.objects.all().only("id", "code")}
-        centers  = {cc.code: cc for cc in CostCenter.objects.all().only("id", "code")}
-        for r in rows:
-            company_code = _first(r, "company_code")
-            company_name = _first(r, "company_name")
-            scenario_name = _first(r, "scenario", "scenario_name", "scenario_code", default="Base")
-            year  = _to_int(_first(r, "year"), default=0)
-            month = _to_int(_first(r, "month"), default=12)
-            account_code = _first(r, "account_code", "code")
-            account_name = _first(r, "account_name", "name", default=account_code)
-            center_code  = _first(r, "cost_center", "center_code")
-            amount       = _to_decimal(_first(r, "amount"), default=Decimal("0"))
-
-            if year <= 0 or not account_code:
-                counters["skipped"] += 1
-                continue
+    def _import_facts_finance(self, chunks, counters):
+        self.stdout.write(self.style.NOTICE("Importando facts_finance..."))
+        resolver = DimensionResolver(default_company=DEFAULT_COMPANY)
+        for chunk in chunks:
+            for company_id, account_id, scenario_id, period_id, center_id, amount in self._resolve_facts(resolver, chunk, counters):
+                self.touched.add((company_id, scenario_id, period_id))
+                obj, created = FactFinance.objects.update_or_create(
+                    company_id=company_id,
+                    scenario_id=scenario_id,
+                    period_id=period_id,
+                    account_id=account_id,
+                    center_id=center_id,
+                    defaults={"amount": amount},
+                )
+                counters["created" if created else "updated"] += 1
+
+    def _resolve_facts(self, resolver, chunk, counters):
+        """
+        Resuelve un bloque de filas de facts_finance a tuplas de ids + importe.
+        Las dimensiones que faltan se crean de una vez para todo el bloque;
+        las filas inválidas cuentan como skipped.
+        """
+        parsed = [p for p in map(_parse_fact, chunk) if p is not None]
+        counters["skipped"] += len(chunk) - len(parsed)
+        resolver.ensure_companies({(p[0], p[1]) for p in parsed})
+        resolver.ensure_periods({(p[3], p[4]) for p in parsed})
+        resolver.ensure_accounts({(p[5], p[6], "Expense") for p in parsed})
+        resolver.ensure_centers({(p[7], p[7]) for p in parsed if p[7]})
+        company_ids = [resolver.company_id(p[0], p[1]) for p in parsed]
+        resolver.ensure_scenarios({(cid, p[2]) for cid, p in zip(company_ids, parsed)})
+        for company_id, p in zip(company_ids, parsed):
+            _, _, scenario_name, year, month, account_code, _, center_code, amount = p
+            yield (
+                company_id,
+                resolver.accounts[account_code],
+                resolver.scenarios[(company_id, scenario_name)],
+                resolver.periods[(year, month)],
+                resolver.centers[center_code] if center_code else None,
+                amount,
+            )
 
-            company = companies.get(company_code) or companies_by_name.get(company_name)
-            if not company:
-                company, _ = Company.objects.get_or_create(code="Confort.com", defaults={"name": "Confort.com"})
-                companies[company.code] = company
-
-            scenario, _ = Scenario.objects.get_or_create(name=scenario_name, defaults={"company": company})
-            period, _ = Period.objects.get_or_create(year=year, month=month)
-
-            account = accounts.get(account_code)
-            if not account:
-                try:
-                    account = Account.objects.create(code=account_code, name=account_name or account_code, account_type="Expense")
-                except IntegrityError:
-                    self._raw_insert_account_if_needed(account_code, account_name or account_code, "Expense")
-                    account = Account.objects.get(code=account_code)
-                accounts[account_code] = account
-
-            center = None
-            if center_code:
-                center = centers.get(center_code)
-                if not center:
-                    center = CostCenter.objects.create(code=center_code, name=center_code)
-                    centers[center_code] = center
-
-            obj, created = FactFinance.objects.update_or_create(
-                company=company,
-                scenario=scenario,
-                period=period,
-                account=account,
-                center=center,
-                defaults={"amount": amount},
+    def _import_facts_finance_bulk(self, path, chunk_size, counters, batch_size, resume=False):
+        """
+        Igual que _import_facts_finance, pero resolviendo cada dimensión una sola
+        vez (cachés en memoria) y escribiendo los hechos por lotes con upsert.
+        Cada bloque leído se vuelca y se confirma (con su checkpoint en
+        ImportJob) antes de leer el siguiente; `resume` continúa tras el último.
+        Los agregados se recalculan antes de cerrar el job: si el refresco
+        falla el job queda fallido y --resume lo repite. Devuelve sus stats.
+        """
+        if not path.exists():
+            return self._refresh_aggregates()
+        self.stdout.write(self.style.NOTICE(
+            f"Importando facts_finance en modo bulk (lotes de {batch_size})..."
+        ))
+        checkpoint = ImportCheckpoint("apply_fin_templates", path, resume)
+        if checkpoint.stale:
+            self.stdout.write(self.style.WARNING(
+                "El archivo cambió desde la carga interrumpida: se importa desde el inicio."
+            ))
+        if checkpoint.resumed:
+            checkpoint.restore(counters)
+            self.refresh_all = True  # el tramo ya cargado no está en self.touched
+            self.stdout.write(self.style.WARNING(
+                f"Reanudando job {checkpoint.job.pk} desde la fila {checkpoint.start_row + 1}."
+            ))
+        resolver = DimensionResolver(default_company=DEFAULT_COMPANY)
+        writer = FactBatchWriter(counters, batch_size)
+        try:
+            for chunk in chunked(checkpoint.pending(iter_table_rows(path, chunk_size)), chunk_size):
+                with transaction.atomic():
+                    for fact in self._resolve_facts(resolver, chunk, counters):
+                        writer.add(*fact)
+                        self.touched.add((fact[0], fact[2], fact[3]))
+                    writer.flush()
+                    checkpoint.commit(len(chunk), counters)
+            aggregates = self._refresh_aggregates()
+        except BaseException as e:
+            checkpoint.failed(e)
+            raise
+        checkpoint.done(counters)
+        return aggregates
+
+    def _import_facts_finance_parallel(self, chunks, counters, batch_size, workers):
+        """
+        Modo paralelo: el coordinador resuelve dimensiones y reparte los hechos
+        por (company, period); cada partición se carga en un proceso del pool
+        y confirma su propia transacción.
+        """
+        usable = usable_workers(workers)
+        if usable != workers:
+            self.stdout.write(self.style.WARNING(
+                f"La base de datos ({connection.vendor}) no admite escrituras concurrentes: "
+                f"particiones en serie en lugar de {workers} procesos."
+            ))
+            workers = usable
+        self.stdout.write(self.style.NOTICE(
+            f"Importando facts_finance en paralelo ({workers} procesos, lotes de {batch_size})..."
+        ))
+        started = time.perf_counter()
+        with spill_dir() as workdir:
+            spiller = PartitionSpiller(workdir)
+            with transaction.atomic():
+                resolver = DimensionResolver(default_company=DEFAULT_COMPANY)
+                for chunk in chunks:
+                    for fact in self._resolve_facts(resolver, chunk, counters):
+                        company_id, _, scenario_id, period_id, _, _ = fact
+                        spiller.add((company_id, period_id), *fact)
+                        self.touched.add((company_id, scenario_id, period_id))
+
+            label_partitions(spiller)
+            prepared = time.perf_counter() - started
+            self.stdout.write(
+                f"  Particiones: {len(spiller.paths)} (preparación {prepared:.2f}s)"
             )
-            counters["created" if created else "updated"] += 1
+            results = run_partitions(spiller, counters, workers, batch_size, partition_reporter(self.stdout))
+
+        elapsed = time.perf_counter() - started
+        total = sum(r["rows"] for r in results)
+        rate = total / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"  Hechos en paralelo: {total} filas en {elapsed:.2f}s ({rate:,.0f} filas/s)"
+        ))
@@ -0,0 +1,137 @@
+# apps/core/management/commands/bench_importers.py
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.bench import CASES, bench_normalization, compare_results, load_manifest, run_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide apply_fin_templates, import_fin_data e import_csv sobre un conjunto sintético, "
+        "cada caso con una BD nueva, y guarda filas/s, RSS pico y consultas en JSON. "
+        "Con --normalization mide en cambio el volcado de map_raw_to_templates antes/después."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--data-dir",
+            default="import_data/synthetic",
+            help="Conjunto generado con generate_synthetic_data (por defecto: import_data/synthetic)",
+        )
+        parser.add_argument(
+            "--cases",
+            default=",".join(CASES),
+            help=f"Casos separados por coma (por defecto todos: {', '.join(CASES)})",
+        )
+        parser.add_argument("--repeat", type=int, default=1, help="Corridas por caso; se guarda la más rápida")
+        parser.add_argument(
+            "--output",
+            default="bench_results.json",
+            help="Archivo JSON de resultados (por defecto: bench_results.json)",
+        )
+        parser.add_argument(
+            "--compare",
+            default=None,
+            help="JSON de una corrida anterior para comparar (marca caídas de throughput)",
+        )
+        parser.add_argument(
+            "--normalization",
+            action="store_true",
+            help="Mide solo la normalización de map_raw_to_templates (fila a fila vs. por columnas) en una hoja wide generada",
+        )
+        parser.add_argument(
+            "--wide",
+            default="3000x60",
+            help="Tamaño de la hoja wide para --normalization: CUENTASxMESES (por defecto: 3000x60)",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.10,
+            help="Caída relativa de filas/s que se considera regresión (por defecto: 0.10)",
+        )
+
+    def _path(self, value):
+        path = Path(value)
+        return path if path.is_absolute() else Path(settings.BASE_DIR) / path
+
+    def _normalization(self, opts):
+        try:
+            accounts, months = (int(v) for v in opts["wide"].lower().split("x"))
+        except ValueError:
+            raise CommandError(f"--wide inválido: {opts['wide']!r} (use CUENTASxMESES, p. ej. 3000x60)")
+        self.stdout.write(self.style.HTTP_INFO(f"Hoja wide: {accounts} cuentas x {months} meses"))
+        result = bench_normalization(accounts, months, opts["repeat"])
+        for name, label in (("before", "fila a fila (antes)"), ("after", "por columnas (después)")):
+            r = result[name]
+            self.stdout.write(f"  {label:24s} {result['rows']:9d} filas {r['seconds']:8.2f}s {r['rows_per_sec']:10.0f} filas/s")
+        self.stdout.write(f"  aceleración x{result.get('speedup', 'n/d')}, mismo resultado: {'sí' if result['same_output'] else 'NO'}")
+        output = self._path(opts["output"])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+        self.stdout.write(self.style.SUCCESS(f"Resultados en {output}"))
+        if not result["same_output"]:
+            raise CommandError("La versión por columnas no da el mismo resultado que la fila a fila")
+
+    def handle(self, *args, **opts):
+        if opts["normalization"]:
+            return self._normalization(opts)
+        data_dir = self._path(opts["data_dir"])
+        cases = [c.strip() for c in opts["cases"].split(",") if c.strip()]
+        unknown = [c for c in cases if c not in CASES]
+        if unknown:
+            raise CommandError(f"Casos desconocidos: {unknown}. Disponibles: {', '.join(CASES)}")
+        try:
+            spec = load_manifest(data_dir)["spec"]
+        except FileNotFoundError as e:
+            raise CommandError(str(e))
+
+        baseline = None
+        if opts["compare"]:
+            compare_path = self._path(opts["compare"])
+            if not compare_path.exists():
+                raise CommandError(f"No existe {compare_path}")
+            baseline = json.loads(compare_path.read_text(encoding="utf-8"))
+
+        self.stdout.write(self.style.HTTP_INFO(f"Conjunto: {data_dir} {spec}"))
+
+        def report(r):
+            if r["ok"]:
+                self.stdout.write(
+                    f"  {r['case']:34s} {r['rows']:9d} filas {r['seconds']:8.2f}s "
+                    f"{r['rows_per_sec']:10.0f} filas/s {r['queries']:8d} consultas {r['peak_rss_mb']:7.1f} MB"
+                )
+            else:
+                self.stderr.write(self.style.ERROR(f"  {r['case']:34s} ERROR -> {r['error']}"))
+
+        results = run_benchmark(data_dir, cases, opts["repeat"], report)
+
+        output = self._path(opts["output"])
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+        self.stdout.write(self.style.SUCCESS(f"Resultados en {output}"))
+
+        if baseline is None:
+            return
+        if baseline.get("dataset", {}).get("spec") != spec:
+            self.stdout.write(self.style.WARNING("El conjunto de la corrida base tiene otro tamaño: la comparación es orientativa."))
+        self.stdout.write(self.style.HTTP_INFO(f"\nComparación con {opts['compare']}:"))
+        regressions = 0
+        for d in compare_results(results, baseline, opts["threshold"]):
+            before, after = d["rows_per_sec"]
+            change = f"{d['change']:+.1%}" if d["change"] is not None else "n/d"
+            line = (
+                f"  {d['case']:34s} {before:10.0f} → {after:10.0f} filas/s ({change}) "
+                f"consultas {d['queries'][0]} → {d['queries'][1]}, "
+                f"RSS {d['peak_rss_mb'][0]} → {d['peak_rss_mb'][1]} MB"
+            )
+            if d["regression"]:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(line + "  REGRESIÓN"))
+            else:
+                self.stdout.write(line)
+        if regressions:
+            self.stdout.write(self.style.WARNING(f"{regressions} caso(s) con regresión > {opts['threshold']:.0%}"))
@@ -0,0 +1,36 @@
+# apps/core/management/commands/build_statements.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.models import Scenario
+from apps.core.statements import build_all_statements
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula IncomeStatement, BalanceSheet y CashFlowStatement de todos los periodos "
+        "(una consulta agrupada y un upsert por tabla y escenario), clasificando con "
+        "Account.statement / group / natural_sign / measure."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--company", default=None, help="Company.code (por defecto todas)")
+        parser.add_argument("--scenario", default=None, help="Scenario.name (por defecto todos)")
+
+    def handle(self, *args, **opts):
+        scenarios = Scenario.objects.select_related("company").order_by("company_id", "id")
+        if opts["company"]:
+            scenarios = scenarios.filter(company__code=opts["company"])
+        if opts["scenario"]:
+            scenarios = scenarios.filter(name=opts["scenario"])
+        if not scenarios.exists():
+            raise CommandError("No hay escenarios que coincidan.")
+
+        t0 = time.perf_counter()
+        for scenario, stats in build_all_statements(scenarios):
+            self.stdout.write(
+                f"  {scenario.company}/{scenario.name}: {stats['periods']} periodos "
+                f"(IS {stats['IS']}, BS {stats['BS']}, CF {stats['CF']})"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Estados recalculados en {time.perf_counter() - t0:.2f}s"))
@@ -0,0 +1,121 @@
+# apps/core/management/commands/consolidate.py
+import csv
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.consolidation import consolidate, currency_code, load_fx_rates
+from apps.core.models import Company, ConsolidationGroup, Period
+from apps.core.resolvers import parse_period_code
+
+
+class Command(BaseCommand):
+    help = (
+        "Consolida un grupo de empresas en un escenario: traduce los hechos de los miembros a la "
+        "moneda del grupo (FxRate), aplica las eliminaciones y escribe el resultado como hechos de "
+        "la empresa del grupo. Los periodos cuyas entradas no cambiaron se saltan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--group", required=True, help="ConsolidationGroup.code")
+        parser.add_argument("--scenario", required=True, help="Scenario.name a consolidar")
+        parser.add_argument("--period-from", default=None, help="Primer periodo (YYYYMM o YYYY-MM)")
+        parser.add_argument("--period-to", default=None, help="Último periodo (YYYYMM o YYYY-MM)")
+        parser.add_argument("--force", action="store_true", help="Recalcula aunque las entradas no hayan cambiado")
+        parser.add_argument(
+            "--fx-file",
+            default=None,
+            help="CSV con columnas period,currency,rate (1 currency = rate moneda del grupo) a cargar antes",
+        )
+        parser.add_argument(
+            "--company",
+            default=None,
+            help=(
+                "Company.code de la entidad del grupo (sin hechos propios y fuera de --members): "
+                "crea el grupo si no existe (o lo reasigna)"
+            ),
+        )
+        parser.add_argument("--members", default=None, help="Códigos de las empresas miembro, separados por comas")
+        parser.add_argument("--currency", default=None, help="Moneda de presentación del grupo (al crearlo o cambiarla)")
+
+    def _companies(self, codes):
+        found = {c.code: c for c in Company.objects.filter(code__in=codes)}
+        missing = [c for c in codes if c not in found]
+        if missing:
+            raise CommandError(f"No existen las empresas: {', '.join(missing)}")
+        return [found[c] for c in codes]
+
+    def _group(self, opts):
+        group = ConsolidationGroup.objects.select_related("company").filter(code=opts["group"]).first()
+        if opts["company"]:
+            company = self._companies([opts["company"]])[0]
+            if group is None:
+                group = ConsolidationGroup(code=opts["group"], currency=currency_code(opts["currency"] or company.currency))
+            group.company = company
+        elif group is None:
+            raise CommandError(f"No existe el grupo {opts['group']!r} (use --company para crearlo)")
+        if opts["currency"]:
+            group.currency = currency_code(opts["currency"])
+
+        members = None
+        if opts["members"]:
+            codes = [c.strip() for c in opts["members"].split(",") if c.strip()]
+            members = self._companies(codes)
+        elif group.pk:
+            members = list(group.members.all())
+        if members and group.company in members:
+            raise CommandError(
+                f"La empresa del grupo ({group.company.code}) no puede ser miembro: "
+                "sus hechos se reemplazan con el consolidado. Use una entidad propia del grupo."
+            )
+        group.save()
+        if opts["members"]:
+            group.members.set(members)
+        return group
+
+    def _periods(self, opts):
+        if not (opts["period_from"] or opts["period_to"]):
+            return None
+        try:
+            lo = parse_period_code(opts["period_from"]) if opts["period_from"] else (0, 0)
+            hi = parse_period_code(opts["period_to"]) if opts["period_to"] else (9999, 12)
+        except ValueError as e:
+            raise CommandError(str(e))
+        return [
+            pid for pid, y, m in Period.objects.values_list("id", "year", "month")
+            if lo <= (y, m) <= hi
+        ]
+
+    def handle(self, *args, **opts):
+        group = self._group(opts)
+        if not group.members.exists():
+            raise CommandError(f"El grupo {group.code} no tiene empresas miembro (use --members)")
+
+        if opts["fx_file"]:
+            path = Path(opts["fx_file"])
+            if not path.exists():
+                raise CommandError(f"No existe el archivo {path}")
+            with path.open(newline="", encoding="utf-8-sig") as fh:
+                try:
+                    loaded = load_fx_rates(csv.DictReader(fh), base=group.currency)
+                except ValueError as e:
+                    raise CommandError(str(e))
+            self.stdout.write(f"Tipos de cambio cargados: {loaded} (base {currency_code(group.currency)})")
+
+        t0 = time.perf_counter()
+        try:
+            stats = consolidate(group, opts["scenario"], self._periods(opts), force=opts["force"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if not stats["periods"]:
+            where = " en el rango de periodos indicado" if opts["period_from"] or opts["period_to"] else ""
+            raise CommandError(
+                f"Ningún miembro de {group.code} tiene hechos en el escenario {opts['scenario']!r}{where}"
+            )
+        self.stdout.write(
+            f"  {group.code}/{opts['scenario']} -> {group.company}: {stats['periods']} periodos "
+            f"(calculados {stats['computed']}, sin cambios {stats['cached']}), "
+            f"{stats['rows']} hechos escritos, {stats['eliminated']} filas eliminadas"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Consolidación terminada en {time.perf_counter() - t0:.2f}s"))
@@ -0,0 +1,102 @@
+# apps/core/management/commands/export_data.py
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from apps.core.exports import EXPORT_FORMATS, fact_export, filter_error, income_export, stream_csv, write_xlsx
+from apps.core.models import Company, Scenario
+from apps.core.views import _pick_defaults
+
+
+class _Counted:
+    """Envuelve un iterador de filas para contar cuántas se exportaron."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.count = 0
+
+    def __iter__(self):
+        for row in self.rows:
+            self.count += 1
+            yield row
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta hechos (FactFinance, con filtros) o el EERR comparativo de un año a CSV o XLSX, "
+        "en streaming: la memoria no crece con el número de filas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("what", choices=["facts", "income"], help="Qué exportar")
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv", help="csv (por defecto) o xlsx")
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Archivo de salida (CSV: por defecto a stdout; XLSX: obligatorio)",
+        )
+        parser.add_argument("--company", default=None, help="Company.code (lista separada por comas en facts)")
+        parser.add_argument("--scenario", default=None, help="Scenario.name (lista separada por comas en facts)")
+        parser.add_argument("--account", default=None, help="facts: códigos de cuenta separados por comas")
+        parser.add_argument("--center", default=None, help="facts: códigos de centro separados por comas")
+        parser.add_argument("--period-from", default=None, help="facts: primer periodo (YYYYMM o YYYY-MM)")
+        parser.add_argument("--period-to", default=None, help="facts: último periodo (YYYYMM o YYYY-MM)")
+        parser.add_argument("--year", type=int, default=None, help="income: año del reporte")
+
+    def _income(self, opts):
+        if opts["year"] is None:
+            raise CommandError("income requiere --year")
+        company, scenario = _pick_defaults()
+        if opts["company"]:
+            company = Company.objects.filter(code=opts["company"]).first()
+            if company is None:
+                raise CommandError(f"No existe la empresa {opts['company']!r}")
+            if not opts["scenario"]:
+                scenario = Scenario.objects.filter(company=company).order_by("id").first()
+        if opts["scenario"]:
+            scenario = Scenario.objects.filter(name=opts["scenario"], company=company).first()
+            if scenario is None:
+                raise CommandError(f"No existe el escenario {opts['scenario']!r} para {company}")
+        if not company or not scenario:
+            raise CommandError("Faltan datos de empresa o escenario.")
+        return income_export(company, scenario, opts["year"])
+
+    def handle(self, *args, **opts):
+        fmt = opts["format"]
+        if fmt == "xlsx" and not opts["output"]:
+            raise CommandError("--format xlsx requiere --output")
+
+        if opts["what"] == "facts":
+            keys = ("company", "scenario", "account", "center", "period_from", "period_to")
+            params = {key: opts[key] for key in keys if opts[key]}
+            try:
+                columns, rows = fact_export(params)
+            except ValidationError as e:
+                raise CommandError(filter_error(e))
+            title = "facts_finance"
+        else:
+            columns, rows = self._income(opts)
+            title = f"estado_resultados_{opts['year']}"
+
+        rows = _Counted(rows)
+        t0 = time.perf_counter()
+        if opts["output"]:
+            out = Path(opts["output"])
+            out = out if out.is_absolute() else Path(settings.BASE_DIR) / out
+            with open(out, "wb") as fh:
+                if fmt == "xlsx":
+                    write_xlsx(columns, rows, fh, title)
+                else:
+                    for chunk in stream_csv(columns, rows):
+                        fh.write(chunk)
+            self.stderr.write(self.style.SUCCESS(
+                f"{rows.count} filas → {out} en {time.perf_counter() - t0:.2f}s"
+            ))
+        else:
+            for chunk in stream_csv(columns, rows):
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
@@ -0,0 +1,60 @@
+# apps/core/management/commands/generate_synthetic_data.py
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.synthetic import SyntheticSpec, generate_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera plantillas sintéticas (facts_finance.csv, accounts.csv, periods.csv, …) "
+        "de tamaño configurable para medir los importadores."
+    )
+
+    def add_arguments(self, parser):
+        defaults = SyntheticSpec()
+        parser.add_argument(
+            "--out-dir",
+            default="import_data/synthetic",
+            help="Carpeta de salida (por defecto: import_data/synthetic)",
+        )
+        parser.add_argument("--companies", type=int, default=defaults.companies, help="Número de compañías")
+        parser.add_argument("--accounts", type=int, default=defaults.accounts, help="Cuentas del catálogo")
+        parser.add_argument("--centers", type=int, default=defaults.centers, help="Centros de costo")
+        parser.add_argument("--periods", type=int, default=defaults.periods, help="Meses consecutivos")
+        parser.add_argument("--scenarios", type=int, default=defaults.scenarios, help="Escenarios por compañía")
+        parser.add_argument(
+            "--start-year", type=int, default=defaults.start_year, help="Año del primer periodo (enero)"
+        )
+        parser.add_argument("--seed", type=int, default=defaults.seed, help="Semilla (mismo valor → mismos datos)")
+
+    def handle(self, *args, **opts):
+        spec = SyntheticSpec(
+            companies=opts["companies"],
+            accounts=opts["accounts"],
+            centers=opts["centers"],
+            periods=opts["periods"],
+            scenarios=opts["scenarios"],
+            start_year=opts["start_year"],
+            seed=opts["seed"],
+        )
+        if min(spec.companies, spec.accounts, spec.centers, spec.periods, spec.scenarios) < 1:
+            raise CommandError("Todos los tamaños deben ser >= 1.")
+
+        out_dir = Path(opts["out_dir"])
+        if not out_dir.is_absolute():
+            out_dir = Path(settings.BASE_DIR) / out_dir
+
+        self.stdout.write(
+            f"Generando {spec.fact_rows} hechos ({spec.companies} compañías × {spec.accounts} cuentas × "
+            f"{spec.centers} centros × {spec.periods} periodos × {spec.scenarios} escenarios) en {out_dir}"
+        )
+        t0 = time.perf_counter()
+        manifest = generate_dataset(out_dir, spec)
+        for fname, rows in manifest["files"].items():
+            if rows:
+                self.stdout.write(f"  {fname:22s} filas={rows}")
+        self.stdout.write(self.style.SUCCESS(f"Listo en {time.perf_counter() - t0:.1f}s"))
@@ -1,75 +1,159 @@
 ﻿import csv
+import time
 from pathlib import Path
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
-from apps.core.models import Company, Scenario, Period, Assumption, RevenueDriver, ExpenseProjection, DebtInstrument
+from apps.core.models import Assumption, RevenueDriver, ExpenseProjection, DebtInstrument
+from apps.core.loaders import DEFAULT_BATCH_SIZE
+from apps.core.readers import chunked
+from apps.core.resolvers import DimensionResolver, parse_period_code
 
 def get_period(iso: str):
     try:
-        year, month = iso.split("-")
-        p, _ = Period.objects.get_or_create(year=int(year), month=int(month))
-        return p
+        return parse_period_code(iso)
     except Exception as e:
         raise CommandError(f"Periodo inválido '{iso}': {e}")
 
+def resolve_rows(resolver, rows, with_period=True):
+    """
+    Ids (company, scenario, period) de cada fila del bloque. Las dimensiones
+    que falten se crean de una vez para todo el bloque.
+    """
+    resolver.ensure_companies({(row["company"], row["company"]) for row in rows})
+    company_ids = [resolver.company_id(row["company"], row["company"]) for row in rows]
+    if not with_period:
+        return [(cid, None, None) for cid in company_ids]
+    periods = [get_period(row["period"]) for row in rows]
+    resolver.ensure_periods(set(periods))
+    resolver.ensure_scenarios({(cid, row["scenario"]) for cid, row in zip(company_ids, rows)})
+    return [
+        (cid, resolver.scenarios[(cid, row["scenario"])], resolver.periods[period])
+        for cid, row, period in zip(company_ids, rows, periods)
+    ]
+
+def build_assumption(row, company_id, scenario_id, period_id):
+    return Assumption(
+        company_id=company_id, scenario_id=scenario_id, period_id=period_id, key=row["key"],
+        value=float(row["value"]), unit=row.get("unit","ratio"), notes=row.get("notes","")
+    )
+
+def build_revenue_driver(row, company_id, scenario_id, period_id):
+    return RevenueDriver(
+        company_id=company_id, scenario_id=scenario_id, period_id=period_id,
+        product=row.get("product") or "General",
+        price=float(row["price"]), units=float(row["units"]),
+        currency=row.get("currency","USD"), notes=row.get("notes","")
+    )
+
+def build_expense(row, company_id, scenario_id, period_id):
+    return ExpenseProjection(
+        company_id=company_id, scenario_id=scenario_id, period_id=period_id,
+        line_item_code=row["line_item_code"], line_item_name=row["line_item_name"],
+        driver_type=row["driver_type"], value=float(row["value"]),
+        currency=row.get("currency","USD"), notes=row.get("notes","")
+    )
+
+def build_debt_instrument(row, company_id, scenario_id, period_id):
+    return DebtInstrument(
+        company_id=company_id, name=row["name"], principal=float(row["principal"]),
+        rate_annual=float(row["rate_annual"]), term_months=int(row["term_months"]),
+        start_date=row["start_date"], payment_frequency=row.get("payment_frequency","monthly"),
+        currency=row.get("currency","USD"), notes=row.get("notes","")
+    )
+
+def save_row(obj):
+    """Escritura fila a fila (modo por defecto): las assumptions se actualizan si ya existen."""
+    if isinstance(obj, Assumption):
+        Assumption.objects.update_or_create(
+            company_id=obj.company_id, scenario_id=obj.scenario_id, period_id=obj.period_id, key=obj.key,
+            defaults=dict(value=obj.value, unit=obj.unit, notes=obj.notes)
+        )
+    else:
+        obj.save()
+
+def save_batch(model, objs):
+    """
+    Escritura por lotes (--bulk). Assumption hace upsert sobre su clave única
+    (INSERT ... ON CONFLICT DO UPDATE); el resto son altas puras.
+    """
+    if model is Assumption:
+        # Un mismo INSERT no puede tocar dos veces la misma clave: gana la última fila
+        objs = list({(o.company_id, o.scenario_id, o.period_id, o.key): o for o in objs}.values())
+        model.objects.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=["company", "scenario", "period", "key"],
+            update_fields=["value", "unit", "notes"],
+        )
+    else:
+        model.objects.bulk_create(objs)
+
+# dataset -> (modelo, constructor por fila, ¿lleva scenario/period?)
+DATASETS = {
+    "assumptions": (Assumption, build_assumption, True),
+    "revenue_drivers": (RevenueDriver, build_revenue_driver, True),
+    "expenses": (ExpenseProjection, build_expense, True),
+    "debt_instruments": (DebtInstrument, build_debt_instrument, False),
+}
+
 class Command(BaseCommand):
     help = "Importa CSV: assumptions | revenue_drivers | expenses | debt_instruments"
 
     def add_arguments(self, parser):
         parser.add_argument("dataset", type=str)
         parser.add_argument("csv_path", type=str)
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Escribe por lotes con bulk_create y confirma cada lote en su propia transacción",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Filas por lote en modo --bulk (por defecto: {DEFAULT_BATCH_SIZE})",
+        )
 
-    @transaction.atomic
     def handle(self, *args, **opts):
         ds = opts["dataset"]
         path = Path(opts["csv_path"])
         if not path.exists():
             raise CommandError(f"No existe {path}")
+        if ds not in DATASETS:
+            raise CommandError("Dataset no soportado: usa assumptions | revenue_drivers | expenses | debt_instruments")
+        model, build, with_period = DATASETS[ds]
 
-        with path.open(newline="", encoding="utf-8-sig") as f:
-            r = csv.DictReader(f)
-            if ds == "assumptions":
-                for row in r:
-                    company, _ = Company.objects.get_or_create(name=row["company"])
-                    scenario, _ = Scenario.objects.get_or_create(company=company, name=row["scenario"])
-                    period = get_period(row["period"])
-                    Assumption.objects.update_or_create(
-                        company=company, scenario=scenario, period=period, key=row["key"],
-                        defaults=dict(value=float(row["value"]), unit=row.get("unit","ratio"), notes=row.get("notes",""))
-                    )
-            elif ds == "revenue_drivers":
-                for row in r:
-                    company, _ = Company.objects.get_or_create(name=row["company"])
-                    scenario, _ = Scenario.objects.get_or_create(company=company, name=row["scenario"])
-                    period = get_period(row["period"])
-                    RevenueDriver.objects.create(
-                        company=company, scenario=scenario, period=period,
-                        product=row.get("product") or "General",
-                        price=float(row["price"]), units=float(row["units"]),
-                        currency=row.get("currency","USD"), notes=row.get("notes","")
-                    )
-            elif ds == "expenses":
-                for row in r:
-                    company, _ = Company.objects.get_or_create(name=row["company"])
-                    scenario, _ = Scenario.objects.get_or_create(company=company, name=row["scenario"])
-                    period = get_period(row["period"])
-                    ExpenseProjection.objects.create(
-                        company=company, scenario=scenario, period=period,
-                        line_item_code=row["line_item_code"], line_item_name=row["line_item_name"],
-                        driver_type=row["driver_type"], value=float(row["value"]),
-                        currency=row.get("currency","USD"), notes=row.get("notes","")
-                    )
-            elif ds == "debt_instruments":
-                for row in r:
-                    company, _ = Company.objects.get_or_create(name=row["company"])
-                    DebtInstrument.objects.create(
-                        company=company, name=row["name"], principal=float(row["principal"]),
-                        rate_annual=float(row["rate_annual"]), term_months=int(row["term_months"]),
-                        start_date=row["start_date"], payment_frequency=row.get("payment_frequency","monthly"),
-                        currency=row.get("currency","USD"), notes=row.get("notes","")
-                    )
-            else:
-                raise CommandError("Dataset no soportado: usa assumptions | revenue_drivers | expenses | debt_instruments")
+        if opts["bulk"]:
+            self._import_bulk(path, model, build, with_period, max(1, opts["batch_size"]))
+        else:
+            with transaction.atomic():
+                self._import_rows(path, build, with_period)
 
         self.stdout.write(self.style.SUCCESS(f"Importación '{ds}' OK desde {path}"))
 
+    def _import_rows(self, path, build, with_period):
+        resolver = DimensionResolver()
+        with path.open(newline="", encoding="utf-8-sig") as f:
+            # Una resolución de dimensiones por bloque; las filas solo buscan en memoria
+            for rows in chunked(csv.DictReader(f)):
+                for row, ids in zip(rows, resolve_rows(resolver, rows, with_period)):
+                    save_row(build(row, *ids))
+
+    def _import_bulk(self, path, model, build, with_period, batch_size):
+        """
+        Cada lote (dimensiones + filas) se confirma por separado: un archivo
+        grande no mantiene una única transacción abierta. Si un lote falla,
+        los anteriores quedan escritos.
+        """
+        resolver = DimensionResolver()
+        started = time.perf_counter()
+        total = 0
+        with path.open(newline="", encoding="utf-8-sig") as f:
+            for rows in chunked(csv.DictReader(f), batch_size):
+                with transaction.atomic():
+                    ids = resolve_rows(resolver, rows, with_period)
+                    save_batch(model, [build(row, *i) for row, i in zip(rows, ids)])
+                total += len(rows)
+                elapsed = time.perf_counter() - started
+                rate = total / elapsed if elapsed else 0
+                self.stdout.write(f"  {total} filas ({rate:,.0f} filas/s)")
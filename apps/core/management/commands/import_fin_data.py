@@ -1,15 +1,27 @@
 # apps/core/management/import_fin_data.py
 
-import re
-from decimal import Decimal
 from pathlib import Path
-import csv
 
-import pandas as pd
+import time
+
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
-from django.apps import apps
-from django.db import connection, IntegrityError, transaction, models
+from django.db import connection, transaction
+
+from apps.core.readers import (
+    chunked, count_data_lines, iter_table_rows, sample_rows, scan_csv_frame, sniff_header, DEFAULT_CHUNK_SIZE,
+)
+from apps.core.interchange import template_path
+from apps.core.loaders import FactBatchWriter, DEFAULT_BATCH_SIZE
+from apps.core.parallel import (
+    PartitionSpiller, run_partitions, spill_dir, default_workers, usable_workers,
+    label_partitions, partition_reporter,
+)
+from apps.core.resolvers import DimensionResolver
+from apps.core.checkpoints import ImportCheckpoint
+from apps.core.classifier import ACCOUNT_CODE_RULES
+from apps.core.aggregates import refresh_aggregates, refresh_all_aggregates
+from apps.core.validation import RejectWriter, sample_type_errors, validate_facts
 
 
 REQUIRED_SCHEMAS = {
@@ -26,200 +38,187 @@ REQUIRED_SCHEMAS = {
     "projections_input.csv": ["company_code", "year", "driver_code", "driver_name", "assumption", "value", "note"],
 }
 
+# Tipos que se revisan en la muestra de --sample (los vacíos se aceptan)
+SAMPLE_TYPES = {
+    "companies.csv": {"is_active": "bool"},
+    "accounts.csv": {"level": "int", "is_leaf": "bool"},
+    "cost_centers.csv": {"level": "int", "is_active": "bool"},
+    "periods.csv": {
+        "period_code": "period", "year": "int", "month": "int",
+        "start_date": "date", "end_date": "date", "is_open": "bool",
+    },
+    "facts_finance.csv": {"period_code": "period", "amount": "decimal"},
+    "kpi_targets.csv": {
+        "period_code": "period", "target_value": "decimal", "lower_bound": "decimal", "upper_bound": "decimal",
+    },
+    "projections_input.csv": {"year": "int", "value": "decimal"},
+}
+SAMPLE_ERRORS_SHOWN = 5
+
 
 # --- util lectura csv ---------------------------------------------------------
 
-def read_csv(path: Path) -> pd.DataFrame:
+def scan_csv(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> tuple[list[str], int]:
+    """Columnas y número de filas leyendo por bloques (memoria acotada)."""
     try:
-        return pd.read_csv(path, encoding="utf-8-sig")
-    except UnicodeDecodeError:
-        return pd.read_csv(path, encoding="latin-1")
+        return scan_csv_frame(path, chunk_size)
     except Exception as e:
         raise CommandError(f"Error leyendo {path.name}: {e}")
 
 
-# --- helpers ORM seguros ------------------------------------------------------
-
-def has_field(model, name: str) -> bool:
-    return any(f.name == name for f in model._meta.get_fields() if isinstance(f, models.Field))
-
-
-def set_if_exists(obj, **field_values):
-    for k, v in field_values.items():
-        if has_field(obj.__class__, k):
-            setattr(obj, k, v)
-
+def sniff_csv(path: Path) -> tuple[list[str], int]:
+    """Como scan_csv pero solo con la cabecera y un conteo de líneas (--fast)."""
+    try:
+        return sniff_header(path), count_data_lines(path)
+    except Exception as e:
+        raise CommandError(f"Error leyendo {path.name}: {e}")
 
-def parse_period_code(code: str) -> tuple[int, int]:
-    """
-    Acepta formatos:
-      - '202401', '2024-01', '2024/01', '2024_01', '2024 01'
-    """
-    if not code:
-        raise ValueError("period_code vacío")
-    m = re.search(r"(\d{4})\D?(\d{1,2})", str(code))
-    if not m:
-        raise ValueError(f"period_code inválido: {code!r}")
-    y = int(m.group(1)); mth = int(m.group(2))
-    if not (1 <= mth <= 12):
-        raise ValueError(f"Mes inválido en period_code: {code!r}")
-    return y, mth
-
-
-# --- ensure_* (crean o devuelven) --------------------------------------------
-
-def ensure_company(company_code: str):
-    Company = apps.get_model("core", "Company")
-    obj = Company.objects.filter(name=company_code).first()  # usamos 'name' como llave natural
-    if obj:
-        return obj
-    obj = Company()
-    set_if_exists(obj, name=company_code, code=company_code, is_active=True)
-    obj.save()
-    return obj
-
-
-def ensure_period(period_code: str):
-    Period = apps.get_model("core", "Period")
-    year, month = parse_period_code(period_code)
-    obj, _ = Period.objects.get_or_create(year=year, month=month)
-    return obj
-
-
-def ensure_scenario(scenario_code: str, company):
-    """
-    En tu modelo Scenario ya vimos que suele llevar company y name.
-    Creamos por (company, name).
-    """
-    Scenario = apps.get_model("core", "Scenario")
-    obj, _ = Scenario.objects.get_or_create(company=company, name=scenario_code)
-    return obj
 
+# --- account type helpers -----------------------------------------------------
 
-def ensure_cost_center(center_code: str):
-    """Si tu FactFinance no usa centro, igual lo creamos por si más adelante hace falta."""
-    CostCenter = apps.get_model("core", "CostCenter")
-    obj = CostCenter.objects.filter(name=center_code).first()
-    if obj:
-        return obj
-    obj = CostCenter()
-    set_if_exists(obj, name=center_code, code=center_code, level=1, is_active=True)
-    obj.save()
-    return obj
+# Si más adelante usas otro mapeo, ajusta apps.core.classifier.ACCOUNT_CODE_RULES
+def guess_account_type(account_code: str) -> str:
+    return ACCOUNT_CODE_RULES.classify(account_code)
 
 
-# --- account type helpers -----------------------------------------------------
+# --- resolución de filas de hechos ------------------------------------------
 
-# Si más adelante usas otro mapeo, ajusta aquí
-def guess_account_type(account_code: str) -> str:
-    n = (account_code or "").lower()
-    if "ven" in n or "rev" in n:  # ventas / revenue
-        return "REVENUE"
-    if "cog" in n or "cost" in n or "compra" in n:
-        return "COGS"
-    if "depr" in n or "amort" in n:
-        return "DEPR"
-    if "fin" in n or "int" in n:
-        return "FIN"
-    if "tax" in n or "imp" in n:
-        return "TAX"
-    return "OPEX"
-
-
-def ensure_account(account_code: str, acc_type: str):
+def resolve_facts(resolver, valid):
     """
-    Evita el problema de NOT NULL en core_account.level:
-    - Si existe por ORM, usamos y rellenamos account_type si falta.
-    - Si NO existe, insertamos por SQL crudo con 'level'=1 y luego traemos la instancia por ORM.
+    Resuelve filas ya validadas (ver apps.core.validation.validate_facts) a
+    tuplas (company_id, account_id, scenario_id, period_id, center_id, amount).
+    Las dimensiones que faltan se crean de una vez para todo el bloque.
     """
-    Account = apps.get_model("core", "Account")
-
-    # ¿ya existe?
-    a = Account.objects.filter(name=account_code).first()
-    if a:
-        if not getattr(a, "account_type", None):
-            a.account_type = acc_type
-            a.save(update_fields=["account_type"])
-        return a
-
-    # crear con SQL para evitar constraints ocultas (p.ej. 'level' NOT NULL)
-    with connection.cursor() as cur:
-        # Usamos INSERT OR IGNORE para que sea idempotente
-        try:
-            cur.execute(
-                "INSERT OR IGNORE INTO core_account (name, account_type, level) VALUES (?,?,?)",
-                [account_code, acc_type, 1],
-            )
-        except Exception:
-            # Si tu tabla NO tiene 'level', probamos sin esa columna
-            cur.execute(
-                "INSERT OR IGNORE INTO core_account (name, account_type) VALUES (?,?)",
-                [account_code, acc_type],
-            )
-        # Recuperar id
-        cur.execute("SELECT id FROM core_account WHERE name = ?", [account_code])
-        acc_id = cur.fetchone()[0]
+    resolver.ensure_companies({(p[0], p[0]) for p in valid})
+    resolver.ensure_periods({p[1] for p in valid})
+    resolver.ensure_accounts({(p[2], p[2], guess_account_type(p[2])) for p in valid})
+    resolver.ensure_centers({(p[3], p[3]) for p in valid if p[3]})
+    company_ids = [resolver.company_id(p[0], p[0]) for p in valid]
+    resolver.ensure_scenarios({(cid, p[4]) for cid, p in zip(company_ids, valid)})
+    for company_id, (_, period, account_code, center_code, scenario_code, amt) in zip(company_ids, valid):
+        yield (
+            company_id,
+            resolver.accounts[account_code],
+            resolver.scenarios[(company_id, scenario_code)],
+            resolver.periods[period],
+            resolver.centers[center_code] if center_code else None,
+            amt,
+        )
 
-    return Account.objects.get(pk=acc_id)
+
+def validate_facts_file(fpath: Path, rejects: RejectWriter, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Pasada de validación sin BD (--dry-run): escribe los rechazos y devuelve cuántas filas leyó."""
+    rows = 0
+    for chunk in chunked(iter_table_rows(fpath, chunk_size), chunk_size):
+        _, rejected = validate_facts(chunk, rows + 1)
+        rejects.write(rejected)
+        rows += len(chunk)
+    return rows
 
 
 # --- importador de facts_finance.csv -----------------------------------------
 
-def import_facts(base_dir: Path, stdout, stderr):
+def import_facts(base_dir: Path, stdout, stderr, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 batch_size: int = DEFAULT_BATCH_SIZE, workers: int = 0, resume: bool = False,
+                 reject_path: Path = None):
     """
     Lee import_data/templates/facts_finance.csv y escribe en core_factfinance:
-      - company: por company_code (se usa como 'name')
+      - company: por company_code (code; si no coincide, name)
       - period: por period_code -> (year, month)
-      - account: por account_code (se usa como 'name'), con guess de account_type
+      - account: por account_code, con guess de account_type al crearla
+      - center: por center_code (opcional)
       - scenario: por scenario_code (name) ligado a company
+    Las dimensiones se resuelven con DimensionResolver y los hechos se escriben
+    con upsert por lotes. El archivo se procesa en bloques de `chunk_size` filas;
+    cada bloque se valida antes de cargarlo y las filas inválidas se escriben
+    en `reject_path` (por defecto <base_dir>/facts_finance_rejects.csv).
+    Con `workers` > 0 los hechos se reparten por (company, period) y cada
+    partición se carga en su propia transacción (ver apps.core.parallel).
+    En serie, cada bloque se confirma con su checkpoint en ImportJob y
+    `resume` continúa tras el último bloque confirmado (ver apps.core.checkpoints).
+    Al final se recalculan los agregados de las particiones tocadas
+    (ver apps.core.aggregates).
     """
-    Fact = apps.get_model("core", "FactFinance")
-    fpath = base_dir / "facts_finance.csv"
+    fpath = template_path(base_dir, "facts_finance")
     if not fpath.exists():
         stdout.write("No se encontró facts_finance.csv; nada que importar en hechos.")
         return {"rows": 0, "ins": 0, "upd": 0, "err": 0}
 
-    rows = ins = upd = err = 0
-
-    # abrimos tolerando BOM
-    with open(fpath, "r", encoding="utf-8-sig", newline="") as f:
-        reader = csv.DictReader(f)
-        with transaction.atomic():
-            for row in reader:
-                rows += 1
-                try:
-                    company_code = (row.get("company_code") or "").strip()
-                    period_code = (row.get("period_code") or "").strip()
-                    account_code = (row.get("account_code") or "").strip()
-                    scenario_code = (row.get("scenario_code") or "").strip()
-                    amount_raw = row.get("amount")
-
-                    if not (company_code and period_code and account_code and scenario_code):
-                        raise ValueError("Faltan campos obligatorios en la fila")
-
-                    c = ensure_company(company_code)
-                    p = ensure_period(period_code)
-                    s = ensure_scenario(scenario_code, c)
-
-                    acc_type = guess_account_type(account_code)
-                    a = ensure_account(account_code, acc_type)
-
-                    amt = Decimal(str(amount_raw).replace(",", "").strip())
-
-                    obj, created = Fact.objects.update_or_create(
-                        company=c, scenario=s, period=p, account=a,
-                        defaults={"amount": amt},
-                    )
-                    if created:
-                        ins += 1
-                    else:
-                        upd += 1
-                except Exception as e:
-                    err += 1
-                    stderr.write(f"Fila {rows} ERROR -> {e}")
-
-    stdout.write(f"RESUMEN → filas:{rows}, insertadas:{ins}, actualizadas:{upd}, errores:{err}")
-    return {"rows": rows, "ins": ins, "upd": upd, "err": err}
+    counters = {"created": 0, "updated": 0, "skipped": 0, "err": 0}
+    rows = 0
+    touched = set()  # particiones (company, scenario, period) para refrescar los agregados
+    reject_path = Path(reject_path or base_dir / "facts_finance_rejects.csv")
+
+    # .csv (tolerando BOM) o .parquet con valores tipados
+    reader = iter_table_rows(fpath, chunk_size)
+    if workers:
+        workers = usable_workers(workers)
+        with spill_dir() as workdir:
+            spiller = PartitionSpiller(workdir)
+            rejects = RejectWriter(reject_path)
+            with transaction.atomic():
+                resolver = DimensionResolver()
+                for chunk in chunked(reader, chunk_size):
+                    valid, rejected = validate_facts(chunk, rows + 1)
+                    for fact in resolve_facts(resolver, valid):
+                        spiller.add((fact[0], fact[3]), *fact)
+                        touched.add((fact[0], fact[2], fact[3]))
+                    rejects.write(rejected)
+                    counters["err"] += len(rejected)
+                    rows += len(chunk)
+            label_partitions(spiller)
+            stdout.write(f"Particiones: {len(spiller.paths)} ({workers} procesos)")
+            run_partitions(spiller, counters, workers, batch_size, partition_reporter(stdout))
+        aggregates = refresh_aggregates(touched)
+    else:
+        checkpoint = ImportCheckpoint("import_fin_data", fpath, resume)
+        if checkpoint.stale:
+            stdout.write("El archivo cambió desde la importación interrumpida: se importa desde el inicio.")
+        if checkpoint.resumed:
+            checkpoint.restore(counters)
+            rows = checkpoint.start_row
+            stdout.write(f"Reanudando job {checkpoint.job.pk} desde la fila {rows + 1}.")
+        rejects = RejectWriter(reject_path, append=checkpoint.resumed)
+        resolver = DimensionResolver()
+        writer = FactBatchWriter(counters, batch_size)
+        try:
+            for chunk in chunked(checkpoint.pending(reader), chunk_size):
+                valid, rejected = validate_facts(chunk, rows + 1)
+                with transaction.atomic():
+                    for fact in resolve_facts(resolver, valid):
+                        writer.add(*fact)
+                        touched.add((fact[0], fact[2], fact[3]))
+                    writer.flush()
+                    counters["err"] += len(rejected)
+                    checkpoint.commit(len(chunk), counters)
+                # tras confirmar el bloque: al reanudar no se repiten sus rechazos
+                rejects.write(rejected)
+                rows += len(chunk)
+            # Una carga reanudada no sabe qué particiones tocó el tramo anterior
+            aggregates = refresh_all_aggregates() if checkpoint.resumed else refresh_aggregates(touched)
+        except BaseException as e:
+            checkpoint.failed(e)
+            raise
+        checkpoint.done(counters)
+
+    stdout.write(
+        f"Agregados: {aggregates['partitions']} particiones recalculadas "
+        f"({aggregates['monthly']} filas mensuales, {aggregates['yearly']} anuales)"
+    )
+    if counters["err"]:
+        stderr.write(f"Filas rechazadas: {counters['err']} → {reject_path}")
+
+    summary = {
+        "rows": rows,
+        "ins": counters["created"],
+        "upd": counters["updated"] + counters["skipped"],
+        "err": counters["err"],
+    }
+    stdout.write(
+        f"RESUMEN → filas:{rows}, insertadas:{summary['ins']}, "
+        f"actualizadas:{summary['upd']}, errores:{summary['err']}"
+    )
+    return summary
 
 
 # --- management command -------------------------------------------------------
@@ -236,7 +235,47 @@ class Command(BaseCommand):
         parser.add_argument(
             "--dry-run",
             action="store_true",
-            help="Solo valida estructura y muestra conteos; no escribe en BD",
+            help="Solo valida estructura y hechos (escribe el CSV de rechazos) y muestra conteos; no escribe en BD",
+        )
+        parser.add_argument(
+            "--fast",
+            action="store_true",
+            help="Validación rápida: solo cabeceras y conteo de líneas, sin parsear los archivos "
+                 "(con --dry-run omite además la pasada completa de hechos)",
+        )
+        parser.add_argument(
+            "--sample",
+            type=int,
+            default=0,
+            help="Revisa los tipos de N filas tomadas al azar de cada archivo (por defecto: 0, sin muestra)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f"Filas por bloque al validar e importar (por defecto: {DEFAULT_CHUNK_SIZE})",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Hechos por lote de escritura (por defecto: {DEFAULT_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=0,
+            help="Carga paralela de hechos por (company, period) con N procesos (0 = desactivado, <0 = CPUs)",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continúa la última importación interrumpida del mismo archivo desde su último checkpoint",
+        )
+        parser.add_argument(
+            "--reject-file",
+            default=None,
+            help="CSV para las filas de hechos inválidas (por defecto: <base-dir>/facts_finance_rejects.csv)",
         )
 
     def handle(self, *args, **opts):
@@ -251,17 +290,25 @@ class Command(BaseCommand):
 
         # 1) Validación de estructura (todos los archivos requeridos y columnas)
         for fname, required_cols in REQUIRED_SCHEMAS.items():
-            fpath = base_dir / fname
+            fpath = template_path(base_dir, Path(fname).stem)
             if not fpath.exists():
                 problems.append(f"Falta archivo: {fname}")
                 continue
-            df = read_csv(fpath)
-            cols = list(map(str, df.columns))
+            t0 = time.perf_counter()
+            cols, n_rows = sniff_csv(fpath) if opts["fast"] else scan_csv(fpath, opts["chunk_size"])
             missing = [c for c in required_cols if c not in cols]
             if missing:
                 problems.append(f"{fname}: faltan columnas {missing} | columnas encontradas={cols}")
-            self.stdout.write(f"✔ {fname:22s} filas={len(df):6d} cols={len(cols):2d}")
-            total_rows += len(df)
+            type_errors = []
+            if opts["sample"] > 0 and n_rows:
+                type_errors = sample_type_errors(sample_rows(fpath, opts["sample"]), SAMPLE_TYPES.get(fname, {}))
+                problems.extend(f"{fname}: {e}" for e in type_errors[:SAMPLE_ERRORS_SHOWN])
+                if len(type_errors) > SAMPLE_ERRORS_SHOWN:
+                    problems.append(f"{fname}: … y {len(type_errors) - SAMPLE_ERRORS_SHOWN} errores más en la muestra")
+            elapsed = (time.perf_counter() - t0) * 1000
+            mark = "✘" if missing or type_errors else "✔"
+            self.stdout.write(f"{mark} {fname:22s} filas={n_rows:6d} cols={len(cols):2d} {elapsed:8.1f} ms")
+            total_rows += n_rows
 
         if problems:
             self.stdout.write("")
@@ -275,13 +322,36 @@ class Command(BaseCommand):
             )
         )
 
+        reject_path = Path(opts["reject_file"] or base_dir / "facts_finance_rejects.csv")
+
+        if opts["dry_run"] and opts["fast"]:
+            self.stdout.write(self.style.WARNING("DRY-RUN --fast: no se validaron los hechos fila a fila ni se escribieron datos."))
+            return
         if opts["dry_run"]:
+            rejects = RejectWriter(reject_path)
+            n_rows = validate_facts_file(template_path(base_dir, "facts_finance"), rejects, opts["chunk_size"])
+            self.stdout.write(f"Hechos validados: {n_rows} filas, {rejects.count} rechazadas.")
+            if rejects.count:
+                self.stdout.write(self.style.WARNING(f"Rechazos en {reject_path}"))
             self.stdout.write(self.style.WARNING("DRY-RUN activado: no se escribieron datos."))
             return
 
         # 2) Importación real (por fases; de momento, hechos financieros)
         self.stdout.write(self.style.HTTP_INFO("\nImportando hechos financieros (facts_finance.csv)..."))
-        summary = import_facts(base_dir, self.stdout, self.stderr)
+        workers = opts["workers"]
+        if workers < 0:
+            workers = default_workers()
+        if workers and opts["resume"]:
+            raise CommandError("--resume no es compatible con --workers (las particiones no llevan checkpoint).")
+        if workers and usable_workers(workers) != workers:
+            self.stdout.write(self.style.WARNING(
+                f"La base de datos ({connection.vendor}) no admite escrituras concurrentes: "
+                f"particiones en serie en lugar de {workers} procesos."
+            ))
+        summary = import_facts(
+            base_dir, self.stdout, self.stderr, opts["chunk_size"], opts["batch_size"], workers, opts["resume"],
+            reject_path,
+        )
 
         self.stdout.write(self.style.SUCCESS("\nImportación finalizada."))
         self.stdout.write(f"Hechos → {summary}")
@@ -1,10 +1,19 @@
 import re
 import json
+import time
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
+import numpy as np
 import pandas as pd
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.interchange import FORMATS, parquet_available, write_table
+from apps.core.parallel import default_workers
+from apps.core.readers import read_xlsx_sheet, xlsx_sheet_names
 
 # ===================== Utilidades =====================
 
@@ -87,6 +96,27 @@ def build_period_code(row: dict, period_col: str | None, default_period: str) ->
             pass
     return default_period
 
+# ---- Versiones por columna (vectorizadas) ----
+
+def map_unique(values: pd.Series, func) -> pd.Series:
+    """Aplica `func` una sola vez por valor distinto y reparte el resultado (factorize + take)."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    mapped = np.empty(len(uniques), dtype=object)
+    mapped[:] = [func(u) for u in uniques]
+    return pd.Series(mapped[codes], index=values.index)
+
+def text_or_default(values: pd.Series, default: str) -> pd.Series:
+    """Equivale a str(v or default).strip() elemento a elemento."""
+    return map_unique(values, lambda v: str(v or default).strip())
+
+def slugify_series(values: pd.Series) -> pd.Series:
+    """slugify() sobre una columna completa (una llamada por valor distinto)."""
+    return map_unique(values, slugify)
+
+def build_period_codes(values: pd.Series, period_col: str, default_period: str) -> pd.Series:
+    """build_period_code() sobre una columna: se parsea cada valor distinto una vez."""
+    return map_unique(values, lambda v: build_period_code({period_col: v}, period_col, default_period))
+
 def choose_header_row(df: pd.DataFrame, max_scan: int = 10) -> int | None:
     n = min(max_scan, len(df))
     best_row, best_score = None, -1
@@ -202,6 +232,303 @@ def detect_month_columns(df: pd.DataFrame, default_year: int | None):
         return mapping
     return {}
 
+# ===================== Layout inferido (con caché) =====================
+
+LAYOUT_VERSION = 1      # subir si cambia la heurística de inferencia
+LAYOUT_SCAN_ROWS = 10   # filas crudas que entran en la huella (ventana de choose_header_row)
+
+def default_year(cfg: dict) -> int:
+    d = cfg.get("defaults", {})
+    return d.get("year") or int(d.get("period", "2025-01").split("-")[0])
+
+def layout_cache_path(map_file: Path) -> Path:
+    """La caché vive junto al mapping: mapping.json → mapping.layout_cache.json."""
+    return map_file.with_name(f"{map_file.stem}.layout_cache.json")
+
+def load_layout_cache(path: Path) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != LAYOUT_VERSION:
+        return {}
+    return data.get("sources", {})
+
+def save_layout_cache(path: Path, sources: dict):
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"version": LAYOUT_VERSION, "sources": sources}, fh, ensure_ascii=False, indent=1)
+
+def layout_fingerprint(raw: pd.DataFrame, cfg: dict) -> str:
+    """
+    Huella de las primeras filas crudas (cabecera y posible segunda fila de
+    meses), del número de columnas y de la config de la fuente.
+    """
+    head = raw.head(LAYOUT_SCAN_ROWS).astype(str).values.tolist()
+    payload = json.dumps([raw.shape[1], head, cfg], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def frame_with_header(raw: pd.DataFrame, hdr_idx: int | None) -> pd.DataFrame:
+    """Usa la fila `hdr_idx` (o la primera) como cabecera y devuelve los datos que siguen."""
+    row = hdr_idx if hdr_idx is not None else 0
+    header = [str(x).strip() for x in raw.iloc[row].tolist()]
+    df = raw.iloc[row + 1:].reset_index(drop=True)
+    df.columns = normalize_headers(header)
+    return df
+
+def infer_layout(raw: pd.DataFrame, cfg: dict) -> dict:
+    """
+    Infiere la estructura de un archivo crudo: fila de cabecera, roles de
+    columna (guess_columns), columnas mensuales y si los meses vienen en una
+    segunda fila de cabecera. Es la parte cara; el resultado es serializable.
+    """
+    hdr_idx = choose_header_row(raw)
+    df = frame_with_header(raw, hdr_idx)
+    def_year = default_year(cfg)
+
+    # Caso header en DOS filas (meses en la fila siguiente)
+    # Si hay varias col_* al final y la siguiente fila parece tener meses → usamos esos tokens.
+    resolved_hint = {}
+    if len(df) > 0 and any(c.startswith("col_") for c in df.columns):
+        next_tokens = [str(x).strip() for x in df.iloc[0].tolist()]
+        for col, tok in zip(df.columns, next_tokens):
+            if col.startswith("col_"):
+                p = period_from_header(tok, def_year)
+                if p:
+                    resolved_hint[col] = p
+        if len(resolved_hint) < 6:
+            resolved_hint = {}
+
+    if cfg.get("rename"):
+        df = df.rename(columns=cfg["rename"])
+
+    auto_months = detect_month_columns(df, def_year)
+    month_cols = auto_months or resolved_hint
+    return {
+        "header_row": hdr_idx,
+        "columns": guess_columns(df),
+        "month_columns": month_cols,
+        # Si los tokens de meses venían en la 2ª fila del header, esa fila se descarta
+        "two_row_header": bool(month_cols and resolved_hint),
+    }
+
+def apply_layout(raw: pd.DataFrame, layout: dict, cfg: dict) -> pd.DataFrame:
+    df = frame_with_header(raw, layout["header_row"])
+    if cfg.get("rename"):
+        df = df.rename(columns=cfg["rename"])
+    return df
+
+def load_raw(location) -> pd.DataFrame:
+    """Carga una fuente cruda sin asumir encabezado: ("csv", ruta) o ("xlsx", ruta, hoja)."""
+    if location[0] == "xlsx":
+        return read_xlsx_sheet(location[1], location[2])
+    try:
+        return pd.read_csv(location[1], encoding="utf-8-sig", header=None)
+    except UnicodeDecodeError:
+        return pd.read_csv(location[1], encoding="latin-1", header=None)
+
+def process_source(src_name: str, location, cfg: dict, cached_layout: dict | None = None) -> dict:
+    """
+    Procesa una fuente cruda completa (layout, unpivot y normalización). No toca
+    estado compartido ni escribe en consola, así que puede correr en otro
+    proceso: devuelve hechos, catálogos y mensajes para que el comando los
+    combine en el orden del mapping.
+    """
+    out = {
+        "src": src_name, "messages": [], "layout": None, "layout_hit": False, "layout_secs": 0.0,
+        "skipped_no_amount": 0, "rows": 0, "facts": None, "norm_secs": 0.0,
+        "companies": set(), "accounts": {}, "centers": set(), "scenarios": set(), "periods": set(),
+    }
+
+    def say(style, text):
+        out["messages"].append((style, text))
+
+    # 1) Cargar sin asumir encabezado
+    df = load_raw(location)
+
+    # 2) Layout: cabecera, roles de columna y meses (de caché si la huella coincide)
+    t0 = time.perf_counter()
+    fingerprint = layout_fingerprint(df, cfg)
+    if cached_layout and cached_layout.get("fingerprint") == fingerprint:
+        layout = cached_layout["layout"]
+        out["layout_hit"] = True
+    else:
+        layout = infer_layout(df, cfg)
+    out["layout"] = {"fingerprint": fingerprint, "layout": layout}
+    out["layout_secs"] = time.perf_counter() - t0
+
+    # 3) Cabecera y renombres declarados
+    hdr_idx = layout["header_row"]
+    df = apply_layout(df, layout, cfg)
+    if hdr_idx is not None:
+        say("WARNING", f"{src_name}: cabecera detectada en fila {hdr_idx+1}.")
+    else:
+        say("WARNING", f"{src_name}: cabecera forzada desde primera fila.")
+
+    # 4) Defaults & columnas base
+    guessed = layout["columns"]
+    m = cfg.get("columns", {})
+    d = cfg.get("defaults", {})
+    def_company  = d.get("company",  "MiEmpresa")
+    def_period   = d.get("period",   "2025-01")
+    def_account  = d.get("account",  "ingresos")
+    def_center   = d.get("center",   "")
+    def_scenario = d.get("scenario", "Base")
+    acc_type     = cfg.get("account_type", "OTHER")
+    scn_kind     = cfg.get("scenario_kind", "ACTUAL")
+    fixed_scn    = cfg.get("scenario_value")
+
+    company_col  = match_col(df, m.get("company",  "Empresa"))  or guessed.get("Empresa")
+    period_col   = match_col(df, m.get("period",   "Periodo"))  or guessed.get("Periodo")
+    account_col  = match_col(df, m.get("account",  "Cuenta"))   or guessed.get("Cuenta")
+    center_col   = match_col(df, m.get("center",   "Centro"))   or guessed.get("Centro")
+    amount_col   = match_col(df, m.get("amount",   "Monto"))    or guessed.get("Monto")
+    scenario_col = match_col(df, m.get("scenario", "Escenario"))or guessed.get("Escenario")
+
+    # 5) Columnas mensuales (wide) y unpivot
+    month_cols = layout["month_columns"]
+
+    if month_cols:
+        if layout["two_row_header"]:
+            df = df.iloc[1:].reset_index(drop=True)
+
+        id_vars = []
+        for col in [company_col, account_col, center_col, scenario_col, period_col]:
+            if col and col in df.columns:
+                id_vars.append(col)
+        value_vars = list(month_cols.keys())
+        tmp = df.melt(id_vars=id_vars, value_vars=value_vars,
+                      var_name="__monthcol", value_name="Monto")
+        tmp["Periodo"] = tmp["__monthcol"].map(month_cols)
+        tmp.drop(columns=["__monthcol"], inplace=True)
+        long_df = tmp
+        uniq_periods = sorted(set(month_cols.values()))
+        say("HTTP_INFO", f"{src_name}: columnas mensuales detectadas={len(value_vars)} → periodos únicos={len(uniq_periods)}")
+    else:
+        long_df = df.copy()
+        if amount_col is None:
+            out["skipped_no_amount"] = len(long_df)
+            return out
+
+    # 6) Normalización columnas destino
+    t0 = time.perf_counter()
+    long_df["Empresa"]   = long_df[company_col]  if company_col  in long_df.columns else def_company
+    long_df["Cuenta"]    = long_df[account_col]  if account_col  in long_df.columns else def_account
+    long_df["Centro"]    = long_df[center_col]   if center_col   in long_df.columns else def_center
+    scen_tmp             = long_df[scenario_col] if scenario_col in long_df.columns else pd.Series("", index=long_df.index)
+    long_df["Escenario"] = scen_tmp.fillna("").replace("", fixed_scn or def_scenario)
+
+    if "Monto" not in long_df.columns and amount_col:
+        long_df["Monto"] = long_df[amount_col]
+
+    if "Periodo" not in long_df.columns or long_df["Periodo"].isna().all():
+        if period_col:
+            long_df["Periodo"] = build_period_codes(long_df[period_col], period_col, def_period)
+        else:
+            long_df["Periodo"] = def_period
+
+    long_df["Monto"] = pd.to_numeric(
+        long_df["Monto"].astype(str).str.replace(",", ""), errors="coerce"
+    ).fillna(0.0)
+
+    # 7) Volcado a colecciones de salida (por columnas, sin iterrows)
+    defaults = {"company": def_company, "period": def_period, "account": def_account, "scenario": def_scenario}
+    out.update(emit_facts(long_df, defaults, acc_type, scn_kind))
+    out["rows"] = len(df)
+    out["norm_secs"] = time.perf_counter() - t0
+    return out
+
+# ---- Volcado a hechos y catálogos ----
+
+FACT_COLUMNS = ["company_code", "period_code", "account_code", "center_code", "scenario_code", "amount"]
+
+def _period_row(code: str) -> tuple:
+    if re.match(r"^\d{4}-\d{2}$", code):
+        y, mth = code.split("-")
+        return (code, int(y), int(mth), "", "", True)
+    return (code, None, None, "", "", True)
+
+def emit_facts(long_df: pd.DataFrame, defaults: dict, acc_type: str, scn_kind: str) -> dict:
+    """
+    Hechos y catálogos de un long_df normalizado (Empresa, Cuenta, Centro,
+    Escenario, Periodo y Monto numérico), por columnas: cada texto distinto
+    se convierte y se slugifica una sola vez. `defaults`: company, period,
+    account, scenario. Devuelve {"facts", "companies", "accounts", "centers",
+    "scenarios", "periods"}.
+    """
+    amount        = long_df["Monto"].astype(float)
+    amount        = amount.where(amount != 0, 0.0)  # float(x or 0): -0.0 → 0.0
+    period_code   = text_or_default(long_df["Periodo"], defaults["period"])
+    company_name  = text_or_default(long_df["Empresa"], defaults["company"])
+    account_name  = text_or_default(long_df["Cuenta"], defaults["account"])
+    center_name   = text_or_default(long_df["Centro"], "")
+    scenario_name = text_or_default(long_df["Escenario"], defaults["scenario"])
+
+    company_code  = slugify_series(company_name)
+    account_code  = slugify_series(account_name)
+    center_code   = slugify_series(center_name)
+    scenario_code = slugify_series(scenario_name)
+
+    acc_pairs = pd.DataFrame({"c": account_code, "n": account_name}).drop_duplicates("c", keep="last")
+    has_center = center_code != ""
+    return {
+        "companies": {
+            (code, name, "USD", True)
+            for code, name in pd.DataFrame({"c": company_code, "n": company_name}).drop_duplicates().itertuples(index=False)
+        },
+        "accounts": {code: (code, name, acc_type, "", 0, True) for code, name in acc_pairs.itertuples(index=False)},
+        "centers": {
+            (code, name, "", 0, True)
+            for code, name in pd.DataFrame({"c": center_code[has_center], "n": center_name[has_center]})
+            .drop_duplicates().itertuples(index=False)
+        },
+        "scenarios": {
+            (code, name, scn_kind)
+            for code, name in pd.DataFrame({"c": scenario_code, "n": scenario_name}).drop_duplicates().itertuples(index=False)
+        },
+        "periods": {_period_row(code) for code in pd.unique(period_code)},
+        "facts": pd.DataFrame({
+            "company_code": company_code.to_numpy(),
+            "period_code": period_code.to_numpy(),
+            "account_code": account_code.to_numpy(),
+            "center_code": center_code.to_numpy(),
+            "scenario_code": scenario_code.to_numpy(),
+            "amount": amount.to_numpy(),
+        }),
+    }
+
+def emit_facts_rowwise(long_df: pd.DataFrame, defaults: dict, acc_type: str, scn_kind: str) -> dict:
+    """
+    Versión fila a fila (iterrows) de emit_facts, la que usaba el comando
+    antes de vectorizarlo. Solo se conserva como referencia para
+    apps.core.bench.bench_normalization (mismo resultado, throughput de antes).
+    """
+    out = {"companies": set(), "accounts": {}, "centers": set(), "scenarios": set(), "periods": set()}
+    facts = []
+    for _, row in long_df.iterrows():
+        amount = float(row.get("Monto", 0) or 0)
+        period_code = str(row.get("Periodo") or defaults["period"]).strip()
+        company_name = str(row.get("Empresa") or defaults["company"]).strip()
+        account_name = str(row.get("Cuenta") or defaults["account"]).strip()
+        center_name  = str(row.get("Centro") or "").strip()
+        scenario_name= str(row.get("Escenario") or defaults["scenario"]).strip()
+
+        company_code  = slugify(company_name)
+        account_code  = slugify(account_name)
+        center_code   = slugify(center_name) if center_name else ""
+        scenario_code = slugify(scenario_name)
+
+        out["companies"].add((company_code, company_name, "USD", True))
+        out["accounts"][account_code] = (account_code, account_name, acc_type, "", 0, True)
+        if center_code:
+            out["centers"].add((center_code, center_name, "", 0, True))
+        out["scenarios"].add((scenario_code, scenario_name, scn_kind))
+        out["periods"].add(_period_row(period_code))
+
+        facts.append((company_code, period_code, account_code, center_code, scenario_code, amount))
+    out["facts"] = pd.DataFrame(facts, columns=FACT_COLUMNS)
+    return out
+
 # ===================== Comando =====================
 
 class Command(BaseCommand):
@@ -212,6 +539,15 @@ class Command(BaseCommand):
         parser.add_argument("--out-dir", default="import_data/templates", help="Carpeta de salida TEMPLATES")
         parser.add_argument("--map", default="import_data/mapping.json", help="Archivo JSON de mapeo")
         parser.add_argument("--dry-run", action="store_true", help="No escribe archivos, solo muestra conteos")
+        parser.add_argument("--format", choices=FORMATS, default="csv",
+                            help="Formato de salida: csv (por defecto) o parquet (tipado, requiere pyarrow)")
+        parser.add_argument("--xlsx", default="",
+                            help="Libro .xlsx cuyas hojas sustituyen a los CSV de --raw-dir "
+                                 "(hoja = nombre de la fuente sin extensión); se lee en modo streaming")
+        parser.add_argument("--workers", type=int, default=0,
+                            help="Procesa las fuentes en N procesos en paralelo (0 = en serie, <0 = CPUs)")
+        parser.add_argument("--no-layout-cache", action="store_true",
+                            help="Ignora la caché de layouts inferidos y vuelve a inferir todos los archivos")
 
     def handle(self, *args, **opts):
         base = Path(settings.BASE_DIR)
@@ -219,166 +555,86 @@ class Command(BaseCommand):
         out_dir = (base / opts["out_dir"]).resolve()
         map_file = (base / opts["map"]).resolve()
 
+        if opts["format"] == "parquet" and not parquet_available():
+            raise CommandError("--format parquet requiere pyarrow (pip install pyarrow).")
+
         with open(map_file, "r", encoding="utf-8") as fh:
             mapping_cfg = json.load(fh)
 
+        cache_file = layout_cache_path(map_file)
+        layout_cache = {} if opts["no_layout_cache"] else load_layout_cache(cache_file)
+        layout_hits = layout_misses = 0
+        layout_secs = 0.0
+
         companies, accounts, centers, scenarios = set(), {}, set(), set()
-        facts, periods_set = [], set()
+        fact_frames, periods_set = [], set()
+        n_facts = norm_rows = 0
+        norm_secs = 0.0
         skipped_no_amount = 0
 
+        # 1) Fuentes: hoja del libro --xlsx (si existe) o CSV de --raw-dir
+        sheets = {}
+        if opts["xlsx"]:
+            workbook = (base / opts["xlsx"]).resolve()
+            if not workbook.exists():
+                raise CommandError(f"No existe el libro: {workbook}")
+            sheets = {name.strip().lower(): name for name in xlsx_sheet_names(workbook)}
+
+        tasks = []
         for src_name, cfg in mapping_cfg.get("sources", {}).items():
-            fpath = raw_dir / src_name
-            if not fpath.exists():
-                self.stderr.write(self.style.WARNING(f"Saltando (no existe): {src_name}"))
-                continue
-
-            # 1) Cargar sin asumir encabezado
-            try:
-                df = pd.read_csv(fpath, encoding="utf-8-sig", header=None)
-            except UnicodeDecodeError:
-                df = pd.read_csv(fpath, encoding="latin-1", header=None)
-
-            # 2) Detectar encabezado
-            hdr_idx = choose_header_row(df)
-            if hdr_idx is not None:
-                header = [str(x).strip() for x in df.iloc[hdr_idx].tolist()]
-                df = df.iloc[hdr_idx + 1:].reset_index(drop=True)
-                df.columns = normalize_headers(header)
-                self.stdout.write(self.style.WARNING(f"{src_name}: cabecera detectada en fila {hdr_idx+1}."))
-            else:
-                header = [str(x).strip() for x in df.iloc[0].tolist()]
-                df = df.iloc[1:].reset_index(drop=True)
-                df.columns = normalize_headers(header)
-                self.stdout.write(self.style.WARNING(f"{src_name}: cabecera forzada desde primera fila."))
-
-            # 2b) Caso header en DOS filas (meses en la fila siguiente)
-            #     Si hay varias col_* al final y la siguiente fila parece tener meses → usamos esos tokens.
-            month_cols_hint = {}
-            if len(df) > 0 and any(c.startswith("col_") for c in df.columns):
-                next_tokens = [str(x).strip() for x in df.iloc[0].tolist()]
-                # pair columns with tokens
-                for col, tok in zip(df.columns, next_tokens):
-                    if col.startswith("col_"):
-                        # year por defecto lo obtendremos de defaults (def_year) más abajo
-                        month_cols_hint[col] = tok  # de momento guardamos el token
-                # aún no resolvemos a YYYY-MM; eso se hace tras leer defaults
-
-            # 3) Renombres declarados
-            if cfg.get("rename"):
-                df = df.rename(columns=cfg["rename"])
-
-            # 4) Defaults & columnas base
-            guessed = guess_columns(df)
-            m = cfg.get("columns", {})
-            d = cfg.get("defaults", {})
-            def_company  = d.get("company",  "MiEmpresa")
-            def_period   = d.get("period",   "2025-01")
-            def_account  = d.get("account",  "ingresos")
-            def_center   = d.get("center",   "")
-            def_scenario = d.get("scenario", "Base")
-            def_year     = d.get("year") or int(def_period.split("-")[0])
-            acc_type     = cfg.get("account_type", "OTHER")
-            scn_kind     = cfg.get("scenario_kind", "ACTUAL")
-            fixed_scn    = cfg.get("scenario_value")
-
-            company_col  = match_col(df, m.get("company",  "Empresa"))  or guessed.get("Empresa")
-            period_col   = match_col(df, m.get("period",   "Periodo"))  or guessed.get("Periodo")
-            account_col  = match_col(df, m.get("account",  "Cuenta"))   or guessed.get("Cuenta")
-            center_col   = match_col(df, m.get("center",   "Centro"))   or guessed.get("Centro")
-            amount_col   = match_col(df, m.get("amount",   "Monto"))    or guessed.get("Monto")
-            scenario_col = match_col(df, m.get("scenario", "Escenario"))or guessed.get("Escenario")
-
-            # 5) Detección de columnas mensuales (wide) y unpivot
-            #    Primero resolvemos 'month_cols_hint' usando el año por defecto si aplica.
-            resolved_hint = {}
-            if month_cols_hint:
-                for col, tok in month_cols_hint.items():
-                    p = period_from_header(tok, def_year)
-                    if p:
-                        resolved_hint[col] = p
-                if len(resolved_hint) < 6:
-                    resolved_hint = {}
-
-            #    Intento por encabezados simples:
-            auto_months = detect_month_columns(df, def_year)
-            month_cols = auto_months or resolved_hint
-
-            if month_cols:
-                # Si los tokens de meses venían en la 2ª fila del header, esa fila es cabecera de meses → dropearla
-                if resolved_hint:
-                    df = df.iloc[1:].reset_index(drop=True)
-
-                id_vars = []
-                for col in [company_col, account_col, center_col, scenario_col, period_col]:
-                    if col and col in df.columns:
-                        id_vars.append(col)
-                value_vars = list(month_cols.keys())
-                tmp = df.melt(id_vars=id_vars, value_vars=value_vars,
-                              var_name="__monthcol", value_name="Monto")
-                tmp["Periodo"] = tmp["__monthcol"].map(month_cols)
-                tmp.drop(columns=["__monthcol"], inplace=True)
-                long_df = tmp
-                uniq_periods = sorted(set(month_cols.values()))
-                self.stdout.write(self.style.HTTP_INFO(
-                    f"{src_name}: columnas mensuales detectadas={len(value_vars)} → periodos únicos={len(uniq_periods)}"
-                ))
+            sheet = sheets.get(src_name.lower()) or sheets.get(Path(src_name).stem.lower())
+            if sheet:
+                location = ("xlsx", str(workbook), sheet)
             else:
-                long_df = df.copy()
-                if amount_col is None:
-                    skipped_no_amount += len(long_df)
+                fpath = raw_dir / src_name
+                if not fpath.exists():
+                    self.stderr.write(self.style.WARNING(f"Saltando (no existe): {src_name}"))
                     continue
+                location = ("csv", str(fpath))
+            tasks.append((src_name, location, cfg, layout_cache.get(src_name)))
+
+        # 2-7) Cada fuente se procesa completa, en serie o en un pool de procesos;
+        #      los resultados se combinan en el orden del mapping
+        workers = opts["workers"]
+        if workers < 0:
+            workers = default_workers()
+        if workers > 1 and len(tasks) > 1:
+            ctx = multiprocessing.get_context("fork")
+            pool = ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=ctx)
+            results = pool.map(process_source, *zip(*tasks))
+        else:
+            pool = None
+            results = (process_source(*task) for task in tasks)
 
-            # 6) Normalización columnas destino
-            long_df["Empresa"]   = long_df[company_col]  if company_col  in long_df.columns else def_company
-            long_df["Cuenta"]    = long_df[account_col]  if account_col  in long_df.columns else def_account
-            long_df["Centro"]    = long_df[center_col]   if center_col   in long_df.columns else def_center
-            scen_tmp             = long_df[scenario_col] if scenario_col in long_df.columns else ""
-            long_df["Escenario"] = scen_tmp.fillna("").replace("", fixed_scn or def_scenario)
-
-            if "Monto" not in long_df.columns and amount_col:
-                long_df["Monto"] = long_df[amount_col]
-
-            if "Periodo" not in long_df.columns or long_df["Periodo"].isna().all():
-                if period_col:
-                    long_df["Periodo"] = long_df.apply(
-                        lambda r: build_period_code(r, period_col, def_period), axis=1
-                    )
-                else:
-                    long_df["Periodo"] = def_period
-
-            long_df["Monto"] = pd.to_numeric(
-                long_df["Monto"].astype(str).str.replace(",", ""), errors="coerce"
-            ).fillna(0.0)
-
-            # 7) Volcado a colecciones de salida
-            for _, row in long_df.iterrows():
-                amount = float(row.get("Monto", 0) or 0)
-                period_code = str(row.get("Periodo") or def_period).strip()
-                company_name = str(row.get("Empresa") or def_company).strip()
-                account_name = str(row.get("Cuenta") or def_account).strip()
-                center_name  = str(row.get("Centro") or "").strip()
-                scenario_name= str(row.get("Escenario") or def_scenario).strip()
-
-                company_code  = slugify(company_name)
-                account_code  = slugify(account_name)
-                center_code   = slugify(center_name) if center_name else ""
-                scenario_code = slugify(scenario_name)
-
-                companies.add((company_code, company_name, "USD", True))
-                accounts[account_code] = (account_code, account_name, cfg.get("account_type","OTHER"), "", 0, True)
-                if center_code:
-                    centers.add((center_code, center_name, "", 0, True))
-                scenarios.add((scenario_code, scenario_name, cfg.get("scenario_kind","ACTUAL")))
-
-                if re.match(r"^\d{4}-\d{2}$", period_code):
-                    y, m = period_code.split("-")
-                    periods_set.add((period_code, int(y), int(m), "", "", True))
+        try:
+            for res in results:
+                src_name = res["src"]
+                for style, text in res["messages"]:
+                    self.stdout.write(getattr(self.style, style)(text))
+                layout_cache[src_name] = res["layout"]
+                if res["layout_hit"]:
+                    layout_hits += 1
                 else:
-                    periods_set.add((period_code, None, None, "", "", True))
-
-                facts.append((company_code, period_code, account_code, center_code, scenario_code, amount))
+                    layout_misses += 1
+                layout_secs += res["layout_secs"]
+                skipped_no_amount += res["skipped_no_amount"]
+                if res["facts"] is None:
+                    continue
 
-            self.stdout.write(f"✔ {src_name}: filas={len(df)} → facts acumulados={len(facts)}")
+                companies |= res["companies"]
+                accounts.update(res["accounts"])
+                centers |= res["centers"]
+                scenarios |= res["scenarios"]
+                periods_set |= res["periods"]
+                fact_frames.append(res["facts"])
+                n_facts += len(res["facts"])
+                norm_rows += len(res["facts"])
+                norm_secs += res["norm_secs"]
+
+                self.stdout.write(f"✔ {src_name}: filas={res['rows']} → facts acumulados={n_facts}")
+        finally:
+            if pool is not None:
+                pool.shutdown()
 
         # 8) DataFrames salida
         df_companies = pd.DataFrame(list(companies), columns=["company_code","company_name","currency","is_active"]).sort_values("company_code")
@@ -386,26 +642,42 @@ class Command(BaseCommand):
         df_centers   = pd.DataFrame(list(centers), columns=["center_code","center_name","parent_code","level","is_active"]).sort_values("center_code")
         df_periods   = pd.DataFrame(list(periods_set), columns=["period_code","year","month","start_date","end_date","is_open"]).sort_values("period_code")
         df_scenarios = pd.DataFrame(list(scenarios), columns=["scenario_code","scenario_name","kind"]).sort_values("scenario_code")
-        df_facts     = pd.DataFrame(facts, columns=["company_code","period_code","account_code","center_code","scenario_code","amount"])
+        df_facts     = pd.concat(fact_frames, ignore_index=True) if fact_frames else pd.DataFrame([], columns=FACT_COLUMNS)
 
         self.stdout.write(self.style.HTTP_INFO(
             f"Generados: companies={len(df_companies)} accounts={len(df_accounts)} "
             f"centers={len(df_centers)} periods={len(df_periods)} "
             f"scenarios={len(df_scenarios)} facts={len(df_facts)}"
         ))
+        if norm_rows:
+            rate = norm_rows / norm_secs if norm_secs else 0
+            self.stdout.write(f"Normalización y volcado: {norm_rows} filas en {norm_secs:.3f}s ({rate:,.0f} filas/s)")
         if skipped_no_amount:
             self.stdout.write(self.style.WARNING(f"Filas saltadas por no detectar columna Monto: {skipped_no_amount}"))
 
+        self.stdout.write(
+            f"Layouts: {layout_hits} desde caché, {layout_misses} inferidos ({layout_secs:.3f}s)"
+        )
+
         if opts["dry_run"]:
             self.stdout.write(self.style.WARNING("DRY-RUN: no se escribieron archivos."))
             return
 
+        if layout_misses:
+            save_layout_cache(cache_file, layout_cache)
+
         out_dir.mkdir(parents=True, exist_ok=True)
-        df_companies.to_csv(out_dir / "companies.csv", index=False, encoding="utf-8-sig")
-        df_accounts.to_csv(out_dir / "accounts.csv", index=False, encoding="utf-8-sig")
-        df_centers.to_csv(out_dir / "cost_centers.csv", index=False, encoding="utf-8-sig")
-        df_periods.to_csv(out_dir / "periods.csv", index=False, encoding="utf-8-sig")
-        df_scenarios.to_csv(out_dir / "scenarios.csv", index=False, encoding="utf-8-sig")
-        df_facts.to_csv(out_dir / "facts_finance.csv", index=False, encoding="utf-8-sig")
-
-        self.stdout.write(self.style.SUCCESS(f"Escrito en {out_dir}"))
+        fmt = opts["format"]
+        outputs = [
+            (df_companies, "companies"),
+            (df_accounts, "accounts"),
+            (df_centers, "cost_centers"),
+            (df_periods, "periods"),
+            (df_scenarios, "scenarios"),
+            (df_facts, "facts_finance"),
+        ]
+        total_bytes = 0
+        for frame, stem in outputs:
+            total_bytes += write_table(frame, out_dir, stem, fmt).stat().st_size
+
+        self.stdout.write(self.style.SUCCESS(f"Escrito en {out_dir} ({fmt}, {total_bytes / 1024:,.0f} KiB)"))
@@ -0,0 +1,35 @@
+# apps/core/management/commands/reclassify_accounts.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.core.aggregates import refresh_yearly_aggregates
+from apps.core.catalogs import reclassify_accounts
+
+
+class Command(BaseCommand):
+    help = (
+        "Vuelve a clasificar las cuentas por nombre con las reglas de apps.core.classifier, "
+        "guarda la categoría en Account.group y recalcula el agregado anual (sus líneas salen del grupo)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Reclasifica también las cuentas con un grupo asignado a mano",
+        )
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        with transaction.atomic():
+            stats = reclassify_accounts(force=opts["force"])
+            yearly = refresh_yearly_aggregates() if stats["updated"] else None
+        self.stdout.write(
+            f"Cuentas revisadas: {stats['checked']}, actualizadas: {stats['updated']}, "
+            f"sin categoría: {stats['unmatched']}"
+        )
+        if yearly:
+            self.stdout.write(f"  aggregates: {yearly}")
+        self.stdout.write(self.style.SUCCESS(f"Reclasificación terminada en {time.perf_counter() - t0:.2f}s"))
@@ -0,0 +1,21 @@
+# apps/core/management/commands/refresh_aggregates.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.core.aggregates import refresh_all_aggregates
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye los agregados mensual y anual de FactFinance desde cero "
+        "(los importadores solo refrescan las particiones que tocan)."
+    )
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        stats = refresh_all_aggregates()
+        self.stdout.write(self.style.SUCCESS(
+            f"Agregados reconstruidos: {stats['partitions']} particiones, {stats['monthly']} filas mensuales, "
+            f"{stats['yearly']} anuales en {time.perf_counter() - t0:.2f}s"
+        ))
@@ -0,0 +1,157 @@
+# apps/core/manifest.py
+"""
+Importación incremental (delta) apoyada en un manifiesto persistido.
+
+- ImportManifest guarda la huella (SHA-256, tamaño, mtime) del último archivo
+  importado por ruta: si no cambió, el archivo se salta por completo.
+- ImportPartitionState guarda, por (company, scenario, period), un hash de las
+  filas de esa partición independiente del orden. Al reimportar solo se tocan
+  las particiones cuyo hash cambió y, dentro de ellas, solo los hechos
+  insertados, modificados o eliminados.
+"""
+import csv
+import hashlib
+from decimal import Decimal
+from pathlib import Path
+
+from django.db import transaction
+
+from apps.core.models import FactFinance, ImportManifest, ImportPartitionState
+
+CENTS = Decimal("0.01")
+_HASH_MOD = 1 << 128
+
+
+def file_fingerprint(path: Path, block_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def check_file(path: Path):
+    """
+    Devuelve (sin_cambios, manifest, fingerprint). Si tamaño y mtime coinciden
+    con el manifiesto no se recalcula el hash; en otro caso se compara el SHA-256.
+    """
+    path = Path(path).resolve()
+    manifest = ImportManifest.objects.filter(source=str(path)).first()
+    if not path.exists():
+        return False, manifest, None
+    st = path.stat()
+    if manifest and manifest.size == st.st_size and manifest.mtime == st.st_mtime:
+        return True, manifest, manifest.fingerprint
+    fingerprint = file_fingerprint(path)
+    return bool(manifest and manifest.fingerprint == fingerprint), manifest, fingerprint
+
+
+def record_file(path: Path, fingerprint: str) -> ImportManifest:
+    path = Path(path).resolve()
+    st = path.stat()
+    manifest, _ = ImportManifest.objects.update_or_create(
+        source=str(path),
+        defaults={"fingerprint": fingerprint, "size": st.st_size, "mtime": st.st_mtime},
+    )
+    return manifest
+
+
+def normalize_amount(amount) -> Decimal:
+    return Decimal(amount).quantize(CENTS)
+
+
+class PartitionHasher:
+    """Hash por partición que no depende del orden de las filas (suma de digests)."""
+
+    def __init__(self):
+        self.sums = {}
+        self.counts = {}
+
+    def add(self, key, account_id, center_id, amount):
+        row = f"{account_id}|{center_id or ''}|{normalize_amount(amount)}".encode()
+        value = int.from_bytes(hashlib.blake2b(row, digest_size=16).digest(), "big")
+        self.sums[key] = (self.sums.get(key, 0) + value) % _HASH_MOD
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def digest(self, key) -> str:
+        return f"{self.sums.get(key, 0):032x}"
+
+
+def partition_states(manifest) -> dict:
+    """{(company_id, scenario_id, period_id): (row_hash, row_count)} del último import."""
+    if manifest is None:
+        return {}
+    return {
+        (s.company_id, s.scenario_id, s.period_id): (s.row_hash, s.row_count)
+        for s in ImportPartitionState.objects.filter(manifest=manifest)
+    }
+
+
+def _read_spill(path):
+    facts = {}
+    with open(path, "r", encoding="utf-8", newline="") as fh:
+        for r in csv.DictReader(fh):
+            center_id = int(r["center_id"]) if r["center_id"] else None
+            facts[(int(r["account_id"]), center_id)] = normalize_amount(r["amount"])
+    return facts
+
+
+def apply_partition_delta(key, spill_path, counters):
+    """
+    Sincroniza una partición con las filas del archivo: inserta las nuevas,
+    actualiza los importes que cambiaron y elimina los hechos que ya no vienen.
+    """
+    company_id, scenario_id, period_id = key
+    incoming = _read_spill(spill_path)
+    current = {
+        (account_id, center_id): (pk, amount)
+        for pk, account_id, center_id, amount in FactFinance.objects.filter(
+            company_id=company_id, scenario_id=scenario_id, period_id=period_id
+        ).values_list("id", "account_id", "center_id", "amount")
+    }
+
+    creates, updates = [], []
+    for (account_id, center_id), amount in incoming.items():
+        found = current.pop((account_id, center_id), None)
+        if found is None:
+            creates.append(FactFinance(
+                company_id=company_id, scenario_id=scenario_id, period_id=period_id,
+                account_id=account_id, center_id=center_id, amount=amount,
+            ))
+        elif normalize_amount(found[1]) != amount:
+            updates.append(FactFinance(pk=found[0], amount=amount))
+        else:
+            counters["skipped"] += 1
+    stale = [pk for pk, _ in current.values()]
+
+    if creates:
+        FactFinance.objects.bulk_create(creates)
+    if updates:
+        FactFinance.objects.bulk_update(updates, ["amount"])
+    if stale:
+        FactFinance.objects.filter(pk__in=stale).delete()
+
+    counters["created"] += len(creates)
+    counters["updated"] += len(updates)
+    counters["deleted"] = counters.get("deleted", 0) + len(stale)
+
+
+@transaction.atomic
+def drop_partition(manifest, key, counters):
+    """Partición que el archivo ya no trae: se eliminan sus hechos y su estado."""
+    company_id, scenario_id, period_id = key
+    deleted, _ = FactFinance.objects.filter(
+        company_id=company_id, scenario_id=scenario_id, period_id=period_id
+    ).delete()
+    ImportPartitionState.objects.filter(
+        manifest=manifest, company_id=company_id, scenario_id=scenario_id, period_id=period_id
+    ).delete()
+    counters["deleted"] = counters.get("deleted", 0) + deleted
+
+
+def save_partition_state(manifest, key, row_hash, row_count):
+    company_id, scenario_id, period_id = key
+    ImportPartitionState.objects.update_or_create(
+        manifest=manifest, company_id=company_id, scenario_id=scenario_id, period_id=period_id,
+        defaults={"row_hash": row_hash, "row_count": row_count},
+    )
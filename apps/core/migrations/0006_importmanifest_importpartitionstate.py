@@ -0,0 +1,39 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "00XX_account_reporting_fields"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportManifest",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("source", models.CharField(help_text="Ruta del archivo importado", max_length=255, unique=True)),
+                ("fingerprint", models.CharField(help_text="SHA-256 del contenido", max_length=64)),
+                ("size", models.BigIntegerField(default=0)),
+                ("mtime", models.FloatField(default=0)),
+                ("imported_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ImportPartitionState",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("row_hash", models.CharField(max_length=32)),
+                ("row_count", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("company", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="core.company")),
+                ("manifest", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="partitions", to="core.importmanifest")),
+                ("period", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="core.period")),
+                ("scenario", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="core.scenario")),
+            ],
+            options={
+                "unique_together": {("manifest", "company", "scenario", "period")},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_importmanifest_importpartitionstate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportJob",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("command", models.CharField(help_text="Comando que ejecuta la importación", max_length=64)),
+                ("source", models.CharField(help_text="Ruta del archivo importado", max_length=255)),
+                ("fingerprint", models.CharField(help_text="SHA-256 del contenido", max_length=64)),
+                ("status", models.CharField(choices=[("running", "En curso"), ("failed", "Fallida"), ("done", "Completada")], default="running", max_length=16)),
+                ("rows_done", models.BigIntegerField(default=0, help_text="Filas leídas y confirmadas (checkpoint)")),
+                ("counters", models.JSONField(blank=True, default=dict)),
+                ("error", models.TextField(blank=True, default="")),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "indexes": [models.Index(fields=["command", "source", "fingerprint"], name="core_import_command_79e285_idx")],
+            },
+        ),
+    ]
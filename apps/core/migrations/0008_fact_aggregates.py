@@ -0,0 +1,97 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_aggregates(apps, schema_editor):
+    """Carga inicial de los agregados con los hechos ya existentes."""
+    FactFinance = apps.get_model("core", "FactFinance")
+    FactMonthlyAggregate = apps.get_model("core", "FactMonthlyAggregate")
+    FactYearlyAggregate = apps.get_model("core", "FactYearlyAggregate")
+
+    monthly = (
+        FactFinance.objects
+        .values("company_id", "scenario_id", "period_id", "account_id")
+        .annotate(total=Sum("amount"), lines=Count("id"))
+        .order_by()
+    )
+    FactMonthlyAggregate.objects.bulk_create(
+        [
+            FactMonthlyAggregate(
+                company_id=r["company_id"], scenario_id=r["scenario_id"], period_id=r["period_id"],
+                account_id=r["account_id"], amount=r["total"] or 0, line_count=r["lines"],
+            )
+            for r in monthly.iterator()
+        ],
+        batch_size=500,
+    )
+
+    totals = {}
+    yearly = (
+        FactMonthlyAggregate.objects
+        .values("company_id", "scenario_id", "period__year", "account__statement", "account__group")
+        .annotate(total=Sum("amount"))
+        .order_by()
+    )
+    for r in yearly.iterator():
+        key = (r["company_id"], r["scenario_id"], r["period__year"],
+               r["account__statement"] or "", r["account__group"] or "")
+        totals[key] = totals.get(key, 0) + (r["total"] or 0)
+    FactYearlyAggregate.objects.bulk_create(
+        [
+            FactYearlyAggregate(
+                company_id=c, scenario_id=s, year=y, statement=statement, line=line, amount=amount,
+            )
+            for (c, s, y, statement, line), amount in totals.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_importjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FactMonthlyAggregate",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("amount", models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ("line_count", models.IntegerField(default=0, help_text="Hechos sumados")),
+                ("account", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="core.account")),
+                ("company", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="core.company")),
+                ("period", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="core.period")),
+                ("scenario", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="core.scenario")),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("company", "scenario", "period", "account"), name="uniq_factmonthly_key"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="FactYearlyAggregate",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("year", models.IntegerField()),
+                ("statement", models.CharField(blank=True, default="", max_length=8)),
+                ("line", models.CharField(blank=True, default="", help_text="Grupo de la cuenta ('' si no tiene)", max_length=64)),
+                ("amount", models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ("company", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="core.company")),
+                ("scenario", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="core.scenario")),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("company", "scenario", "year", "statement", "line"), name="uniq_factyearly_key"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(fill_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_fact_aggregates"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DataVersion",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("key", models.CharField(help_text="Ámbito: 'facts:<company>:<scenario>:<year>', 'accounts'...", max_length=128, unique=True)),
+                ("version", models.BigIntegerField(default=1)),
+                ("updated_at", models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def drop_duplicates(apps, schema_editor):
+    """Deja una fila por (company, scenario, period) (la más reciente) antes de la restricción."""
+    for name in ("IncomeStatement", "BalanceSheet", "CashFlowStatement"):
+        model = apps.get_model("core", name)
+        keep = (
+            model.objects.values("company_id", "scenario_id", "period_id")
+            .annotate(last=Max("id"))
+            .values_list("last", flat=True)
+        )
+        model.objects.exclude(id__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_dataversion"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="incomestatement",
+            constraint=models.UniqueConstraint(fields=("company", "scenario", "period"), name="uniq_incomestatement_key"),
+        ),
+        migrations.AddConstraint(
+            model_name="balancesheet",
+            constraint=models.UniqueConstraint(fields=("company", "scenario", "period"), name="uniq_balancesheet_key"),
+        ),
+        migrations.AddConstraint(
+            model_name="cashflowstatement",
+            constraint=models.UniqueConstraint(fields=("company", "scenario", "period"), name="uniq_cashflowstatement_key"),
+        ),
+    ]
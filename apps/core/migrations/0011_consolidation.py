@@ -0,0 +1,69 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_statement_keys"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ConsolidationGroup",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("code", models.CharField(max_length=64, unique=True)),
+                ("name", models.CharField(blank=True, default="", max_length=120)),
+                ("currency", models.CharField(default="USD", help_text="Moneda de presentación del grupo", max_length=8)),
+                ("company", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="consolidations", to="core.company")),
+                ("members", models.ManyToManyField(related_name="consolidation_groups", to="core.company")),
+            ],
+        ),
+        migrations.CreateModel(
+            name="FxRate",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("currency", models.CharField(max_length=8)),
+                ("base", models.CharField(max_length=8)),
+                ("rate", models.DecimalField(decimal_places=8, max_digits=18)),
+                ("period", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="core.period")),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(fields=("period", "currency", "base"), name="uniq_fxrate_key")
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="EliminationRule",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("note", models.CharField(blank=True, default="", max_length=255)),
+                ("account", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="core.account")),
+                ("group", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="eliminations", to="core.consolidationgroup")),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(fields=("group", "account"), name="uniq_elimination_key")
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ConsolidationState",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("scenario_name", models.CharField(max_length=120)),
+                ("fingerprint", models.CharField(max_length=64)),
+                ("row_count", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("group", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="states", to="core.consolidationgroup")),
+                ("period", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="core.period")),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(fields=("group", "scenario_name", "period"), name="uniq_consolidationstate_key")
+                ],
+            },
+        ),
+    ]
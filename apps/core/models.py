@@ -109,6 +109,11 @@ class IncomeStatement(models.Model):
     tax = models.FloatField(default=0)
     net_income = models.FloatField(default=0)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["company", "scenario", "period"], name="uniq_incomestatement_key"),
+        ]
+
 
 class BalanceSheet(models.Model):
     company = models.ForeignKey(Company, on_delete=models.CASCADE)
@@ -118,6 +123,11 @@ class BalanceSheet(models.Model):
     total_liabilities = models.FloatField(default=0)
     total_equity = models.FloatField(default=0)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["company", "scenario", "period"], name="uniq_balancesheet_key"),
+        ]
+
 
 class CashFlowStatement(models.Model):
     company = models.ForeignKey(Company, on_delete=models.CASCADE)
@@ -128,6 +138,11 @@ class CashFlowStatement(models.Model):
     cff = models.FloatField(default=0)
     net_change_cash = models.FloatField(default=0)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["company", "scenario", "period"], name="uniq_cashflowstatement_key"),
+        ]
+
 
 class KPI(models.Model):
     company = models.ForeignKey(Company, on_delete=models.CASCADE)
@@ -226,3 +241,181 @@ class FactFinance(models.Model):
 
     def __str__(self):
         return f"{self.company} {self.scenario} {self.period} {self.account} = {self.amount}"
+
+
+# ==== Agregados de hechos (mantenidos por los importadores) ====
+class FactMonthlyAggregate(models.Model):
+    """
+    Suma de FactFinance por (company, scenario, period, account): colapsa
+    centros de costo y líneas repetidas. Se recalcula por partición
+    (company, scenario, period) tras cada importación (apps.core.aggregates).
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    scenario = models.ForeignKey(Scenario, on_delete=models.CASCADE)
+    period = models.ForeignKey(Period, on_delete=models.CASCADE)
+    account = models.ForeignKey(Account, on_delete=models.CASCADE)
+    amount = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    line_count = models.IntegerField(default=0, help_text="Hechos sumados")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["company", "scenario", "period", "account"],
+                name="uniq_factmonthly_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.company} {self.scenario} {self.period} {self.account} = {self.amount}"
+
+
+class FactYearlyAggregate(models.Model):
+    """Suma anual por línea de estado (Account.statement / Account.group) a partir del agregado mensual."""
+    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    scenario = models.ForeignKey(Scenario, on_delete=models.CASCADE)
+    year = models.IntegerField()
+    statement = models.CharField(max_length=8, blank=True, default="")
+    line = models.CharField(max_length=64, blank=True, default="", help_text="Grupo de la cuenta ('' si no tiene)")
+    amount = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["company", "scenario", "year", "statement", "line"],
+                name="uniq_factyearly_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.company} {self.scenario} {self.year} {self.statement}/{self.line} = {self.amount}"
+
+
+class DataVersion(models.Model):
+    """
+    Contador de cambios por ámbito de datos, para validar cachés HTTP
+    (ETag / Last-Modified) sin recalcular reportes. Claves en apps.core.versions.
+    """
+    key = models.CharField(max_length=128, unique=True, help_text="Ámbito: 'facts:<company>:<scenario>:<year>', 'accounts'...")
+    version = models.BigIntegerField(default=1)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
+
+
+# ==== Consolidación de grupos (apps.core.consolidation) ====
+class ConsolidationGroup(models.Model):
+    """
+    Grupo de empresas que se consolida en `company` (la entidad del grupo):
+    los hechos consolidados se escriben como FactFinance de esa empresa, en
+    el escenario del mismo nombre, para que reportes y API los lean igual.
+    """
+    code = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=120, blank=True, default="")
+    currency = models.CharField(max_length=8, default="USD", help_text="Moneda de presentación del grupo")
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="consolidations")
+    members = models.ManyToManyField(Company, related_name="consolidation_groups")
+
+    def __str__(self):
+        return self.name or self.code
+
+
+class FxRate(models.Model):
+    """Tipo de cambio del periodo: 1 `currency` = `rate` `base`."""
+    period = models.ForeignKey(Period, on_delete=models.CASCADE)
+    currency = models.CharField(max_length=8)
+    base = models.CharField(max_length=8)
+    rate = models.DecimalField(max_digits=18, decimal_places=8)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["period", "currency", "base"], name="uniq_fxrate_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.period} 1 {self.currency} = {self.rate} {self.base}"
+
+
+class EliminationRule(models.Model):
+    """Cuenta intercompañía que se elimina (no se suma) al consolidar el grupo."""
+    group = models.ForeignKey(ConsolidationGroup, on_delete=models.CASCADE, related_name="eliminations")
+    account = models.ForeignKey(Account, on_delete=models.CASCADE)
+    note = models.CharField(max_length=255, blank=True, default="")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["group", "account"], name="uniq_elimination_key"),
+        ]
+
+
+class ConsolidationState(models.Model):
+    """
+    Huella de las entradas (versiones de datos de los miembros, tipos de
+    cambio y reglas) con la que se calculó cada (grupo, escenario, periodo):
+    si no cambió, el periodo no se recalcula.
+    """
+    group = models.ForeignKey(ConsolidationGroup, on_delete=models.CASCADE, related_name="states")
+    scenario_name = models.CharField(max_length=120)
+    period = models.ForeignKey(Period, on_delete=models.CASCADE)
+    fingerprint = models.CharField(max_length=64)
+    row_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["group", "scenario_name", "period"], name="uniq_consolidationstate_key"),
+        ]
+
+
+# ==== Control de importaciones ====
+class ImportManifest(models.Model):
+    """Huella del último archivo importado por origen (ruta de la plantilla)."""
+    source = models.CharField(max_length=255, unique=True, help_text="Ruta del archivo importado")
+    fingerprint = models.CharField(max_length=64, help_text="SHA-256 del contenido")
+    size = models.BigIntegerField(default=0)
+    mtime = models.FloatField(default=0)
+    imported_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} ({self.fingerprint[:12]})"
+
+
+class ImportPartitionState(models.Model):
+    """Hash de las filas de una partición (company, scenario, period) según el último import."""
+    manifest = models.ForeignKey(ImportManifest, on_delete=models.CASCADE, related_name="partitions")
+    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    scenario = models.ForeignKey(Scenario, on_delete=models.CASCADE)
+    period = models.ForeignKey(Period, on_delete=models.CASCADE)
+    row_hash = models.CharField(max_length=32)
+    row_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("manifest", "company", "scenario", "period")
+
+    def __str__(self):
+        return f"{self.manifest.source} {self.company} {self.scenario} {self.period}"
+
+
+class ImportJob(models.Model):
+    """Importación confirmada por lotes con checkpoint; permite reanudarla (--resume) tras un fallo."""
+    STATUS_CHOICES = (
+        ("running", "En curso"),
+        ("failed", "Fallida"),
+        ("done", "Completada"),
+    )
+    command = models.CharField(max_length=64, help_text="Comando que ejecuta la importación")
+    source = models.CharField(max_length=255, help_text="Ruta del archivo importado")
+    fingerprint = models.CharField(max_length=64, help_text="SHA-256 del contenido")
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="running")
+    rows_done = models.BigIntegerField(default=0, help_text="Filas leídas y confirmadas (checkpoint)")
+    counters = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True, default="")
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["command", "source", "fingerprint"])]
+
+    def __str__(self):
+        return f"{self.command} {self.source} [{self.status}] {self.rows_done} filas"
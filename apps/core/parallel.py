@@ -0,0 +1,175 @@
+# apps/core/parallel.py
+"""
+Importación paralela de hechos por particiones.
+
+Flujo:
+  1) El proceso coordinador lee el archivo en streaming, resuelve (y crea si
+     hace falta) todas las dimensiones y vuelca cada hecho ya resuelto (ids +
+     importe) a un archivo temporal por partición.
+  2) Un pool de procesos carga cada partición con el upsert por lotes de
+     apps.core.loaders, cada una en su propia transacción.
+
+Como las dimensiones se crean antes de repartir el trabajo, los workers solo
+escriben en core_factfinance y nunca compiten por crear catálogos. Las
+particiones son disjuntas en la clave de FactFinance, así que tampoco compiten
+por las mismas filas.
+"""
+import csv
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from decimal import Decimal
+from pathlib import Path
+
+from django.db import connection, connections, transaction
+
+from apps.core.loaders import FactBatchWriter, DEFAULT_BATCH_SIZE
+from apps.core.models import Company, Period
+
+SPILL_FIELDS = ["company_id", "account_id", "scenario_id", "period_id", "center_id", "amount"]
+MAX_OPEN_SPILLS = 128
+
+
+def default_workers() -> int:
+    return max(1, os.cpu_count() or 1)
+
+
+def usable_workers(workers: int) -> int:
+    """
+    SQLite admite un único escritor: con varios procesos las particiones se
+    bloquean entre sí ("database is locked"), así que ahí se carga en serie.
+    """
+    if connection.vendor == "sqlite":
+        return 1
+    return max(1, workers)
+
+
+class PartitionSpiller:
+    """
+    Reparte hechos resueltos en archivos CSV temporales, uno por partición.
+    Mantiene como mucho MAX_OPEN_SPILLS archivos abiertos a la vez.
+    """
+
+    def __init__(self, workdir: Path):
+        self.workdir = Path(workdir)
+        self.paths = {}
+        self.labels = {}  # key -> texto para los reportes (opcional)
+        self.counts = {}
+        self._open = {}
+
+    def _writer(self, key):
+        if key in self._open:
+            return self._open[key][1]
+        if len(self._open) >= MAX_OPEN_SPILLS:
+            _, (fh, _) = self._open.popitem()
+            fh.close()
+        path = self.paths.get(key)
+        is_new = path is None
+        if is_new:
+            path = self.workdir / f"part_{len(self.paths):06d}.csv"
+            self.paths[key] = path
+        fh = path.open("a", encoding="utf-8", newline="")
+        writer = csv.writer(fh)
+        if is_new:
+            writer.writerow(SPILL_FIELDS)
+        self._open[key] = (fh, writer)
+        return writer
+
+    def add(self, key, company_id, account_id, scenario_id, period_id, center_id, amount):
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self._writer(key).writerow(
+            [company_id, account_id, scenario_id, period_id, "" if center_id is None else center_id, amount]
+        )
+
+    def close(self):
+        for fh, _ in self._open.values():
+            fh.close()
+        self._open = {}
+
+    def tasks(self):
+        """Particiones más grandes primero, para repartir mejor la carga."""
+        keys = sorted(self.paths, key=lambda k: -self.counts[k])
+        return [(k, self.labels.get(k, str(k)), str(self.paths[k])) for k in keys]
+
+
+def label_partitions(spiller: PartitionSpiller):
+    """Etiquetas legibles ('<company.code> <año>-<mes>') para las particiones (company_id, period_id)."""
+    companies = dict(Company.objects.values_list("id", "code"))
+    periods = {pid: f"{y}-{m:02d}" for pid, y, m in Period.objects.values_list("id", "year", "month")}
+    for company_id, period_id in spiller.paths:
+        spiller.labels[(company_id, period_id)] = f"{companies.get(company_id)} {periods.get(period_id)}"
+
+
+def partition_reporter(stdout):
+    """Callback `report` de run_partitions: una línea con filas, tiempo y throughput por partición."""
+    def report(res):
+        rate = res["rows"] / res["seconds"] if res["seconds"] else 0
+        stdout.write(f"  ✔ {res['label']}: filas={res['rows']} t={res['seconds']:.2f}s ({rate:,.0f} filas/s)")
+    return report
+
+
+def load_partition(key, label, path, batch_size=DEFAULT_BATCH_SIZE):
+    """Carga una partición en su propia transacción. Se ejecuta en un worker."""
+    counters = {"created": 0, "updated": 0, "skipped": 0}
+    started = time.perf_counter()
+    rows = 0
+    with transaction.atomic():
+        writer = FactBatchWriter(counters, batch_size)
+        with open(path, "r", encoding="utf-8", newline="") as fh:
+            for r in csv.DictReader(fh):
+                rows += 1
+                writer.add(
+                    int(r["company_id"]),
+                    int(r["account_id"]),
+                    int(r["scenario_id"]),
+                    int(r["period_id"]),
+                    int(r["center_id"]) if r["center_id"] else None,
+                    Decimal(r["amount"]),
+                )
+        writer.flush()
+    return {
+        "key": key,
+        "label": label,
+        "rows": rows,
+        "seconds": time.perf_counter() - started,
+        "counters": counters,
+    }
+
+
+def run_partitions(spiller: PartitionSpiller, counters: dict, workers: int,
+                   batch_size: int = DEFAULT_BATCH_SIZE, report=None):
+    """
+    Carga todas las particiones con un pool de `workers` procesos y suma los
+    contadores en `counters`. `report(result)` se llama al terminar cada una.
+    """
+    spiller.close()
+    tasks = spiller.tasks()
+    results = []
+
+    def done(res):
+        results.append(res)
+        if report:
+            report(res)
+
+    if workers <= 1 or len(tasks) <= 1:
+        for key, label, path in tasks:
+            done(load_partition(key, label, path, batch_size))
+    else:
+        # Los hijos no deben heredar conexiones abiertas del coordinador
+        connections.close_all()
+        ctx = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            futures = [pool.submit(load_partition, key, label, path, batch_size) for key, label, path in tasks]
+            for fut in as_completed(futures):
+                done(fut.result())
+    for res in results:
+        for k, v in res["counters"].items():
+            counters[k] = counters.get(k, 0) + v
+    return results
+
+
+def spill_dir():
+    """Directorio temporal para los archivos de partición."""
+    return tempfile.TemporaryDirectory(prefix="factparts_")
@@ -0,0 +1,211 @@
+# apps/core/pivot.py
+"""
+Pivote / drill-down sobre las dimensiones de FactFinance.
+
+Una consulta = un GROUP BY. La petición indica dimensiones de fila y de
+columna (DIMENSIONS), medidas (MEASURES) y filtros (FILTERS); pivot() elige
+la tabla más agregada que tiene ese grano y ejecuta sobre ella una sola
+sentencia .values(*dimensiones).annotate(*medidas):
+
+  - yearly  (FactYearlyAggregate): company, scenario, year, statement, group
+  - monthly (FactMonthlyAggregate): además month, subgroup y account
+  - facts   (FactFinance): además center (el único grano sin agregado)
+
+Así el total de un año por grupo lee unas pocas filas por empresa y solo el
+último nivel del drill-down (centros) baja a los hechos, ya filtrado por
+empresa/escenario/periodo (índice company, scenario, period).
+
+El resultado es una matriz compacta: claves de fila, claves de columna y,
+por medida, una lista de filas de valores (None donde no hay datos), en
+lugar de un objeto por celda.
+"""
+from decimal import Decimal
+
+from django.db.models import CharField, Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from apps.core.models import FactFinance, FactMonthlyAggregate, FactYearlyAggregate, Period
+from apps.core.resolvers import parse_period_code
+
+CENT = Decimal("0.01")
+MAX_CELLS = 100_000
+
+# Fuentes de la más agregada a la más fina: {dimensión/filtro: lookup}
+SOURCES = {
+    "yearly": {
+        "model": FactYearlyAggregate,
+        "fields": {
+            "company": "company__code",
+            "scenario": "scenario__name",
+            "year": "year",
+            "statement": "statement",
+            "group": "line",
+        },
+        "measures": {"amount": Sum("amount")},
+    },
+    "monthly": {
+        "model": FactMonthlyAggregate,
+        "fields": {
+            "company": "company__code",
+            "scenario": "scenario__name",
+            "year": "period__year",
+            "month": "period__month",
+            "statement": "account__statement",
+            "group": "account__group",
+            "subgroup": "account__subgroup",
+            "account": "account__code",
+        },
+        "measures": {"amount": Sum("amount"), "lines": Sum("line_count")},
+    },
+    "facts": {
+        "model": FactFinance,
+        "fields": {
+            "company": "company__code",
+            "scenario": "scenario__name",
+            "year": "period__year",
+            "month": "period__month",
+            "statement": "account__statement",
+            "group": "account__group",
+            "subgroup": "account__subgroup",
+            "account": "account__code",
+            "center": "center__code",
+        },
+        "measures": {"amount": Sum("amount"), "lines": Count("id")},
+    },
+}
+DIMENSIONS = tuple(SOURCES["facts"]["fields"])
+MEASURES = tuple(SOURCES["facts"]["measures"])
+FILTERS = DIMENSIONS  # cada dimensión filtra por una lista de valores
+PERIOD_FILTERS = ("period_from", "period_to")
+INT_DIMENSIONS = ("year", "month")
+# Clasificación de la cuenta: NULL y '' son la misma línea (como en el agregado anual)
+BLANK_AS_EMPTY = ("statement", "group", "subgroup")
+
+
+def _split(value) -> list[str]:
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in str(value or "").split(",") if v.strip()]
+
+
+def pick_source(dimensions, measures, filters, period_range=False) -> str:
+    """Nombre de la fuente más agregada que cubre dimensiones, medidas y filtros."""
+    needed = set(dimensions) | set(filters)
+    for name, source in SOURCES.items():
+        if period_range and name == "yearly":
+            continue
+        if needed <= set(source["fields"]) and set(measures) <= set(source["measures"]):
+            return name
+    return "facts"
+
+
+def _period_ids(bounds):
+    lo, hi = bounds.get("period_from"), bounds.get("period_to")
+    periods = Period.objects.annotate(code=F("year") * 100 + F("month"))
+    if lo:
+        periods = periods.filter(code__gte=lo[0] * 100 + lo[1])
+    if hi:
+        periods = periods.filter(code__lte=hi[0] * 100 + hi[1])
+    return periods.values("id")  # subconsulta, misma sentencia
+
+
+def _sort_key(key):
+    return tuple((v is None, v if v is not None else "") for v in key)
+
+
+def pivot(rows, columns=(), measures=("amount",), filters=None) -> dict:
+    """
+    Agrega los hechos por `rows` + `columns` (nombres de DIMENSIONS) con
+    `measures` y `filters` ({dimensión | period_from | period_to: valor o
+    lista; listas de texto separadas por comas}). Devuelve:
+      - source: tabla usada (yearly / monthly / facts)
+      - rows, columns, measures: lo pedido
+      - row_keys / column_keys: tuplas de valores de dimensión, ordenadas
+      - values: {medida: [[valor por columna] por fila]}
+    Lanza ValueError si una dimensión, medida o filtro no existe o si la
+    matriz supera MAX_CELLS.
+    """
+    rows, columns, measures = list(rows), list(columns), list(measures)
+    filters = {k: v for k, v in (filters or {}).items() if v not in (None, "", [])}
+    dims = rows + columns
+    for dim in dims:
+        if dim not in DIMENSIONS:
+            raise ValueError(f"Dimensión desconocida: {dim!r} (use {', '.join(DIMENSIONS)})")
+    if len(set(dims)) != len(dims):
+        raise ValueError("Una dimensión no puede repetirse entre filas y columnas.")
+    if not measures:
+        raise ValueError("Indique al menos una medida.")
+    for measure in measures:
+        if measure not in MEASURES:
+            raise ValueError(f"Medida desconocida: {measure!r} (use {', '.join(MEASURES)})")
+    for name in filters:
+        if name not in FILTERS and name not in PERIOD_FILTERS:
+            raise ValueError(f"Filtro desconocido: {name!r}")
+
+    bounds = {p: parse_period_code(filters[p]) for p in PERIOD_FILTERS if p in filters}
+    dim_filters = {k: _split(v) for k, v in filters.items() if k in FILTERS}
+    for name in INT_DIMENSIONS:
+        if name in dim_filters:
+            try:
+                dim_filters[name] = [int(v) for v in dim_filters[name]]
+            except ValueError:
+                raise ValueError(f"Filtro {name}: se esperan números enteros") from None
+
+    source_name = pick_source(dims, measures, dim_filters, period_range=bool(bounds))
+    source = SOURCES[source_name]
+    fields = source["fields"]
+
+    qs = source["model"].objects.all()
+    for name, values in dim_filters.items():
+        condition = Q(**{f"{fields[name]}__in": values})
+        if name in BLANK_AS_EMPTY and "" in values:
+            condition |= Q(**{f"{fields[name]}__isnull": True})
+        qs = qs.filter(condition)
+    if bounds:
+        qs = qs.filter(period_id__in=_period_ids(bounds))
+
+    # Alias _d_<dim> para no chocar con los nombres de campos/relaciones del modelo
+    annotations = {
+        f"_d_{dim}": (
+            Coalesce(F(fields[dim]), Value(""), output_field=CharField())
+            if dim in BLANK_AS_EMPTY and source_name != "yearly" else F(fields[dim])
+        )
+        for dim in dims
+    }
+    aggregates = {f"_m_{m}": source["measures"][m] for m in measures}
+    result = qs.annotate(**annotations).values(*annotations).annotate(**aggregates).order_by()
+
+    cells, row_index, col_index = {}, {}, {}
+    for r in result:
+        rk = tuple(r[f"_d_{d}"] for d in rows)
+        ck = tuple(r[f"_d_{d}"] for d in columns)
+        row_index.setdefault(rk, None)
+        col_index.setdefault(ck, None)
+        cells[(rk, ck)] = r
+    row_keys = sorted(row_index, key=_sort_key)
+    column_keys = sorted(col_index, key=_sort_key)
+    if len(row_keys) * len(column_keys) > MAX_CELLS:
+        raise ValueError(
+            f"La matriz tendría {len(row_keys)} × {len(column_keys)} celdas (máximo {MAX_CELLS}); "
+            "agregue filtros o mueva dimensiones de columna a fila."
+        )
+
+    def value(cell, measure):
+        if cell is None:
+            return None
+        v = cell[f"_m_{measure}"]
+        return v.quantize(CENT) if isinstance(v, Decimal) else v
+
+    values = {
+        m: [[value(cells.get((rk, ck)), m) for ck in column_keys] for rk in row_keys]
+        for m in measures
+    }
+    return {
+        "source": source_name,
+        "rows": rows,
+        "columns": columns,
+        "measures": measures,
+        "row_keys": [list(k) for k in row_keys],
+        "column_keys": [list(k) for k in column_keys],
+        "values": values,
+    }
@@ -0,0 +1,229 @@
+# apps/core/readers.py
+"""
+Lectura en streaming de las plantillas CSV y de libros Excel.
+
+Nada aquí materializa el archivo completo: las filas se producen una a una
+(generadores) y se agrupan en bloques de tamaño fijo para que cada bloque
+recorra el pipeline completo (parseo → resolución de dimensiones → escritura)
+antes de leer el siguiente. La memoria pico depende de --chunk-size, no del
+tamaño del archivo.
+"""
+import csv
+from datetime import date, datetime
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from apps.core.interchange import is_parquet, iter_parquet_rows, parquet_sample, parquet_shape, template_path
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def iter_csv_rows(csv_path: Path):
+    """Genera dicts {columna: valor} con claves y valores recortados (tolera BOM)."""
+    if not csv_path.exists():
+        return
+    with csv_path.open("r", encoding="utf-8-sig", newline="") as f:
+        for r in csv.DictReader(f):
+            yield {(k or "").strip(): (v or "").strip() for k, v in r.items()}
+
+
+def chunked(iterable, size: int = DEFAULT_CHUNK_SIZE):
+    """Agrupa un iterable en listas de como máximo `size` elementos."""
+    size = max(1, int(size or DEFAULT_CHUNK_SIZE))
+    it = iter(iterable)
+    while True:
+        block = list(islice(it, size))
+        if not block:
+            return
+        yield block
+
+
+def iter_csv_chunks(csv_path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Bloques de filas (listas de dicts) de un CSV, sin cargarlo completo."""
+    yield from chunked(iter_csv_rows(csv_path), chunk_size)
+
+
+def iter_table_rows(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Filas de una plantilla .csv (texto) o .parquet (valores tipados)."""
+    if is_parquet(path):
+        if path.exists():
+            yield from iter_parquet_rows(path, chunk_size)
+        return
+    yield from iter_csv_rows(path)
+
+
+def iter_template_rows(base_dir: Path, stem: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Filas de la plantilla <stem> en el formato disponible (ver template_path)."""
+    yield from iter_table_rows(template_path(base_dir, stem), chunk_size)
+
+
+def iter_template_chunks(base_dir: Path, stem: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    yield from chunked(iter_template_rows(base_dir, stem, chunk_size), chunk_size)
+
+
+def scan_csv_frame(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> tuple[list[str], int]:
+    """
+    Devuelve (columnas, filas) de un CSV leyéndolo con pandas por bloques,
+    de modo que validar un archivo grande no exige tenerlo entero en memoria.
+    Para .parquet se leen directamente los metadatos.
+    """
+    if is_parquet(path):
+        return parquet_shape(path)
+    last_error = None
+    for encoding in ("utf-8-sig", "latin-1"):
+        try:
+            cols, rows = None, 0
+            with pd.read_csv(path, encoding=encoding, chunksize=chunk_size) as reader:
+                for block in reader:
+                    if cols is None:
+                        cols = list(map(str, block.columns))
+                    rows += len(block)
+            if cols is None:
+                cols = list(map(str, pd.read_csv(path, encoding=encoding, nrows=0).columns))
+            return cols, rows
+        except UnicodeDecodeError as e:
+            last_error = e
+            continue
+    raise last_error
+
+
+# --- validación rápida (sin parsear el archivo) --------------------------------
+
+SNIFF_ENCODINGS = ("utf-8-sig", "latin-1")
+LINE_BLOCK = 1 << 20
+SAMPLE_WINDOW = 64 * 1024  # bytes hacia atrás para hallar el inicio de la línea
+
+
+def sniff_encoding(path: Path) -> str:
+    """utf-8-sig si la cabecera (y una muestra del inicio) decodifica como UTF-8; si no, latin-1."""
+    with open(path, "rb") as fh:
+        head = fh.read(64 * 1024)
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        if e.start < len(head) - 4:  # no es solo un carácter cortado al final del bloque
+            return "latin-1"
+    return "utf-8-sig"
+
+
+def sniff_header(path: Path, encoding: str = None) -> list[str]:
+    """Columnas leyendo solo la primera línea (o los metadatos en .parquet)."""
+    if is_parquet(path):
+        return parquet_shape(path)[0]
+    encoding = encoding or sniff_encoding(path)
+    with open(path, "r", encoding=encoding, newline="") as fh:
+        first = next(csv.reader(fh), [])
+    return [c.strip() for c in first]
+
+
+def count_data_lines(path: Path) -> int:
+    """
+    Filas de datos contando saltos de línea en bloques binarios, sin
+    decodificar ni parsear. Un campo entre comillas con saltos de línea
+    cuenta como varias filas: es un conteo para validar, no exacto.
+    """
+    if is_parquet(path):
+        return parquet_shape(path)[1]
+    lines, last = 0, b"\n"
+    with open(path, "rb") as fh:
+        while block := fh.read(LINE_BLOCK):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1  # última línea sin salto final
+    return max(0, lines - 1)
+
+
+def sample_rows(path: Path, n: int, seed: int = None, encoding: str = None) -> list[tuple[int, dict]]:
+    """
+    Hasta `n` filas tomadas en desplazamientos aleatorios del archivo: se
+    salta al byte y se lee la línea que lo contiene.
+    Devuelve (byte de inicio, fila) para ubicar la fila en el archivo (-1 en .parquet).
+    """
+    rng = np.random.default_rng(seed)
+    if is_parquet(path):
+        return [(-1, row) for row in parquet_sample(path, n, rng)]
+
+    encoding = encoding or sniff_encoding(path)
+    header = sniff_header(path, encoding)
+    size = path.stat().st_size
+    out, seen = [], set()
+    with open(path, "rb") as fh:
+        fh.readline()
+        data_start = fh.tell()
+        if data_start >= size:
+            return []
+        for offset in sorted(rng.integers(data_start, size, size=n)):
+            # Inicio de la línea que contiene el desplazamiento (último \n antes de él)
+            window = max(data_start, int(offset) - SAMPLE_WINDOW)
+            fh.seek(window)
+            nl = fh.read(int(offset) - window).rfind(b"\n")
+            start = window + nl + 1 if nl >= 0 else window
+            fh.seek(start)
+            line = fh.readline()
+            if not line.strip() or start in seen:
+                continue
+            seen.add(start)
+            values = next(csv.reader([line.decode(encoding, errors="replace")]), [])
+            row = dict(zip(header, (v.strip() for v in values)))
+            if len(values) != len(header):
+                row[None] = f"{len(values)} columnas (cabecera: {len(header)})"
+            out.append((start, row))
+    return out
+
+
+# --- libros Excel -------------------------------------------------------------
+
+def xlsx_sheet_names(path: Path) -> list[str]:
+    wb = load_workbook(path, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def iter_xlsx_rows(path: Path, sheet: str):
+    """
+    Filas (tuplas de valores) de una hoja en modo read-only: openpyxl va
+    leyendo el XML de la hoja, nunca carga el libro completo.
+    """
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from wb[sheet].iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def _cell_text(v):
+    """Valor de celda → texto como en un CSV exportado (vacío → NaN, como read_csv)."""
+    if v is None or (isinstance(v, str) and not v.strip()):
+        return np.nan
+    if isinstance(v, datetime):
+        return v.date().isoformat() if v.time() == datetime.min.time() else v.isoformat(sep=" ")
+    if isinstance(v, date):
+        return v.isoformat()
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+def read_xlsx_sheet(path: Path, sheet: str) -> pd.DataFrame:
+    """
+    Hoja → DataFrame sin cabecera (equivalente a read_csv(header=None) del CSV
+    exportado): celdas como texto, sin filas ni columnas vacías al final.
+    """
+    rows, last = [], 0
+    for values in iter_xlsx_rows(path, sheet):
+        row = [_cell_text(v) for v in values]
+        rows.append(row)
+        if any(isinstance(v, str) for v in row):
+            last = len(rows)
+    del rows[last:]
+    width = max((len(r) for r in rows), default=0)
+    while width and all(len(r) < width or not isinstance(r[width - 1], str) for r in rows):
+        width -= 1
+    return pd.DataFrame([r[:width] + [np.nan] * (width - len(r)) for r in rows], columns=range(width))
@@ -0,0 +1,121 @@
+# apps/core/reports.py
+"""
+Motor del Estado de Resultados comparativo.
+
+Una sola consulta agrupada sobre FactMonthlyAggregate trae, por cuenta, el
+importe del año y del año anterior (agregación condicional: Sum con filter)
+y, como subconsulta escalar en la misma sentencia, el último año con datos.
+Subtotales, % sobre ventas y variaciones se calculan en memoria sobre esas
+filas (una por cuenta) con services.calculate_vertical /
+calculate_horizontal, así que el reporte completo es un único viaje a la BD.
+
+Convención de códigos (la del reporte original): prefijo 4 = ingresos
+(ventas), prefijo 5 = gastos; utilidad = ingresos - gastos.
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, OuterRef, Q, Subquery, Sum
+
+from apps.core.models import FactMonthlyAggregate, FactYearlyAggregate
+from apps.core.services import calculate_horizontal, calculate_vertical
+
+REVENUE_PREFIX = "4"
+EXPENSE_PREFIX = "5"
+SUBTOTALS = {REVENUE_PREFIX: "Total ingresos", EXPENSE_PREFIX: "Total gastos"}
+
+ZERO = Decimal("0")
+CENT = Decimal("0.01")
+
+
+def _account_rows(company, scenario, year):
+    """Filas {code, name, cur, prev, last_year} por cuenta: una consulta."""
+    amount = DecimalField(max_digits=18, decimal_places=2)
+    last_year = (
+        FactYearlyAggregate.objects
+        .filter(company=OuterRef("company"), scenario=OuterRef("scenario"))
+        .order_by("-year")
+        .values("year")[:1]
+    )
+    return list(
+        FactMonthlyAggregate.objects
+        .filter(company=company, scenario=scenario, period__year__in=(year, year - 1))
+        .values("account__code", "account__name")
+        .annotate(
+            cur=Sum("amount", filter=Q(period__year=year), output_field=amount),
+            prev=Sum("amount", filter=Q(period__year=year - 1), output_field=amount),
+            last_year=Subquery(last_year),
+        )
+        .order_by("account__code")
+    )
+
+
+def _row(name, cur, prev, vertical, horizontal, has_previous, is_subtotal=False) -> dict:
+    return {
+        "name": name,
+        "amount": cur,
+        "prev_amount": prev if has_previous else None,
+        "vertical": vertical,
+        "delta_abs": horizontal["abs"] if has_previous else None,
+        "delta_pct": horizontal["perc"] if has_previous else None,
+        "is_subtotal": is_subtotal,
+    }
+
+
+def income_statement(company, scenario, year: int) -> dict:
+    """
+    EERR comparativo de `year` contra `year - 1`. Devuelve:
+      - rows: cuentas por código con un subtotal tras el bloque de ingresos y
+        el de gastos (claves name, amount, prev_amount, vertical, delta_abs,
+        delta_pct, is_subtotal, como espera reports/income.html)
+      - totals: la fila de utilidad
+      - previous_year: year - 1 si tiene datos, si no None
+      - last_year: último año con datos (None si no hay filas para year/year - 1)
+      - total_ingresos, total_gastos, utilidad
+    """
+    records = _account_rows(company, scenario, year)
+    has_previous = any(r["prev"] is not None for r in records)
+
+    current, previous, names = {}, {}, {}
+    for r in records:
+        code = r["account__code"]
+        current[code] = (r["cur"] or ZERO).quantize(CENT)
+        previous[code] = (r["prev"] or ZERO).quantize(CENT)
+        names[code] = f"{code} {r['account__name']}"
+
+    def block_sum(data, prefix):
+        return sum((v for code, v in data.items() if str(code).startswith(prefix)), ZERO)
+
+    subtotal_cur = {prefix: block_sum(current, prefix) for prefix in SUBTOTALS}
+    subtotal_prev = {prefix: block_sum(previous, prefix) for prefix in SUBTOTALS}
+    utilidad = subtotal_cur[REVENUE_PREFIX] - subtotal_cur[EXPENSE_PREFIX]
+    utilidad_prev = subtotal_prev[REVENUE_PREFIX] - subtotal_prev[EXPENSE_PREFIX]
+
+    # Mismas fórmulas que el análisis vertical/horizontal de services
+    sales = subtotal_cur[REVENUE_PREFIX]
+    cur_all = {**current, **{f"subtotal:{p}": v for p, v in subtotal_cur.items()}, "total": utilidad}
+    prev_all = {**previous, **{f"subtotal:{p}": v for p, v in subtotal_prev.items()}, "total": utilidad_prev}
+    vertical = calculate_vertical(cur_all, sales)
+    horizontal = calculate_horizontal(cur_all, prev_all)
+
+    def line(key, name, is_subtotal=False):
+        return _row(name, cur_all[key], prev_all[key], vertical[key], horizontal[key], has_previous, is_subtotal)
+
+    rows, open_block = [], None
+    for code in current:
+        block = str(code)[:1] if str(code)[:1] in SUBTOTALS else None
+        if open_block and block != open_block:
+            rows.append(line(f"subtotal:{open_block}", SUBTOTALS[open_block], is_subtotal=True))
+        open_block = block
+        rows.append(line(code, names[code]))
+    if open_block:
+        rows.append(line(f"subtotal:{open_block}", SUBTOTALS[open_block], is_subtotal=True))
+
+    return {
+        "rows": rows,
+        "totals": line("total", "Utilidad") if records else None,
+        "previous_year": year - 1 if has_previous else None,
+        "last_year": records[0]["last_year"] if records else None,
+        "total_ingresos": subtotal_cur[REVENUE_PREFIX],
+        "total_gastos": subtotal_cur[EXPENSE_PREFIX],
+        "utilidad": utilidad,
+    }
@@ -0,0 +1,266 @@
+# apps/core/resolvers.py
+"""
+Resolución de dimensiones compartida por todos los importadores.
+
+DimensionResolver precarga en diccionarios las llaves naturales de Company,
+Scenario, Period, Account y CostCenter y crea los miembros que falten por
+lotes (un INSERT por bloque, no uno por fila). Así cada comando resuelve sus
+filas con búsquedas en memoria y las reglas de llave natural son las mismas
+en todas partes:
+
+  - Company:    code; si no coincide, name. Las nuevas llevan code y name.
+  - Scenario:   (company, name), como su unique_together.
+  - Period:     (year, month).
+  - Account:    code (único).
+  - CostCenter: code (único).
+
+Uso típico por bloque:
+
+    resolver = DimensionResolver()
+    resolver.ensure_companies({(code, name) for ...})
+    resolver.ensure_periods({(year, month) for ...})
+    ...
+    company_id = resolver.company_id(code, name)
+
+Los métodos *_id crean el miembro si aún no existe, así que también sirven
+fila a fila (con una consulta solo la primera vez).
+"""
+import re
+
+from django.db import connection
+
+from apps.core.models import Account, Company, CostCenter, Period, Scenario
+
+DEFAULT_ACCOUNT_TYPE = "Expense"
+IN_BATCH = 500  # parámetros por consulta IN (límite de variables en SQLite)
+
+# Columnas NOT NULL que existen en tablas antiguas pero ya no en los modelos
+# (p. ej. core_account.level): al insertar se rellenan con estos valores.
+LEGACY_FILL = {"level": 1, "is_leaf": True, "is_active": True}
+
+# Año de 4 dígitos + mes, con o sin separador ('202401', '2024-01', '2024/01'...)
+PERIOD_CODE_RE = r"(\d{4})\D?(\d{1,2})"
+
+
+def parse_period_code(code: str) -> tuple[int, int]:
+    """
+    Acepta formatos:
+      - '202401', '2024-01', '2024/01', '2024_01', '2024 01'
+    """
+    if not code:
+        raise ValueError("period_code vacío")
+    m = re.search(PERIOD_CODE_RE, str(code))
+    if not m:
+        raise ValueError(f"period_code inválido: {code!r}")
+    y = int(m.group(1)); mth = int(m.group(2))
+    if not (1 <= mth <= 12):
+        raise ValueError(f"Mes inválido en period_code: {code!r}")
+    return y, mth
+
+
+def _in_batches(values, size: int = IN_BATCH):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def legacy_columns(model) -> dict:
+    """
+    {columna: valor} para las columnas NOT NULL sin default de la tabla real
+    que el modelo no declara. Vacío si la tabla coincide con el modelo.
+    """
+    model_columns = {f.column for f in model._meta.concrete_fields}
+    with connection.cursor() as cur:
+        description = connection.introspection.get_table_description(cur, model._meta.db_table)
+    out = {}
+    for col in description:
+        if col.name in model_columns or col.null_ok or getattr(col, "default", None) is not None:
+            continue
+        if col.name in LEGACY_FILL:
+            out[col.name] = LEGACY_FILL[col.name]
+    return out
+
+
+def insert_ignore(model, objs, extra: dict):
+    """
+    INSERT de instancias sin pasar por el ORM, añadiendo las columnas `extra`
+    (ver legacy_columns). Las filas que chocan con una restricción única se
+    ignoran, como bulk_create(ignore_conflicts=True).
+    """
+    fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+    columns = [f.column for f in fields] + list(extra)
+    qn = connection.ops.quote_name
+    placeholders = ", ".join(["%s"] * len(columns))
+    target = f"{qn(model._meta.db_table)} ({', '.join(qn(c) for c in columns)})"
+    if connection.vendor == "mysql":
+        sql = f"INSERT IGNORE INTO {target} VALUES ({placeholders})"
+    else:
+        sql = f"INSERT INTO {target} VALUES ({placeholders}) ON CONFLICT DO NOTHING"
+    params = []
+    for obj in objs:
+        row = [f.get_db_prep_save(f.pre_save(obj, True), connection) for f in fields]
+        params.append(row + list(extra.values()))
+    with connection.cursor() as cur:
+        cur.executemany(sql, params)
+
+
+def bulk_insert(model, objs, extra=None):
+    """
+    bulk_create(ignore_conflicts=True) que además rellena las columnas NOT
+    NULL heredadas de la tabla real (legacy_columns, o `extra` si ya se
+    calcularon): en una BD migrada desde el esquema antiguo un bulk_create
+    simple falla (p. ej. core_costcenter.level).
+    """
+    if extra is None:
+        extra = legacy_columns(model)
+    if extra:
+        insert_ignore(model, objs, extra)
+    else:
+        model.objects.bulk_create(objs, batch_size=IN_BATCH, ignore_conflicts=True)
+
+
+class DimensionResolver:
+    """Cachés de llaves naturales → id con creación por lotes de los que faltan."""
+
+    def __init__(self, default_company: str = "", default_account_type: str = DEFAULT_ACCOUNT_TYPE):
+        self.default_company = default_company
+        self.default_account_type = default_account_type
+        self.created = {"companies": 0, "scenarios": 0, "periods": 0, "accounts": 0, "centers": 0}
+        self._legacy = {}
+
+        self.companies_by_code = {}
+        self.companies_by_name = {}
+        for cid, code, name in Company.objects.order_by("-id").values_list("id", "code", "name"):
+            if code:
+                self.companies_by_code[code] = cid  # ante duplicados gana el de menor id
+            self.companies_by_name[name] = cid
+        self.scenarios = {
+            (company_id, name): sid
+            for sid, company_id, name in Scenario.objects.values_list("id", "company_id", "name")
+        }
+        self.periods = {(y, m): pid for pid, y, m in Period.objects.values_list("id", "year", "month")}
+        self.accounts = dict(Account.objects.values_list("code", "id"))
+        self.centers = dict(CostCenter.objects.values_list("code", "id"))
+
+    # -------------------- Creación por lotes --------------------
+
+    def _create(self, model, objs):
+        if model not in self._legacy:
+            self._legacy[model] = legacy_columns(model)
+        bulk_insert(model, objs, self._legacy[model])
+
+    def _company_key(self, code, name):
+        code = (code or name or self.default_company or "").strip()
+        name = (name or code).strip()
+        return code, name
+
+    def _find_company(self, code, name):
+        return self.companies_by_code.get(code) or self.companies_by_name.get(name)
+
+    def ensure_companies(self, keys):
+        """keys: iterable de (code, name); cualquiera de los dos puede venir vacío."""
+        missing = {}
+        for code, name in keys:
+            code, name = self._company_key(code, name)
+            if code and not self._find_company(code, name):
+                missing.setdefault(code, name)
+        if not missing:
+            return
+        self._create(Company, [Company(code=code, name=name) for code, name in missing.items()])
+        for codes in _in_batches(missing):
+            for cid, code, name in Company.objects.filter(code__in=codes).order_by("-id").values_list("id", "code", "name"):
+                self.companies_by_code[code] = cid
+                self.companies_by_name.setdefault(name, cid)
+        self.created["companies"] += len(missing)
+
+    def ensure_scenarios(self, keys):
+        """keys: iterable de (company_id, name)."""
+        missing = {(cid, name) for cid, name in keys if (cid, name) not in self.scenarios}
+        if not missing:
+            return
+        self._create(Scenario, [Scenario(company_id=cid, name=name) for cid, name in missing])
+        for batch in _in_batches(missing):
+            qs = Scenario.objects.filter(
+                company_id__in={cid for cid, _ in batch}, name__in={name for _, name in batch}
+            ).values_list("id", "company_id", "name")
+            for sid, company_id, name in qs:
+                self.scenarios[(company_id, name)] = sid
+        self.created["scenarios"] += len(missing)
+
+    def ensure_periods(self, keys):
+        """keys: iterable de (year, month)."""
+        missing = {key for key in keys if key not in self.periods}
+        if not missing:
+            return
+        self._create(Period, [Period(year=y, month=m) for y, m in missing])
+        years = {y for y, _ in missing}
+        for pid, y, m in Period.objects.filter(year__in=years).values_list("id", "year", "month"):
+            self.periods[(y, m)] = pid
+        self.created["periods"] += len(missing)
+
+    def ensure_accounts(self, keys):
+        """keys: iterable de (code, name, account_type); name y tipo son opcionales."""
+        missing = {}
+        for code, name, account_type in keys:
+            if code and code not in self.accounts:
+                missing.setdefault(code, (name or code, account_type or self.default_account_type))
+        if not missing:
+            return
+        self._create(Account, [
+            Account(code=code, name=name, account_type=account_type)
+            for code, (name, account_type) in missing.items()
+        ])
+        for codes in _in_batches(missing):
+            self.accounts.update(Account.objects.filter(code__in=codes).values_list("code", "id"))
+        self.created["accounts"] += len(missing)
+
+    def ensure_centers(self, keys):
+        """keys: iterable de (code, name)."""
+        missing = {}
+        for code, name in keys:
+            if code and code not in self.centers:
+                missing.setdefault(code, name or code)
+        if not missing:
+            return
+        self._create(CostCenter, [CostCenter(code=code, name=name) for code, name in missing.items()])
+        for codes in _in_batches(missing):
+            self.centers.update(CostCenter.objects.filter(code__in=codes).values_list("code", "id"))
+        self.created["centers"] += len(missing)
+
+    # -------------------- Búsquedas (crean si falta) --------------------
+
+    def company_id(self, code="", name=""):
+        code, name = self._company_key(code, name)
+        if not code:
+            return None
+        found = self._find_company(code, name)
+        if found is None:
+            self.ensure_companies([(code, name)])
+            found = self._find_company(code, name)
+        return found
+
+    def scenario_id(self, company_id, name):
+        key = (company_id, name)
+        if key not in self.scenarios:
+            self.ensure_scenarios([key])
+        return self.scenarios[key]
+
+    def period_id(self, year, month):
+        key = (year, month)
+        if key not in self.periods:
+            self.ensure_periods([key])
+        return self.periods[key]
+
+    def account_id(self, code, name="", account_type=None):
+        if not code:
+            return None
+        if code not in self.accounts:
+            self.ensure_accounts([(code, name, account_type)])
+        return self.accounts[code]
+
+    def center_id(self, code, name=""):
+        if not code:
+            return None
+        if code not in self.centers:
+            self.ensure_centers([(code, name)])
+        return self.centers[code]
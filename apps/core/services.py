@@ -1,19 +1,37 @@
 # apps/core/services.py
-from decimal import Decimal
+from decimal import ROUND_HALF_EVEN, Decimal
+
+import numpy as np
+
+from apps.core.classifier import ACCOUNT_NAME_RULES, SALES_NAME_RULES
+from apps.core.models import Scenario
+from apps.core.statements import build_statements
 
 # ========================
-# Report building functions (placeholders existentes)
+# Report building functions
 # ========================
+# Construyen y guardan el estado de todos los periodos del escenario
+# (apps.core.statements, una consulta + un upsert) y devuelven el último periodo.
+
+def _build(scenario_id: int, kind: str) -> list[dict]:
+    scenario = Scenario.objects.get(pk=scenario_id)
+    _, data = build_statements(scenario.company_id, scenario.id, kinds=(kind,))
+    return [values[kind] for values in data.values()]  # en orden cronológico
 
 def build_income_statement(scenario_id: int):
-    # TODO: implementar si necesitas un EERR estructurado más adelante
-    return {}
+    periods = _build(scenario_id, "IS")
+    return {k: float(v) for k, v in periods[-1].items()} if periods else {}
 
 def build_balance_sheet(scenario_id: int):
-    return {"total_assets": 0.0, "total_liabilities": 0.0, "total_equity": 0.0}
+    periods = _build(scenario_id, "BS")
+    last = periods[-1] if periods else {}
+    return {f: float(last.get(f, 0)) for f in ("total_assets", "total_liabilities", "total_equity")}
 
 def build_cash_flow(scenario_id: int):
-    return {"cash_begin": 0.0, "cash_net": 0.0, "cash_end": 0.0}
+    periods = _build(scenario_id, "CF")
+    cash_end = sum((p["net_change_cash"] for p in periods), Decimal("0"))
+    cash_net = periods[-1]["net_change_cash"] if periods else Decimal("0")
+    return {"cash_begin": float(cash_end - cash_net), "cash_net": float(cash_net), "cash_end": float(cash_end)}
 
 
 # ========================
@@ -43,92 +61,46 @@ def calculate_horizontal(current_data: dict, previous_data: dict) -> dict:
 
 
 # ========================
-# NUEVO: Categorización heurística y márgenes
+# Categorización y márgenes
 # ========================
 
+SALES_KEYS = ("Ventas", "Ingresos", "Sales", "Revenue")
+CATEGORIES = ("REVENUE", "COGS", "OPEX", "DA", "INTEREST", "TAX", "OTHER_OP", "OTHER_NP")
+
+
 def detect_sales_name(account_totals: dict) -> str | None:
-    for key in ("Ventas", "Ingresos", "Sales", "Revenue"):
+    for key in SALES_KEYS:
         if key in account_totals:
             return key
-    for k in account_totals.keys():
-        kl = (k or "").lower()
-        if ("venta" in kl) or ("ingres" in kl) or ("sales" in kl) or ("revenue" in kl):
-            return k
-    return None
+    return next((k for k in account_totals if k in SALES_NAME_RULES), None)
 
 
-def categorize_accounts(account_totals: dict[str, Decimal]) -> dict:
+def categorize_accounts(account_totals: dict[str, Decimal], groups: dict | None = None) -> dict:
     """
-    Heurística por nombre para agrupar cuentas.
+    Agrupa cuentas por categoría a partir del nombre.
     Devuelve dict con sumas por categoría y mapping por cuenta.
     Categorías: REVENUE, COGS, OPEX, DA, INTEREST, TAX, OTHER_OP, OTHER_NP
+
+    `groups` ({nombre: Account.group}, ver catalogs.reclassify_accounts)
+    tiene prioridad; si no, reglas compiladas de apps.core.classifier
+    (memorizadas por nombre). Lo que no clasifica va a OTHER_OP si es
+    positivo y a OTHER_NP si es negativo.
     """
-    sums = {
-        "REVENUE": Decimal("0"),
-        "COGS": Decimal("0"),
-        "OPEX": Decimal("0"),
-        "DA": Decimal("0"),
-        "INTEREST": Decimal("0"),
-        "TAX": Decimal("0"),
-        "OTHER_OP": Decimal("0"),
-        "OTHER_NP": Decimal("0"),
-    }
+    sums = {category: Decimal("0") for category in CATEGORIES}
     mapping = {}
+    groups = groups or {}
 
     sales_name = detect_sales_name(account_totals)
 
     for name, val in account_totals.items():
         amt = Decimal(val or 0)
-        n = (name or "").lower()
-
-        # Prioridades: revenue explícito
-        if sales_name and name == sales_name:
-            sums["REVENUE"] += amt
-            mapping[name] = "REVENUE"
-            continue
-        if any(k in n for k in ("ingres", "ventas", "sales", "revenue")):
-            sums["REVENUE"] += amt
-            mapping[name] = "REVENUE"
-            continue
-
-        # COGS
-        if any(k in n for k in ("costo", "cogs", "cost of goods")):
-            sums["COGS"] += amt
-            mapping[name] = "COGS"
-            continue
-
-        # Depreciación / Amortización
-        if any(k in n for k in ("deprec", "amort")):
-            sums["DA"] += amt
-            mapping[name] = "DA"
-            continue
-
-        # Intereses
-        if any(k in n for k in ("interes", "interest")):
-            sums["INTEREST"] += amt
-            mapping[name] = "INTEREST"
-            continue
-
-        # Impuestos
-        if any(k in n for k in ("impuest", "tax")):
-            sums["TAX"] += amt
-            mapping[name] = "TAX"
-            continue
-
-        # OPEX (operativos)
-        if any(k in n for k in ("gasto", "opex", "operac", "admin", "ventas ")):  # espacio evita confundir 'Ventas'
-            sums["OPEX"] += amt
-            mapping[name] = "OPEX"
-            continue
-
-        # Otros
-        # Heurística simple: si es positivo y no clasifica, OTHER_OP; si es negativo, OTHER_NP.
-        if amt >= 0:
-            sums["OTHER_OP"] += amt
-            mapping[name] = "OTHER_OP"
-        else:
-            sums["OTHER_NP"] += amt
-            mapping[name] = "OTHER_NP"
+        category = groups.get(name)
+        if category not in sums:
+            category = "REVENUE" if sales_name and name == sales_name else ACCOUNT_NAME_RULES.classify(name)
+        if category is None:
+            category = "OTHER_OP" if amt >= 0 else "OTHER_NP"
+        sums[category] += amt
+        mapping[name] = category
 
     return {"sums": sums, "mapping": mapping}
 
@@ -162,3 +134,143 @@ def compute_income_margins(cats: dict) -> dict:
         "EBIT": ebit,
         "NET_INCOME": net,
     }
+
+
+# ========================
+# Versiones por lotes (NumPy, centavos enteros)
+# ========================
+# Mismas fórmulas que calculate_vertical / calculate_horizontal /
+# compute_income_margins, pero sobre matrices cuentas × periodos (con ejes
+# delante para empresas, escenarios...). Los importes van como int64 en
+# centavos y los porcentajes como int64 en centésimas de punto (1234 =
+# 12.34 %), con división entera redondeada al par: el mismo resultado que
+# round(Decimal, 2) sin una división Decimal por celda.
+#
+# Sin pasos por float: los centavos salen de Decimal / str y los productos
+# que no caben en int64 (importes de más de ~9.2e12 al escalar a % de
+# centésimas) se calculan con enteros de Python (dtype object). Un resultado
+# que no cabe en int64 lanza OverflowError en lugar de desbordarse en
+# silencio.
+
+PCT_SCALE = 10000  # centavos -> centésimas de punto porcentual
+INT64_MAX = np.iinfo(np.int64).max
+
+
+def _cents(value) -> int:
+    if value is None:
+        return 0
+    d = value if isinstance(value, Decimal) else Decimal(str(value))
+    if d.is_nan():
+        return 0
+    if not d.is_finite():
+        raise OverflowError(f"Importe no finito: {value!r}")
+    return int((d * 100).to_integral_value(rounding=ROUND_HALF_EVEN))
+
+
+def _to_int64(arr) -> np.ndarray:
+    """Enteros (int64 u object) a int64; OverflowError si alguno no cabe."""
+    arr = np.asarray(arr)
+    if arr.dtype == object and arr.size and max(abs(int(v)) for v in arr.flat) > INT64_MAX:
+        raise OverflowError("El resultado no cabe en int64 (centavos / centésimas de punto)")
+    return arr.astype(np.int64)
+
+
+def _scaled(arr: np.ndarray, factor: int) -> np.ndarray:
+    """arr * factor exacto: int64 si cabe, si no enteros de Python (object)."""
+    if arr.size and int(np.abs(arr).max()) > INT64_MAX // factor:
+        return arr.astype(object) * factor
+    return arr * factor
+
+
+def to_cents(values) -> np.ndarray:
+    """
+    Importes (Decimal, str, float, int; None/NaN = 0) a int64 en centavos,
+    redondeo al par. Exacto: cada valor pasa por Decimal (los float por su
+    repr), nunca por aritmética float. OverflowError si no cabe en int64.
+    """
+    arr = np.asarray(values, dtype=object)
+    cents = np.empty(arr.shape, dtype=object)
+    cents.flat[:] = [_cents(v) for v in arr.flat]
+    return _to_int64(cents)
+
+
+def from_cents(cents: np.ndarray) -> np.ndarray:
+    """Centavos (o centésimas de punto) a float para mostrar."""
+    return np.asarray(cents) / 100
+
+
+def round_div(num, den) -> np.ndarray:
+    """
+    num / den redondeado al entero par más cercano (den != 0). Con int64
+    devuelve int64; con enteros de Python (object) calcula sin desbordes.
+    """
+    num, den = np.asarray(num), np.asarray(den)
+    dtype = object if object in (num.dtype, den.dtype) else np.int64
+    num, den = np.broadcast_arrays(num.astype(dtype), den.astype(dtype))
+    sign = np.where(den < 0, -1, 1)
+    num, den = num * sign, den * sign
+    q = num // den
+    r = num - q * den  # 0 <= r < den
+    twice = 2 * r
+    up = (twice > den) | ((twice == den) & (q % 2 == 1))
+    return q + up.astype(dtype)
+
+
+def calculate_vertical_batch(amounts_c, sales_c) -> np.ndarray:
+    """
+    Análisis vertical por lotes. amounts_c: (..., cuentas, periodos) en
+    centavos; sales_c: (..., periodos). Devuelve % sobre ventas en
+    centésimas de punto; 0 donde las ventas son 0 (como calculate_vertical).
+    """
+    amounts_c = np.asarray(amounts_c, dtype=np.int64)
+    sales_c = np.asarray(sales_c, dtype=np.int64)[..., np.newaxis, :]
+    safe = np.where(sales_c == 0, 1, sales_c)
+    return _to_int64(np.where(sales_c == 0, 0, round_div(_scaled(amounts_c, PCT_SCALE), safe)))
+
+
+def calculate_horizontal_batch(amounts_c, lag: int = 1) -> dict:
+    """
+    Análisis horizontal periodo contra periodo (`lag` columnas atrás) sobre
+    el último eje. Devuelve {"abs": centavos, "perc": centésimas de punto,
+    "has_perc": bool}; donde el anterior es 0 (o no existe, primeras `lag`
+    columnas) abs = importe actual y has_perc es False (perc None en
+    calculate_horizontal).
+    """
+    curr = np.asarray(amounts_c, dtype=np.int64)
+    prev = np.zeros_like(curr)
+    if lag < curr.shape[-1]:
+        prev[..., lag:] = curr[..., :-lag]
+    abs_var = curr - prev
+    has_perc = prev != 0
+    perc = _to_int64(np.where(has_perc, round_div(_scaled(abs_var, PCT_SCALE), np.where(has_perc, prev, 1)), 0))
+    return {"abs": abs_var, "perc": perc, "has_perc": has_perc}
+
+
+def categorize_accounts_batch(names: list, amounts_c, groups: dict | None = None) -> dict:
+    """
+    categorize_accounts por lotes: `names` (una por fila de amounts_c,
+    (..., cuentas, periodos)) -> {categoría: (..., periodos)} en centavos.
+    La categoría de cada nombre se resuelve una vez; las filas sin
+    categoría van a OTHER_OP u OTHER_NP celda a celda según el signo.
+    """
+    amounts_c = np.asarray(amounts_c, dtype=np.int64)
+    mapping = categorize_accounts(dict.fromkeys(names, 0), groups)["mapping"]
+    rows = np.array([mapping[n] for n in names])
+    other = np.isin(rows, ("OTHER_OP", "OTHER_NP"))
+    sums = {}
+    for category in CATEGORIES[:-2]:
+        sums[category] = amounts_c[..., rows == category, :].sum(axis=-2)
+    rest = amounts_c[..., other, :]
+    sums["OTHER_OP"] = np.where(rest >= 0, rest, 0).sum(axis=-2)
+    sums["OTHER_NP"] = np.where(rest < 0, rest, 0).sum(axis=-2)
+    return sums
+
+
+def compute_income_margins_batch(sums_c: dict) -> dict:
+    """compute_income_margins sobre arrays: {categoría: centavos} -> {margen: centavos}."""
+    s = {category: np.asarray(sums_c.get(category, 0), dtype=np.int64) for category in CATEGORIES}
+    gross = s["REVENUE"] - s["COGS"]
+    ebitda = gross - s["OPEX"]
+    ebit = ebitda - s["DA"]
+    net = ebit - s["INTEREST"] - s["TAX"] + s["OTHER_OP"] + s["OTHER_NP"]
+    return {"GROSS_PROFIT": gross, "EBITDA": ebitda, "EBIT": ebit, "NET_INCOME": net}
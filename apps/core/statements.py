@@ -0,0 +1,184 @@
+# apps/core/statements.py
+"""
+Construcción por lotes de IncomeStatement, BalanceSheet y CashFlowStatement.
+
+Para una empresa/escenario hay una sola consulta agrupada sobre
+FactMonthlyAggregate (FactFinance ya sumado por cuenta y mes). Las filas
+salen por (periodo, statement, group, natural_sign, measure); con ellas se
+arman en memoria los tres estados de todos los periodos. Después cada tabla
+se escribe con un único upsert (INSERT ... ON CONFLICT DO UPDATE sobre
+company/scenario/period). Los periodos que ya no tienen hechos se borran.
+
+Clasificación (campos de reporting de Account):
+  - statement: IS / BS / CF (con alias, ver STATEMENTS). Si está vacío se
+    deduce del grupo.
+  - group: línea del estado (INCOME_LINES, BALANCE_LINES, CASH_LINES,
+    comparados sin tildes ni mayúsculas). En IS, un grupo desconocido cuenta
+    como "otros" y suma al resultado antes de impuestos.
+  - natural_sign: valor de línea = importe × natural_sign (1 si no tiene),
+    así los costos guardados en negativo con natural_sign -1 quedan en
+    positivo y se restan con las fórmulas de services.compute_income_margins.
+  - measure: en BS, "flow" son movimientos y el saldo del periodo es el
+    acumulado hasta él; "balance" (o vacío) ya es saldo.
+"""
+import unicodedata
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+
+from apps.core.models import BalanceSheet, CashFlowStatement, FactMonthlyAggregate, IncomeStatement, Scenario
+from apps.core.resolvers import IN_BATCH
+
+STATEMENTS = {
+    "IS": "IS", "PL": "IS", "ER": "IS", "EERR": "IS",
+    "BS": "BS", "BG": "BS", "ESF": "BS",
+    "CF": "CF", "EFE": "CF", "FC": "CF",
+}
+INCOME_LINES = {
+    "REVENUE": "revenue", "INGRESOS": "revenue", "VENTAS": "revenue", "SALES": "revenue",
+    "COGS": "cogs", "COSTO": "cogs", "COSTOS": "cogs", "COSTO DE VENTAS": "cogs",
+    "OPEX": "opex", "GASTOS": "opex", "GASTOS OPERATIVOS": "opex",
+    "DA": "depreciation", "DEPR": "depreciation", "DEPRECIACION": "depreciation",
+    "INTEREST": "interest", "FIN": "interest", "INTERESES": "interest",
+    "TAX": "tax", "IMPUESTOS": "tax",
+}
+BALANCE_LINES = {
+    "ASSETS": "total_assets", "ACTIVO": "total_assets", "ACTIVOS": "total_assets",
+    "LIABILITIES": "total_liabilities", "PASIVO": "total_liabilities", "PASIVOS": "total_liabilities",
+    "EQUITY": "total_equity", "PATRIMONIO": "total_equity", "CAPITAL": "total_equity",
+}
+CASH_LINES = {
+    "CFO": "cfo", "OPERATING": "cfo", "OPERACION": "cfo",
+    "CFI": "cfi", "INVESTING": "cfi", "INVERSION": "cfi",
+    "CFF": "cff", "FINANCING": "cff", "FINANCIAMIENTO": "cff",
+}
+LINES = {"IS": INCOME_LINES, "BS": BALANCE_LINES, "CF": CASH_LINES}
+OTHER = "other"
+
+ZERO = Decimal("0")
+KEY_FIELDS = ["company", "scenario", "period"]
+
+
+def _norm(value) -> str:
+    text = unicodedata.normalize("NFKD", str(value or "")).encode("ascii", "ignore").decode()
+    return " ".join(text.upper().split())
+
+
+def classify(statement, group) -> tuple[str, str] | None:
+    """(estado, línea) de una cuenta, o None si no entra en ningún estado."""
+    stmt = STATEMENTS.get(_norm(statement))
+    grp = _norm(group)
+    if stmt is None:
+        stmt = next((s for s, lines in LINES.items() if grp in lines), None)
+        if stmt is None:
+            return None
+    line = LINES[stmt].get(grp)
+    if line is None:
+        return (stmt, OTHER) if stmt == "IS" else None
+    return stmt, line
+
+
+def _income(v: dict) -> dict:
+    gross = v["revenue"] - v["cogs"]
+    ebitda = gross - v["opex"]
+    ebit = ebitda - v["depreciation"]
+    ebt = ebit - v["interest"] + v[OTHER]
+    return {
+        "revenue": v["revenue"], "cogs": v["cogs"], "gross_profit": gross,
+        "opex": v["opex"], "ebitda": ebitda, "depreciation": v["depreciation"],
+        "ebit": ebit, "interest": v["interest"], "ebt": ebt, "tax": v["tax"],
+        "net_income": ebt - v["tax"],
+    }
+
+
+def _cash(v: dict) -> dict:
+    return {"cfo": v["cfo"], "cfi": v["cfi"], "cff": v["cff"], "net_change_cash": v["cfo"] + v["cfi"] + v["cff"]}
+
+
+def compute_statements(company_id, scenario_id) -> dict:
+    """
+    {period_id: {"IS": {...}, "BS": {...}, "CF": {...}}} con los campos de
+    cada modelo (Decimal), para todos los periodos con hechos. Una consulta.
+    """
+    rows = (
+        FactMonthlyAggregate.objects
+        .filter(company_id=company_id, scenario_id=scenario_id)
+        .values(
+            "period_id", "period__year", "period__month",
+            "account__statement", "account__group", "account__natural_sign", "account__measure",
+        )
+        .annotate(total=Sum("amount"))
+        .order_by()
+    )
+    flows = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: ZERO)))  # period -> stmt -> line
+    stocks = defaultdict(lambda: defaultdict(lambda: ZERO))  # period -> línea BS acumulada por movimientos
+    order = {}
+    for r in rows:
+        order[r["period_id"]] = (r["period__year"], r["period__month"])
+        where = classify(r["account__statement"], r["account__group"])
+        if where is None:
+            continue
+        stmt, line = where
+        value = (r["total"] or ZERO) * (r["account__natural_sign"] or 1)
+        if stmt == "BS" and _norm(r["account__measure"]) == "FLOW":
+            stocks[r["period_id"]][line] += value
+        else:
+            flows[r["period_id"]][stmt][line] += value
+
+    out, running = {}, defaultdict(lambda: ZERO)
+    for period_id in sorted(order, key=order.get):
+        for line, value in stocks[period_id].items():
+            running[line] += value
+        lines = flows[period_id]
+        balance = {f: lines["BS"][f] + running[f] for f in dict.fromkeys(BALANCE_LINES.values())}
+        out[period_id] = {
+            "IS": _income(lines["IS"]),
+            "BS": balance,
+            "CF": _cash(lines["CF"]),
+        }
+    return out
+
+
+STATEMENT_MODELS = {"IS": IncomeStatement, "BS": BalanceSheet, "CF": CashFlowStatement}
+
+
+def build_statements(company_id, scenario_id, kinds=("IS", "BS", "CF")) -> tuple[dict, dict]:
+    """
+    Recalcula y guarda los estados `kinds` de todos los periodos de la
+    empresa/escenario. Devuelve (stats, data): stats = {"periods": n,
+    "IS": filas, ...} y data el resultado de compute_statements.
+    """
+    data = compute_statements(company_id, scenario_id)
+    stats = {"periods": len(data)}
+    with transaction.atomic():
+        for kind in kinds:
+            model = STATEMENT_MODELS[kind]
+            objs = [
+                model(
+                    company_id=company_id, scenario_id=scenario_id, period_id=period_id,
+                    **{f: float(v) for f, v in values[kind].items()},
+                )
+                for period_id, values in data.items()
+            ]
+            model.objects.filter(company_id=company_id, scenario_id=scenario_id).exclude(
+                period_id__in=list(data)
+            ).delete()
+            if objs:
+                model.objects.bulk_create(
+                    objs,
+                    update_conflicts=True,
+                    unique_fields=KEY_FIELDS,
+                    update_fields=list(data[objs[0].period_id][kind]),
+                    batch_size=IN_BATCH,
+                )
+            stats[kind] = len(objs)
+    return stats, data
+
+
+def build_all_statements(scenarios=None) -> list[tuple]:
+    """build_statements para cada escenario indicado (por defecto todos): [(scenario, stats)]."""
+    if scenarios is None:
+        scenarios = Scenario.objects.order_by("company_id", "id")
+    return [(s, build_statements(s.company_id, s.id)[0]) for s in scenarios]
@@ -0,0 +1,247 @@
+# apps/core/synthetic.py
+"""
+Datos sintéticos con el esquema exacto de las plantillas, para medir los
+importadores con volúmenes realistas.
+
+Los hechos son el producto cartesiano companies × accounts × centers ×
+periods × scenarios, así que el tamaño se controla con esos cinco factores:
+
+    generate_dataset(out_dir, SyntheticSpec(companies=5, accounts=200, centers=20,
+                                            periods=24, scenarios=3))
+
+Además de las plantillas de import_fin_data / apply_fin_templates se escriben
+assumptions.csv, revenue_drivers.csv y expenses.csv (formato de import_csv) y
+un synthetic.json con el tamaño pedido y las filas escritas por archivo.
+Con la misma semilla el resultado es idéntico.
+"""
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# (prefijo de código, account_type, nombre, signo natural, peso en el catálogo)
+ACCOUNT_GROUPS = [
+    ("4", "Revenue", "Ventas", 1, 0.10),
+    ("5", "COGS", "Costo de ventas", -1, 0.15),
+    ("6", "Expense", "Gasto operativo", -1, 0.55),
+    ("7", "Depreciation", "Depreciación", -1, 0.05),
+    ("8", "Interest", "Gasto financiero", -1, 0.05),
+    ("9", "Tax", "Impuesto", -1, 0.10),
+]
+SCENARIOS = [("Base", "base", 1.0), ("Optimista", "upside", 1.08), ("Pesimista", "downside", 0.9)]
+ASSUMPTION_KEYS = ["growth_rate", "gross_margin", "opex_ratio", "tax_rate", "dso_days", "dpo_days"]
+EXPENSE_ITEMS = [
+    ("SUELDOS", "Sueldos y salarios", "fixed"),
+    ("ARRIENDO", "Arriendo", "fixed"),
+    ("MARKETING", "Marketing", "percent_of_sales"),
+    ("COMISIONES", "Comisiones de venta", "percent_of_sales"),
+    ("SERVICIOS", "Servicios básicos", "fixed"),
+]
+PRODUCTS_PER_COMPANY = 5
+
+
+@dataclass
+class SyntheticSpec:
+    companies: int = 2
+    accounts: int = 50
+    centers: int = 5
+    periods: int = 12
+    scenarios: int = 1
+    start_year: int = 2023
+    seed: int = 42
+
+    @property
+    def fact_rows(self) -> int:
+        return self.companies * self.accounts * self.centers * self.periods * self.scenarios
+
+
+def _write(df: pd.DataFrame, path: Path, header: bool = True):
+    if header:
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+    else:
+        df.to_csv(path, index=False, header=False, mode="a", encoding="utf-8")
+
+
+def _accounts(n: int) -> pd.DataFrame:
+    weights = np.array([g[4] for g in ACCOUNT_GROUPS])
+    per_group = np.maximum(1, np.floor(weights / weights.sum() * n)).astype(int)
+    per_group[2] += n - per_group.sum()  # el resto a gastos operativos
+    rows = []
+    for (prefix, account_type, name, sign, _), count in zip(ACCOUNT_GROUPS, per_group):
+        for i in range(max(0, count)):
+            rows.append({
+                "account_code": f"{prefix}{i + 1:04d}",
+                "account_name": f"{name} {i + 1}",
+                "account_type": account_type,
+                "parent_code": "",
+                "level": 1,
+                "is_leaf": True,
+                "sign": sign,
+            })
+    return pd.DataFrame(rows[:n])
+
+
+def _periods(spec: SyntheticSpec) -> pd.DataFrame:
+    idx = np.arange(spec.periods)
+    years = spec.start_year + idx // 12
+    months = idx % 12 + 1
+    start = pd.to_datetime({"year": years, "month": months, "day": 1})
+    return pd.DataFrame({
+        "period_code": [f"{y}{m:02d}" for y, m in zip(years, months)],
+        "year": years,
+        "month": months,
+        "start_date": start.dt.strftime("%Y-%m-%d"),
+        "end_date": (start + pd.offsets.MonthEnd(0)).dt.strftime("%Y-%m-%d"),
+        "is_open": False,
+    })
+
+
+def generate_dataset(out_dir: Path, spec: SyntheticSpec, chunk_rows: int = 500_000) -> dict:
+    """
+    Escribe el conjunto completo en `out_dir` y devuelve el manifiesto
+    ({"spec": ..., "files": {archivo: filas}}). Los hechos se generan por
+    compañía y escenario: cada bloque accounts × centers × periods se arma
+    entero en memoria (crece con esos tres factores, no con companies ni
+    scenarios) y `chunk_rows` solo limita el tamaño de cada escritura al CSV.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(spec.seed)
+    files = {}
+
+    companies = pd.DataFrame({
+        "company_code": [f"CIA{i + 1:03d}" for i in range(spec.companies)],
+        "company_name": [f"Compañía {i + 1}" for i in range(spec.companies)],
+        "currency": "USD",
+        "is_active": True,
+    })
+    accounts = _accounts(spec.accounts)
+    centers = pd.DataFrame({
+        "center_code": [f"{10000 + i}" for i in range(spec.centers)],
+        "center_name": [f"Centro {i + 1}" for i in range(spec.centers)],
+        "parent_code": "",
+        "level": 1,
+        "is_active": True,
+    })
+    periods = _periods(spec)
+    scenario_defs = [SCENARIOS[i % len(SCENARIOS)] for i in range(spec.scenarios)]
+    scenario_defs = [
+        (name if i < len(SCENARIOS) else f"{name}{i // len(SCENARIOS) + 1}", kind, factor)
+        for i, (name, kind, factor) in enumerate(scenario_defs)
+    ]
+    scenarios = pd.DataFrame([
+        {"scenario_code": name, "scenario_name": name, "kind": kind,
+         "company_code": c, "company_name": n, "name": name}
+        for c, n in zip(companies["company_code"], companies["company_name"])
+        for name, kind, _ in scenario_defs
+    ])
+
+    catalogs = {
+        "companies.csv": companies,
+        "accounts.csv": accounts.drop(columns="sign"),
+        "cost_centers.csv": centers,
+        "centers.csv": centers.rename(columns={"center_code": "code", "center_name": "name"})[["code", "name"]],
+        "periods.csv": periods,
+        "scenarios.csv": scenarios,
+    }
+    for fname, df in catalogs.items():
+        _write(df, out_dir / fname)
+        files[fname] = len(df)
+
+    # Plantillas que import_fin_data exige aunque el benchmark no las use
+    empty = {
+        "drivers.csv": ["driver_code", "driver_name", "category", "unit"],
+        "kpis.csv": ["kpi_code", "kpi_name", "formula", "unit", "sign", "direction"],
+        "kpi_targets.csv": ["kpi_code", "period_code", "target_value", "lower_bound", "upper_bound"],
+        "kpi_framework_links.csv": ["kpi_code", "framework_slug", "section_slug", "rationale"],
+        "projections_input.csv": ["company_code", "year", "driver_code", "driver_name", "assumption", "value", "note"],
+    }
+    for fname, cols in empty.items():
+        _write(pd.DataFrame(columns=cols), out_dir / fname)
+        files[fname] = 0
+
+    # --- hechos: accounts × centers × periods por compañía y escenario --------
+    # Columnas de ambos importadores: period_code/scenario_code/center_code
+    # (import_fin_data) y year/month/account_name (apply_fin_templates).
+    n_acc, n_cen, n_per = len(accounts), len(centers), len(periods)
+    acc_idx = np.repeat(np.arange(n_acc), n_cen * n_per)
+    cen_idx = np.tile(np.repeat(np.arange(n_cen), n_per), n_acc)
+    per_idx = np.tile(np.arange(n_per), n_acc * n_cen)
+    season = 1 + 0.15 * np.sin(2 * np.pi * (periods["month"].to_numpy() - 3) / 12)
+    trend = 1.01 ** np.arange(n_per)
+    sign = accounts["sign"].to_numpy()
+
+    block = pd.DataFrame({
+        "period_code": periods["period_code"].to_numpy()[per_idx],
+        "year": periods["year"].to_numpy()[per_idx],
+        "month": periods["month"].to_numpy()[per_idx],
+        "account_code": accounts["account_code"].to_numpy()[acc_idx],
+        "account_name": accounts["account_name"].to_numpy()[acc_idx],
+        "center_code": centers["center_code"].to_numpy()[cen_idx],
+    })
+    fact_path = out_dir / "facts_finance.csv"
+    header, rows = True, 0
+    for company in companies["company_code"]:
+        # Escala por cuenta y centro: cada compañía tiene su propio "tamaño"
+        scale = rng.lognormal(mean=9.0, sigma=1.2, size=(n_acc, n_cen))
+        base = scale[acc_idx, cen_idx] * season[per_idx] * trend[per_idx] * sign[acc_idx]
+        for scenario, _, factor in scenario_defs:
+            noise = rng.normal(1.0, 0.05, size=len(block))
+            df = block.assign(
+                company_code=company,
+                scenario_code=scenario,
+                amount=np.round(base * factor * noise, 2),
+            )[["company_code", "period_code", "year", "month", "account_code", "account_name",
+               "center_code", "scenario_code", "amount"]]
+            for start in range(0, len(df), chunk_rows):
+                _write(df.iloc[start:start + chunk_rows], fact_path, header)
+                header = False
+            rows += len(df)
+    if header:
+        _write(pd.DataFrame(columns=["company_code", "period_code", "year", "month", "account_code",
+                                     "account_name", "center_code", "scenario_code", "amount"]), fact_path)
+    files["facts_finance.csv"] = rows
+
+    # --- datasets de import_csv -------------------------------------------------
+    iso = [f"{y}-{m:02d}-01" for y, m in zip(periods["year"], periods["month"])]
+    grid = [(c, s, p) for c in companies["company_code"] for s, _, _ in scenario_defs for p in iso]
+
+    assumptions = pd.DataFrame(
+        [(c, s, p, k) for c, s, p in grid for k in ASSUMPTION_KEYS],
+        columns=["company", "scenario", "period", "key"],
+    )
+    assumptions["value"] = np.round(rng.uniform(0.01, 0.6, size=len(assumptions)), 4)
+    assumptions["unit"] = "ratio"
+    assumptions["notes"] = ""
+
+    drivers = pd.DataFrame(
+        [(c, s, p, f"Producto {i + 1}") for c, s, p in grid for i in range(PRODUCTS_PER_COMPANY)],
+        columns=["company", "scenario", "period", "product"],
+    )
+    drivers["price"] = np.round(rng.uniform(5, 500, size=len(drivers)), 2)
+    drivers["units"] = rng.integers(10, 5000, size=len(drivers))
+    drivers["currency"] = "USD"
+    drivers["notes"] = ""
+
+    expenses = pd.DataFrame(
+        [(c, s, p, code, name, kind) for c, s, p in grid for code, name, kind in EXPENSE_ITEMS],
+        columns=["company", "scenario", "period", "line_item_code", "line_item_name", "driver_type"],
+    )
+    expenses["value"] = np.where(
+        expenses["driver_type"] == "fixed",
+        np.round(rng.uniform(1_000, 50_000, size=len(expenses)), 2),
+        np.round(rng.uniform(0.01, 0.1, size=len(expenses)), 4),
+    )
+    expenses["currency"] = "USD"
+    expenses["notes"] = ""
+
+    for fname, df in {"assumptions.csv": assumptions, "revenue_drivers.csv": drivers,
+                      "expenses.csv": expenses}.items():
+        _write(df, out_dir / fname)
+        files[fname] = len(df)
+
+    manifest = {"spec": asdict(spec), "files": files}
+    (out_dir / "synthetic.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
@@ -1,6 +1,6 @@
 # apps/core/urls.py
 from django.urls import path, re_path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path("", views.home, name="home"),
@@ -8,4 +8,15 @@ urlpatterns = [
 
     # Estado de Resultados (con y sin "/")
     re_path(r"^reports/income/?$", views.income_report, name="income-report"),
+
+    # Exportaciones (apps.core.exports)
+    path("exports/facts/", views.export_facts, name="export-facts"),
+    path("exports/income/", views.export_income, name="export-income"),
+
+    # API de lectura (apps.core.api)
+    path("api/facts/", api.FactListView.as_view(), name="api-facts"),
+    path("api/statements/monthly/", api.MonthlyStatementListView.as_view(), name="api-statements-monthly"),
+    path("api/statements/<slug:kind>/", api.StatementListView.as_view(), name="api-statements"),
+    path("api/kpis/", api.KPIListView.as_view(), name="api-kpis"),
+    path("api/pivot/", api.PivotView.as_view(), name="api-pivot"),
 ]
@@ -0,0 +1,186 @@
+# apps/core/validation.py
+"""
+Validación columnar de hechos antes de cargarlos.
+
+En lugar de parsear fila a fila dentro de la transacción (try/except por fila
+y un mensaje a stderr por cada error), cada bloque se valida de una vez como
+DataFrame: campos obligatorios, period_code (mismas reglas que
+parse_period_code) e importe (numérico y dentro del rango de
+FactFinance.amount). El cargador solo recibe filas limpias y
+tipadas; las inválidas van a un CSV de rechazos con su número de fila y los
+motivos, para corregirlas y volver a importarlas.
+"""
+import re
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from apps.core.models import FactFinance
+from apps.core.resolvers import PERIOD_CODE_RE
+
+FACT_COLUMNS = ["company_code", "period_code", "account_code", "center_code", "scenario_code", "amount"]
+REQUIRED_FACT_COLUMNS = ["company_code", "period_code", "account_code", "scenario_code"]
+# Rango de FactFinance.amount: max_digits - decimal_places dígitos enteros tras redondear a centavos
+_AMOUNT_FIELD = FactFinance._meta.get_field("amount")
+AMOUNT_QUANTUM = Decimal(1).scaleb(-_AMOUNT_FIELD.decimal_places)
+AMOUNT_LIMIT = Decimal(10) ** (_AMOUNT_FIELD.max_digits - _AMOUNT_FIELD.decimal_places)
+
+
+def _text(s: pd.Series) -> pd.Series:
+    return s.fillna("").astype(str).str.strip()
+
+
+def _decimal(v: str):
+    try:
+        return Decimal(v)
+    except InvalidOperation:
+        return None
+
+
+def _in_range(v: Decimal) -> bool:
+    try:
+        return abs(v.quantize(AMOUNT_QUANTUM)) < AMOUNT_LIMIT
+    except InvalidOperation:  # exponente fuera del contexto decimal: demasiado grande
+        return False
+
+
+def validate_facts(chunk: list[dict], first_row: int = 1) -> tuple[list[tuple], pd.DataFrame]:
+    """
+    Valida un bloque de filas de facts_finance (dicts de texto o tipados).
+
+    Devuelve (válidas, rechazadas):
+      - válidas: tuplas (company, (year, month), account, center, scenario, amount)
+        con year/month int y amount Decimal, en el orden del archivo.
+      - rechazadas: DataFrame con `row` (número de fila de datos, desde
+        `first_row`), `reason` y las columnas originales.
+    """
+    df = pd.DataFrame.from_records(chunk)
+    for col in FACT_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    text = {col: _text(df[col]) for col in FACT_COLUMNS if col != "amount"}
+    reason = pd.Series("", index=df.index)
+
+    def flag(mask, msg):
+        nonlocal reason
+        reason = reason.mask(mask, reason + msg + "; ")
+
+    for col in REQUIRED_FACT_COLUMNS:
+        flag(text[col] == "", f"{col} vacío")
+
+    period = text["period_code"].str.extract(PERIOD_CODE_RE)
+    year = pd.to_numeric(period[0])
+    month = pd.to_numeric(period[1])
+    flag((text["period_code"] != "") & year.isna(), "period_code inválido")
+    flag(month.notna() & ~month.between(1, 12), "mes inválido en period_code")
+
+    amount_text = _text(df["amount"]).str.replace(",", "", regex=False)
+    numeric = pd.to_numeric(amount_text, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    amounts = [
+        _decimal(v) if finite else None
+        for v, finite in zip(amount_text.tolist(), np.isfinite(numeric))
+    ]
+    flag(pd.Series(amounts, index=df.index, dtype=object).isna(), "amount inválido")
+    # Solo los importes grandes (según el float) se comprueban exactos con Decimal
+    large = np.flatnonzero(np.abs(np.nan_to_num(numeric)) >= float(AMOUNT_LIMIT) / 10)
+    out_of_range = np.zeros(len(df), dtype=bool)
+    out_of_range[[i for i in large if amounts[i] is not None and not _in_range(amounts[i])]] = True
+    flag(pd.Series(out_of_range, index=df.index), "amount fuera de rango")
+
+    ok = (reason == "").to_numpy()
+    valid = list(zip(
+        text["company_code"][ok].tolist(),
+        zip(year[ok].astype(int).tolist(), month[ok].astype(int).tolist()),
+        text["account_code"][ok].tolist(),
+        text["center_code"][ok].tolist(),
+        text["scenario_code"][ok].tolist(),
+        [a for a, keep in zip(amounts, ok) if keep],
+    ))
+
+    rejected = df[~ok]
+    rejected.insert(0, "reason", reason[~ok].str.rstrip("; "))
+    rejected.insert(0, "row", np.flatnonzero(~ok) + first_row)
+    return valid, rejected
+
+
+class RejectWriter:
+    """
+    CSV de filas rechazadas. Se crea con la primera fila rechazada (sin
+    rechazos no queda archivo); con `append` (importación reanudada) se
+    añade al archivo existente en lugar de reemplazarlo.
+    """
+
+    def __init__(self, path: Path, append: bool = False):
+        self.path = Path(path)
+        self.count = 0
+        self._header = not (append and self.path.exists())
+        if not append:
+            self.path.unlink(missing_ok=True)
+
+    def write(self, rejected: pd.DataFrame):
+        if rejected.empty:
+            return
+        if self._header:
+            rejected.to_csv(self.path, index=False, encoding="utf-8-sig")
+            self._header = False
+        else:
+            rejected.to_csv(self.path, index=False, header=False, mode="a", encoding="utf-8")
+        self.count += len(rejected)
+
+
+# --- muestreo de tipos (validación rápida) ------------------------------------
+
+BOOL_TEXT = {"1", "0", "true", "false", "t", "f", "yes", "no", "y", "n", "si", "sí"}
+
+
+def _is_int(v) -> bool:
+    try:
+        return float(v) == int(float(v))
+    except (TypeError, ValueError, OverflowError):
+        return False
+
+
+def _is_decimal(v) -> bool:
+    d = _decimal(str(v).replace(",", "").strip())
+    return d is not None and d.is_finite()
+
+
+def _is_period(v) -> bool:
+    m = re.search(PERIOD_CODE_RE, str(v))
+    return bool(m) and 1 <= int(m.group(2)) <= 12
+
+
+def _is_date(v) -> bool:
+    return not pd.isna(pd.to_datetime(str(v), errors="coerce", format="mixed"))
+
+
+TYPE_CHECKS = {
+    "int": _is_int,
+    "decimal": _is_decimal,
+    "bool": lambda v: isinstance(v, bool) or str(v).strip().lower() in BOOL_TEXT,
+    "period": _is_period,
+    "date": _is_date,
+}
+
+
+def sample_type_errors(sample: list[tuple[int, dict]], types: dict) -> list[str]:
+    """
+    Revisa una muestra de filas (ver apps.core.readers.sample_rows) contra
+    `types` ({columna: "int" | "decimal" | "bool" | "period" | "date"}).
+    Los vacíos no se consideran error. Devuelve un mensaje por valor inválido.
+    """
+    errors = []
+    for offset, row in sample:
+        where = f"byte {offset}" if offset >= 0 else "muestra"
+        if None in row:
+            errors.append(f"{where}: {row[None]}")
+            continue
+        for col, kind in types.items():
+            v = row.get(col)
+            if v is None or (isinstance(v, str) and not v.strip()):
+                continue
+            if not TYPE_CHECKS[kind](v):
+                errors.append(f"{where}: {col}={v!r} no es {kind}")
+    return errors
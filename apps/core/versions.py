@@ -0,0 +1,61 @@
+# apps/core/versions.py
+"""
+Versiones de datos por ámbito (DataVersion), para las validaciones HTTP
+condicionales de los reportes.
+
+Quien cambia datos sube la versión del ámbito afectado:
+
+  - facts:<company>:<scenario>:<year>  al refrescar los agregados de ese año
+  - facts:<company>:<scenario>         al refrescar cualquier año (cambia la lista de años)
+  - accounts                           al crear o modificar cuentas del catálogo
+  - companies / scenarios              al editar empresas o escenarios (admin)
+
+Los reportes construyen su ETag / Last-Modified con las versiones de los
+ámbitos que leen (current_versions), así que un cliente que ya tiene la
+respuesta recibe 304 sin que se ejecute ninguna agregación.
+"""
+from django.db.models import F
+from django.utils import timezone
+
+from apps.core.models import DataVersion
+from apps.core.resolvers import IN_BATCH, _in_batches
+
+ACCOUNTS = "accounts"
+COMPANIES = "companies"
+SCENARIOS = "scenarios"
+
+
+def facts_key(company_id, scenario_id, year=None) -> str:
+    if year is None:
+        return f"facts:{company_id}:{scenario_id}"
+    return f"facts:{company_id}:{scenario_id}:{year}"
+
+
+def bump(keys):
+    """Incrementa la versión de cada clave (la crea en 1 si no existía)."""
+    keys = set(keys)
+    if not keys:
+        return
+    now = timezone.now()
+    for batch in _in_batches(keys):
+        DataVersion.objects.filter(key__in=batch).update(version=F("version") + 1, updated_at=now)
+    DataVersion.objects.bulk_create(
+        [DataVersion(key=key, version=1, updated_at=now) for key in keys],
+        batch_size=IN_BATCH,
+        ignore_conflicts=True,
+    )
+
+
+def bump_prefix(prefix: str):
+    """Incrementa todas las versiones cuyo ámbito empieza por `prefix` (reconstrucciones completas)."""
+    DataVersion.objects.filter(key__startswith=prefix).update(version=F("version") + 1, updated_at=timezone.now())
+
+
+def current_versions(keys) -> dict:
+    """{clave: (version, updated_at)}; las claves sin registro no aparecen."""
+    return {
+        key: (version, updated_at)
+        for key, version, updated_at in DataVersion.objects.filter(key__in=list(keys)).values_list(
+            "key", "version", "updated_at"
+        )
+    }
@@ -1,7 +1,17 @@
 # apps/core/views.py
+import hashlib
+
+from django.http import FileResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render, redirect
-from django.db.models import Sum
-from .models import Company, Scenario, FactFinance
+from django.views.decorators.http import condition
+from rest_framework.exceptions import ValidationError
+from .exports import EXPORT_FORMATS, fact_export, filter_error, income_export, stream_csv, xlsx_tempfile
+from .models import Company, Scenario, FactYearlyAggregate
+from .reports import income_statement
+from .versions import ACCOUNTS, COMPANIES, SCENARIOS, current_versions, facts_key
+
+# Subir si cambia el template o el cálculo del reporte (invalida los ETag ya emitidos)
+INCOME_ETAG_SALT = "income-v1"
 
 def _pick_defaults():
     """
@@ -12,6 +22,45 @@ def _pick_defaults():
     scenario = Scenario.objects.filter(name="Base").first() or Scenario.objects.order_by("id").first()
     return company, scenario
 
+def _income_validators(request):
+    """
+    (etag, last_modified) del EERR pedido, o None si la petición no es de un
+    año concreto (redirecciones y mensajes se generan siempre).
+    Sale de las versiones de datos (apps.core.versions) del año, de la lista
+    de años y de los catálogos que muestra (cuentas, empresas, escenarios):
+    un par de consultas, sin agregación.
+    Se calcula una vez por petición (lo usan ambos validadores).
+    """
+    if hasattr(request, "_income_validators"):
+        return request._income_validators
+    result = None
+    company, scenario = _pick_defaults()
+    year = request.GET.get("year", "")
+    if company and scenario and year.isdigit():
+        keys = [
+            facts_key(company.id, scenario.id, int(year)), facts_key(company.id, scenario.id),
+            ACCOUNTS, COMPANIES, SCENARIOS,
+        ]
+        versions = current_versions(keys)
+        tag = ":".join(
+            [INCOME_ETAG_SALT, str(company.id), str(scenario.id), year]
+            + [str(versions.get(k, (0, None))[0]) for k in keys]
+        )
+        stamps = [updated_at for _, updated_at in versions.values() if updated_at]
+        result = (hashlib.md5(tag.encode()).hexdigest(), max(stamps) if stamps else None)
+    request._income_validators = result
+    return result
+
+
+def _income_etag(request, *args, **kwargs):
+    validators = _income_validators(request)
+    return validators[0] if validators else None
+
+
+def _income_last_modified(request, *args, **kwargs):
+    validators = _income_validators(request)
+    return validators[1] if validators else None
+
 # ====== VISTAS QUE USAN TUS TEMPLATES EXISTENTES ======
 
 def home(request):
@@ -24,11 +73,17 @@ def foundation(request):
 
 # ====== EERR (tal como lo tenías, solo renderiza reports/income.html) ======
 
+@condition(etag_func=_income_etag, last_modified_func=_income_last_modified)
 def income_report(request):
     """
     Mini Estado de Resultados.
     - Si no viene ?year=YYYY redirige al último año disponible.
-    - Suma por cuenta y calcula totales simples por prefijo (4=ingresos, 5=gastos).
+    - Comparativo contra el año anterior con subtotales (4=ingresos, 5=gastos),
+      % sobre ventas y variaciones: apps.core.reports.income_statement, una
+      sola consulta sobre los agregados (no FactFinance).
+    - GET condicional: ETag / Last-Modified salen de las versiones de datos
+      del año (_income_validators); si el cliente ya tiene esa versión
+      responde 304 sin ejecutar la agregación.
     Renderiza reports/income.html (extiende base con sidebar).
     """
     company, scenario = _pick_defaults()
@@ -45,14 +100,14 @@ def income_report(request):
             "msg": "Faltan datos de empresa o escenario."
         })
 
-    base_qs = FactFinance.objects.filter(company=company, scenario=scenario)
+    years_qs = FactYearlyAggregate.objects.filter(company=company, scenario=scenario)
 
     year_param = request.GET.get("year")
     if not year_param:
         last_year = (
-            base_qs.order_by("-period__year")
-                   .values_list("period__year", flat=True)
-                   .first()
+            years_qs.order_by("-year")
+                    .values_list("year", flat=True)
+                    .first()
         )
         if last_year:
             return redirect(f"{request.path}?year={last_year}")
@@ -73,33 +128,59 @@ def income_report(request):
     except ValueError:
         return redirect(request.path)
 
-    last_year = (
-        base_qs.order_by("-period__year")
-               .values_list("period__year", flat=True)
-               .first()
-    )
-
-    qs = base_qs.filter(period__year=year)
-
-    rows = (
-        qs.values("account__code", "account__name")
-          .annotate(total=Sum("amount"))
-          .order_by("account__code")
-    )
-
-    total_ingresos = sum((r["total"] or 0) for r in rows if str(r["account__code"]).startswith("4"))
-    total_gastos   = sum((r["total"] or 0) for r in rows if str(r["account__code"]).startswith("5"))
-    utilidad       = (total_ingresos or 0) - (total_gastos or 0)
+    report = income_statement(company, scenario, year)
+    if report["last_year"] is None:
+        # Año sin datos (ni el anterior): el motor no trae el último año
+        report["last_year"] = (
+            years_qs.order_by("-year")
+                    .values_list("year", flat=True)
+                    .first()
+        )
 
     context = {
         "company": company,
         "scenario": scenario,
         "year": year,
-        "last_year": last_year,
-        "rows": rows,
-        "total_ingresos": total_ingresos,
-        "total_gastos": total_gastos,
-        "utilidad": utilidad,
+        **report,
         "msg": None,
     }
     return render(request, "reports/income.html", context)
+
+
+# ====== EXPORTACIONES (CSV en streaming / XLSX) ======
+
+def _export_response(columns, rows, fmt, filename):
+    if fmt == "xlsx":
+        return FileResponse(xlsx_tempfile(columns, rows, title=filename), as_attachment=True, filename=f"{filename}.xlsx")
+    response = StreamingHttpResponse(stream_csv(columns, rows), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def export_facts(request):
+    """
+    Hechos filtrados como en /api/facts/ (?company=&scenario=&account=&center=
+    &period_from=&period_to=), en ?format=csv (por defecto) o xlsx.
+    La consulta corre mientras se envía la respuesta (apps.core.exports).
+    """
+    fmt = request.GET.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        return HttpResponseBadRequest(f"format debe ser uno de {', '.join(EXPORT_FORMATS)}")
+    try:
+        columns, rows = fact_export(request.GET)
+    except ValidationError as e:
+        return HttpResponseBadRequest(filter_error(e))
+    return _export_response(columns, rows, fmt, "facts_finance")
+
+
+def export_income(request):
+    """EERR comparativo de ?year=YYYY (empresa/escenario por defecto) en CSV o XLSX."""
+    fmt = request.GET.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        return HttpResponseBadRequest(f"format debe ser uno de {', '.join(EXPORT_FORMATS)}")
+    company, scenario = _pick_defaults()
+    year = request.GET.get("year", "")
+    if not company or not scenario or not year.isdigit():
+        return HttpResponseBadRequest("Indica ?year=YYYY (y carga empresa y escenario).")
+    columns, rows = income_export(company, scenario, int(year))
+    return _export_response(columns, rows, fmt, f"estado_resultados_{year}")